@@ -1,7 +1,9 @@
 """
 ASGI config for Beauty project.
 
-It exposes the ASGI callable as a module-level variable named ``application``.
+It exposes the ASGI callable as a module-level variable named ``application``,
+using the ASGI deployment settings (Beauty/settings_asgi.py) unless
+DJANGO_SETTINGS_MODULE says otherwise.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -11,6 +13,6 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Beauty.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Beauty.settings_asgi')
 
 application = get_asgi_application()
@@ -46,6 +46,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware', # First, so wall time covers the whole stack
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware', # Enable locale middleware
@@ -79,10 +80,44 @@ WSGI_APPLICATION = 'Beauty.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLite is tuned for many concurrent users (NFR-1.2); check the effect with
+# "manage.py benchmark_concurrency" after changing any of these.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL', # Readers no longer block the writer or each other
+    'synchronous': 'NORMAL', # Safe with WAL: a power cut can lose the last commits, never corrupt
+    'cache_size': -20000, # Negative means KiB, so 20 MB of page cache per connection
+    'mmap_size': 134217728, # 128 MB of the file read through memory mapping
+    'temp_store': 'MEMORY',
+}
+SQLITE_BUSY_TIMEOUT = 20 # Seconds a writer waits for the lock before "database is locked"
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Run on every new connection
+            'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+            # Take the write lock at BEGIN, so a transaction never fails upgrading a read
+            # lock halfway through; waiting writers queue on the busy timeout instead
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': SQLITE_BUSY_TIMEOUT,
+        },
+        'CONN_MAX_AGE': 600, # Keep connections (and their page cache) between requests
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Per-process memory cache. With several worker processes, switch to a shared backend
+# (e.g. Redis or Memcached) so invalidations reach every worker.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'beauty-salon',
     }
 }
 
@@ -134,6 +169,14 @@ LOGIN_REDIRECT_URL = 'service_list'
 LOGOUT_REDIRECT_URL = 'home'
 
 
+# Request Metrics (core.middleware.RequestMetricsMiddleware, exported at /metrics/)
+REQUEST_METRICS_ENABLED = True
+REQUEST_METRICS_N_PLUS_ONE_THRESHOLD = 5 # Identical query shapes per request before flagging an N+1
+REQUEST_METRICS_SLOW_REQUEST = 3.0 # Seconds (NFR-1.1)
+REQUEST_METRICS_SLOW_QUERY = 2.0 # Seconds (NFR-1.3)
+METRICS_TOKEN = '' # Set to let a scraper read /metrics/ with "Authorization: Bearer <token>"
+
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
@@ -144,6 +187,51 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Salon schedule (appointments.availability.get_schedule), shared by the booking form,
+# the availability API, the reports and "manage.py generate_slot_grid"
+SALON_SCHEDULE = {
+    'OPENING_TIME': '10:00',
+    'CLOSING_TIME': '20:00',
+    'SLOT_INTERVAL': 30, # Minutes between offered start times and slot grid rows
+    'WEEKLY_HOLIDAYS': [0], # date.weekday() numbers, 0 = Monday
+}
+
+# Threads resizing uploaded package images (services.images)
+IMAGE_VARIANT_WORKERS = 2
+
+# Notification outbox (core.notifications), sent by "manage.py send_notifications"
+# Emails go through Django's mail settings below. SMS prints to the console until an
+# SMS gateway backend is configured.
+NOTIFICATION_BACKENDS = {
+    'EMAIL': 'core.notifications.EmailBackend',
+    'SMS': 'core.notifications.ConsoleBackend',
+}
+
+# Outgoing mail (confirmation emails). Point EMAIL_HOST/EMAIL_PORT/EMAIL_HOST_USER/
+# EMAIL_HOST_PASSWORD/EMAIL_USE_TLS at your SMTP server, or use
+# 'django.core.mail.backends.console.EmailBackend' to print emails while developing.
+EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+DEFAULT_FROM_EMAIL = 'Rose-Gold Beauty Salon <no-reply@localhost>'
+NOTIFICATION_FILE_PATH = BASE_DIR / 'notifications.jsonl' # Used by core.notifications.FileBackend
+NOTIFICATION_WORKERS = 4 # Messages sent in parallel
+NOTIFICATION_MAX_ATTEMPTS = 5 # Then the message is marked FAILED
+NOTIFICATION_RETRY_DELAY = 60 # Seconds before the first retry, doubling after each failure
+NOTIFICATION_MAX_RETRY_DELAY = 3600 # Seconds
+
+# Audit log of staff actions (core.audit), buffered in memory and written in batches
+AUDIT_LOG_BACKEND = 'database' # Or 'file': JSON lines in AUDIT_LOG_FILE
+AUDIT_LOG_FILE = BASE_DIR / 'audit' / 'audit.jsonl'
+AUDIT_LOG_MAX_BYTES = 10 * 1024 * 1024 # Then the file is rotated
+AUDIT_LOG_BACKUP_COUNT = 10 # Rotated files kept
+AUDIT_BUFFER_SIZE = 200 # Entries waiting before they are written
+AUDIT_FLUSH_INTERVAL = 5 # Seconds an entry may wait
+
+# Online database backups (core.backup), e.g. nightly: "manage.py backup_database"
+BACKUP_DIR = BASE_DIR / 'backups'
+BACKUP_KEEP = 14 # Newest snapshots kept
+BACKUP_PAGES_PER_STEP = 1024 # Pages copied at a time (4 MB with the default page size)
+BACKUP_STEP_SLEEP = 0.05 # Seconds writers get between steps
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -0,0 +1,10 @@
+"""
+Settings for serving the project over ASGI (Beauty/asgi.py), e.g. with uvicorn.
+See "Deploying with uvicorn (ASGI)" in README.md.
+"""
+from .settings import *  # noqa: F401,F403
+
+# Under ASGI the sync code of each request runs on a thread of its own, so a
+# connection kept open after the request is never reused, only leaked. Django
+# recommends disabling persistent connections with async servers; opening SQLite is cheap.
+DATABASES['default']['CONN_MAX_AGE'] = 0
@@ -1,15 +1,88 @@
-from django.contrib import admin
-from .models import Appointment, BookingSlot
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.views.main import ChangeList, ORDER_VAR
+from core.audit import AuditedAdminMixin
+from services.models import ServicePackage
+from .models import Appointment, BookingSlot, Resource
+from .search import rank_appointments
+from .transitions import transition_appointments
+
+class SearchRankedChangeList(ChangeList):
+    """Keep full-text relevance order for searches unless a column sort was chosen"""
+
+    def get_ordering(self, request, queryset):
+        if 'search_rank' in queryset.query.annotations and ORDER_VAR not in self.params:
+            return ['search_rank', '-pk']
+        return super().get_ordering(request, queryset)
 
 @admin.register(Appointment)
-class AppointmentAdmin(admin.ModelAdmin):
-    list_display = ('customer', 'package', 'date', 'time', 'status', 'created_at')
-    list_filter = ('status', 'date')
-    search_fields = ('customer__username', 'customer__email', 'notes')
+class AppointmentAdmin(AuditedAdminMixin, admin.ModelAdmin):
+    list_display = ('customer', 'package', 'resource', 'date', 'time', 'status', 'created_at')
+    list_filter = ('status', 'resource', 'date')
+    list_select_related = ('customer', 'package', 'resource')
+    search_fields = ('customer__username', 'customer__phone_number', 'customer__email', 'notes')
+    search_help_text = "Search by customer name, phone, email or notes"
     date_hierarchy = 'date'
+    actions = ['mark_confirmed', 'mark_completed', 'mark_cancelled']
+    audit_status_field = 'status'
+
+    def _transition(self, request, queryset, new_status):
+        changed, skipped = transition_appointments(queryset.values_list('pk', flat=True), new_status, request.user)
+        self.message_user(request, f"{len(changed)} appointment(s) marked as {new_status.lower()}.", messages.SUCCESS)
+        if skipped:
+            self.message_user(
+                request, f"{skipped} appointment(s) skipped: their status does not allow this change.", messages.WARNING,
+            )
+
+    @admin.action(description="Confirm selected appointments", permissions=['change'])
+    def mark_confirmed(self, request, queryset):
+        self._transition(request, queryset, 'CONFIRMED')
+
+    @admin.action(description="Complete selected appointments", permissions=['change'])
+    def mark_completed(self, request, queryset):
+        self._transition(request, queryset, 'COMPLETED')
+
+    @admin.action(description="Cancel selected appointments and free their slots", permissions=['change'])
+    def mark_cancelled(self, request, queryset):
+        self._transition(request, queryset, 'CANCELLED')
+
+    def get_readonly_fields(self, request, obj=None):
+        # Saving the form would skip TRANSITIONS and leave a cancelled booking's slot taken,
+        # so existing appointments change status through the actions above
+        if obj is not None:
+            return (*super().get_readonly_fields(request, obj), 'status')
+        return super().get_readonly_fields(request, obj)
+
+    def get_changelist(self, request, **kwargs):
+        return SearchRankedChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        # Served by the full-text index (appointments.search) instead of icontains lookups
+        if not search_term:
+            return queryset, False
+        return rank_appointments(queryset, search_term), False
 
 @admin.register(BookingSlot)
-class BookingSlotAdmin(admin.ModelAdmin):
-    list_display = ('date', 'start_time', 'end_time', 'is_available', 'appointment')
-    list_filter = ('date', 'is_available')
+class BookingSlotAdmin(AuditedAdminMixin, admin.ModelAdmin):
+    list_display = ('date', 'start_time', 'end_time', 'resource', 'is_available', 'appointment')
+    list_filter = ('resource', 'date', 'is_available')
+    list_select_related = ('resource', 'appointment__customer')
     date_hierarchy = 'date'
+
+class ResourceForm(forms.ModelForm):
+    categories = forms.MultipleChoiceField(
+        choices=ServicePackage.CATEGORY_CHOICES,
+        widget=forms.CheckboxSelectMultiple,
+        required=False,
+        help_text="Service categories this stylist/chair can take. Leave empty for all.",
+    )
+
+    class Meta:
+        model = Resource
+        fields = ['name', 'kind', 'categories', 'is_active']
+
+@admin.register(Resource)
+class ResourceAdmin(AuditedAdminMixin, admin.ModelAdmin):
+    form = ResourceForm
+    list_display = ('name', 'kind', 'categories', 'is_active')
+    list_filter = ('kind', 'is_active')
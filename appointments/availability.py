@@ -0,0 +1,222 @@
+"""
+Availability engine for appointment booking.
+
+Every booked appointment is stored as a BookingSlot covering [start_time, end_time)
+on a single date and resource (stylist or chair). Two intervals overlap when
+(start < other_end) and (end > other_start), so checking a new booking only needs
+the booked slots of that one day. The composite
+index on (date, is_available, start_time, end_time) lets the database jump straight to
+that day's booked rows, so the cost does not grow with months of history.
+"""
+from collections import defaultdict, namedtuple
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import BookingSlot, Resource
+
+# Business Rule: Appointments must be booked at least 2 hours in advance
+MIN_LEAD_TIME = timedelta(hours=2)
+
+# Business Rule: Salon hours 10 AM - 8 PM, weekly holiday on Monday. Used for any key
+# missing from settings.SALON_SCHEDULE.
+DEFAULT_SCHEDULE = {
+    'OPENING_TIME': '10:00',
+    'CLOSING_TIME': '20:00',
+    'SLOT_INTERVAL': 30,
+    'WEEKLY_HOLIDAYS': [0],
+}
+
+Schedule = namedtuple('Schedule', ['opening', 'closing', 'slot_interval', 'weekly_holidays'])
+
+
+def get_schedule():
+    """
+    The salon's opening and closing times, the minutes between offered start times
+    (and slot grid rows) and the weekly holidays as date.weekday() numbers, from
+    settings.SALON_SCHEDULE. Booking, availability, reports and the slot grid all read
+    it here so they always agree.
+    """
+    values = {**DEFAULT_SCHEDULE, **getattr(settings, 'SALON_SCHEDULE', {})}
+    return Schedule(
+        opening=time.fromisoformat(values['OPENING_TIME']),
+        closing=time.fromisoformat(values['CLOSING_TIME']),
+        slot_interval=int(values['SLOT_INTERVAL']),
+        weekly_holidays=tuple(values['WEEKLY_HOLIDAYS']),
+    )
+
+
+def get_end_time(start_time, duration):
+    """Return the time `duration` minutes after `start_time` (same-day appointments)"""
+    # Using a dummy date to add time
+    dummy_date = datetime(2000, 1, 1, start_time.hour, start_time.minute)
+    return (dummy_date + timedelta(minutes=duration)).time()
+
+
+def is_holiday(day):
+    return day.weekday() in get_schedule().weekly_holidays
+
+
+def fits_salon_hours(start_time, duration):
+    """Check that [start_time, start_time + duration) lies inside salon hours"""
+    schedule = get_schedule()
+    start = datetime.combine(datetime(2000, 1, 1), start_time)
+    end = start + timedelta(minutes=duration)
+    return (
+        start_time >= schedule.opening
+        and end <= datetime.combine(start.date(), schedule.closing)
+    )
+
+
+def overlapping_slots(date, start_time, end_time, exclude_appointment=None, resource=None):
+    """
+    Booked slots on `date` that overlap the half-open interval [start_time, end_time),
+    on one `resource` or, by default, on any of them
+    """
+    queryset = BookingSlot.objects.filter(
+        date=date,
+        is_available=False,
+        start_time__lt=end_time,
+        end_time__gt=start_time,
+    )
+    if resource is not None:
+        queryset = queryset.filter(resource=resource)
+    if exclude_appointment is not None:
+        # Rescheduling: an appointment never conflicts with its own slot
+        queryset = queryset.exclude(appointment=exclude_appointment)
+    return queryset
+
+
+def is_slot_free(date, start_time, end_time, exclude_appointment=None, resource=None):
+    """Answer "is [start_time, end_time) free on `date`?" with a single indexed query"""
+    return not overlapping_slots(date, start_time, end_time, exclude_appointment, resource).exists()
+
+
+# Created on first use when the salon has no stylists/chairs at all
+DEFAULT_RESOURCE = 'Chair 1'
+
+
+def active_resources():
+    """
+    Active stylists/chairs. A fresh install has none until some are added in the admin,
+    so the first lookup creates DEFAULT_RESOURCE, a chair serving every category: one
+    booking at a time, as before resources existed. Resources that were all deactivated
+    on purpose are left alone.
+    """
+    resources = list(Resource.objects.filter(is_active=True))
+    if not resources and not Resource.objects.exists():
+        resource, _created = Resource.objects.get_or_create(name=DEFAULT_RESOURCE, defaults={'kind': 'CHAIR'})
+        resources = [resource]
+    return resources
+
+
+def qualified_resources(category):
+    """Active stylists/chairs that can serve a package of `category`"""
+    return [resource for resource in active_resources() if resource.can_serve(category)]
+
+
+def free_resources(date, start_time, end_time, resources, exclude_appointment=None):
+    """
+    The `resources` with nothing booked during [start_time, end_time) on `date`, mapped
+    to the minutes already booked on them that day. One query for all resources.
+    """
+    rows = BookingSlot.objects.filter(date=date, is_available=False, resource__in=resources)
+    if exclude_appointment is not None:
+        rows = rows.exclude(appointment=exclude_appointment)
+
+    load = defaultdict(int)
+    busy = set()
+    for resource_id, start, end in rows.values_list('resource_id', 'start_time', 'end_time'):
+        load[resource_id] += _minutes(end) - _minutes(start)
+        if start < end_time and end > start_time:
+            busy.add(resource_id)
+    return {resource: load[resource.pk] for resource in resources if resource.pk not in busy}
+
+
+def least_loaded_resource(date, start_time, end_time, resources, exclude_appointment=None):
+    """
+    The free resource with the fewest booked minutes on `date` (lowest id on ties), so
+    work spreads evenly over the team. None if every resource is busy.
+    """
+    free = free_resources(date, start_time, end_time, resources, exclude_appointment)
+    if not free:
+        return None
+    return min(free, key=lambda resource: (free[resource], resource.pk))
+
+
+def earliest_booking_time():
+    """The earliest (naive, local) datetime a new appointment may start at"""
+    return timezone.localtime().replace(tzinfo=None, second=0, microsecond=0) + MIN_LEAD_TIME
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def _free_candidates(candidates, duration, intervals):
+    """
+    The candidate starts (minutes, ascending) not overlapping any of `intervals`
+    (sorted by start). A single sweep: track the latest end among intervals that start
+    before the candidate ends; if that end is after the candidate start, they overlap.
+    """
+    free = []
+    index = 0
+    latest_end = -1
+    for candidate in candidates:
+        candidate_end = candidate + duration
+        while index < len(intervals) and intervals[index][0] < candidate_end:
+            latest_end = max(latest_end, intervals[index][1])
+            index += 1
+        if latest_end <= candidate:
+            free.append(candidate)
+    return free
+
+
+def free_start_times(start_date, end_date, duration, step=None, not_before=None, resources=None):
+    """
+    Map every date in [start_date, end_date] to the start times at which a service of
+    `duration` minutes can be booked on at least one of `resources` (default: every
+    active resource), i.e. the union of free capacity across the team. Start times are
+    `step` minutes apart (default: the schedule's slot interval).
+
+    All booked slots in the range are loaded with one query, then each day and resource
+    is a single sweep over the candidate start times (see _free_candidates).
+    """
+    if resources is None:
+        resources = active_resources()
+    booked = defaultdict(list)
+    rows = BookingSlot.objects.filter(
+        date__range=(start_date, end_date),
+        is_available=False,
+        resource__in=resources,
+    ).order_by('date', 'start_time').values_list('date', 'resource_id', 'start_time', 'end_time')
+    for day, resource_id, start, end in rows:
+        booked[day, resource_id].append((_minutes(start), _minutes(end)))
+
+    schedule = get_schedule()
+    step = step or schedule.slot_interval
+    opening = _minutes(schedule.opening)
+    closing = _minutes(schedule.closing)
+    grid = {}
+    day = start_date
+    while day <= end_date:
+        earliest = opening
+        if day.weekday() in schedule.weekly_holidays:
+            earliest = closing + 1  # Salon closed
+        elif not_before is not None:
+            if day < not_before.date():
+                earliest = closing + 1  # Whole day is in the past
+            elif day == not_before.date():
+                earliest = max(opening, _minutes(not_before))
+
+        candidates = [
+            candidate for candidate in range(opening, closing - duration + 1, step)
+            if candidate >= earliest
+        ]
+        free = set()
+        for resource in resources:
+            free.update(_free_candidates(candidates, duration, booked[day, resource.pk]))
+        grid[day] = [time(candidate // 60, candidate % 60) for candidate in sorted(free)]
+        day += timedelta(days=1)
+    return grid
@@ -0,0 +1,97 @@
+"""
+Transactional booking: saving an appointment and claiming its BookingSlot.
+
+The availability check, the Appointment insert and the slot claim all happen in one
+transaction, so two customers racing for the last free chair can never both win and
+a failed claim never leaves an appointment without its slot behind.
+
+Each booking goes to the least-loaded stylist/chair that is qualified for the
+package's category and free for the whole interval (see
+availability.least_loaded_resource). The confirmation SMS/email is queued in the same
+transaction (appointments.notifications).
+"""
+import time
+
+from django.db import IntegrityError, OperationalError, transaction
+
+from .availability import get_end_time, least_loaded_resource, qualified_resources
+from .models import BookingSlot, Resource
+from .notifications import queue_appointment_notifications
+
+# Attempts made when another writer holds the database lock
+CLAIM_ATTEMPTS = 5
+CLAIM_RETRY_DELAY = 0.05  # seconds, grows linearly per attempt
+
+
+class SlotUnavailable(Exception):
+    """No qualified stylist/chair is free for the requested time"""
+
+
+def _claim(appointment, end_time, resources):
+    with transaction.atomic():
+        # Lock the qualified resources (always present, unlike the day's slot rows) so
+        # concurrent bookings that could land on the same stylist/chair queue up on
+        # databases with row locks, in pk order to avoid deadlocks. SQLite ignores
+        # this; it serializes writers instead.
+        list(
+            Resource.objects.select_for_update()
+            .filter(pk__in=[resource.pk for resource in resources])
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
+        resource = least_loaded_resource(appointment.date, appointment.time, end_time, resources)
+        if resource is None:
+            raise SlotUnavailable
+
+        appointment.resource = resource
+        appointment.save()
+
+        # Reuse a free row at this start time (pre-generated grid or a cancelled booking)
+        # when one exists, otherwise insert. unique_together(resource, date, start_time)
+        # rejects a racing duplicate.
+        claimed = BookingSlot.objects.filter(
+            resource=resource,
+            date=appointment.date,
+            start_time=appointment.time,
+            is_available=True,
+        ).update(end_time=end_time, is_available=False, appointment=appointment)
+        if not claimed:
+            BookingSlot.objects.create(
+                resource=resource,
+                date=appointment.date,
+                start_time=appointment.time,
+                end_time=end_time,
+                is_available=False,
+                appointment=appointment,
+            )
+        # Queued in the same transaction, sent by the notification worker
+        queue_appointment_notifications([appointment], 'BOOKED')
+    return appointment
+
+
+def book_appointment(appointment):
+    """
+    Save a new, unsaved `appointment` and claim its time atomically.
+
+    Raises SlotUnavailable if no qualified resource is free for the interval. Lock
+    contention and losing a race for a resource are retried a few times; by then the
+    winner's slot is visible, so the retry picks another free resource or the loser
+    gets SlotUnavailable instead of a server error.
+    """
+    end_time = get_end_time(appointment.time, appointment.package.duration)
+    resources = qualified_resources(appointment.package.category)
+    for attempt in range(1, CLAIM_ATTEMPTS + 1):
+        try:
+            return _claim(appointment, end_time, resources)
+        except (IntegrityError, SlotUnavailable, OperationalError) as exc:
+            # The transaction was rolled back, so the instance is unsaved again
+            appointment.pk = None
+            appointment._state.adding = True
+            appointment.resource = None
+            # IntegrityError: another booking inserted the same resource and start first
+            if isinstance(exc, SlotUnavailable) or (isinstance(exc, OperationalError) and 'locked' not in str(exc)):
+                raise
+            if attempt == CLAIM_ATTEMPTS:
+                # Still contended after retrying: report it as taken rather than a 500
+                raise SlotUnavailable from exc
+        time.sleep(CLAIM_RETRY_DELAY * attempt)
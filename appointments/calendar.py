@@ -0,0 +1,103 @@
+"""
+JSON feed for the admin appointment calendar (FR-2.4).
+
+The calendar asks for one date range at a time and gets the booked slots in it from a
+single .values() query over BookingSlot joined to the appointment, customer, package
+and resource; no model instances are built.
+
+An open calendar polls the feed. Polls are cheap in two ways:
+
+* ETag: the schedule version (derived from the number of appointments and the latest
+  updated_at, and cached) is part of the ETag, so while nothing changes a poll is a
+  304 answered from the cache without touching the database.
+* "changes since": a poll passes the `since` time of its previous response and only
+  gets appointments updated after it, plus the current number of booked slots in the
+  range so the client can tell when it has to refetch everything (e.g. a deletion).
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .models import Appointment, BookingSlot
+
+STATE_KEY = 'appointments:schedule_state'
+# Seconds other worker processes may serve a stale version after a change; the
+# process making the change drops its cached version immediately
+STATE_TIMEOUT = 15
+# `since` handed back is this much earlier than the query, so changes committed while
+# a poll was running are picked up by the next one (re-sent rows are harmless)
+SINCE_OVERLAP = timedelta(seconds=5)
+MAX_RANGE_DAYS = 42  # Six weeks, a full month grid
+
+EVENT_FIELDS = [
+    'appointment_id', 'date', 'start_time', 'end_time', 'appointment__status',
+    'appointment__customer__username', 'appointment__customer__first_name',
+    'appointment__customer__last_name', 'appointment__customer__phone_number',
+    'appointment__package__name', 'resource__name',
+]
+
+
+def schedule_version():
+    version = cache.get(STATE_KEY)
+    if version is None:
+        totals = Appointment.objects.aggregate(count=Count('pk'), last_modified=Max('updated_at'))
+        stamp = int(totals['last_modified'].timestamp() * 1000) if totals['last_modified'] else 0
+        version = f"{totals['count']}.{stamp}"
+        cache.set(STATE_KEY, version, STATE_TIMEOUT)
+    return version
+
+
+def bump_schedule_version():
+    cache.delete(STATE_KEY)
+
+
+def _event(row):
+    name = f"{row['appointment__customer__first_name']} {row['appointment__customer__last_name']}".strip()
+    return {
+        'id': row['appointment_id'],
+        'date': row['date'].isoformat(),
+        'start': row['start_time'].strftime('%H:%M'),
+        'end': row['end_time'].strftime('%H:%M'),
+        'status': row['appointment__status'],
+        'customer': name or row['appointment__customer__username'],
+        'phone': row['appointment__customer__phone_number'],
+        'package': row['appointment__package__name'],
+        'resource': row['resource__name'],
+    }
+
+
+def booked_slots(start_date, end_date):
+    """Slots in the range holding an active booking"""
+    return BookingSlot.objects.filter(
+        date__range=(start_date, end_date),
+        is_available=False,
+        appointment__isnull=False,
+    )
+
+
+def calendar_feed(start_date, end_date, since=None):
+    """
+    Feed for [start_date, end_date]: every booked slot, or with `since` only those
+    whose appointment changed after it, including ones cancelled since (status
+    CANCELLED, for the client to remove).
+    """
+    queried_at = timezone.now()
+    if since is None:
+        slots = booked_slots(start_date, end_date)
+    else:
+        slots = BookingSlot.objects.filter(
+            date__range=(start_date, end_date),
+            appointment__isnull=False,
+            appointment__updated_at__gt=since,
+        )
+    events = [_event(row) for row in slots.order_by('date', 'start_time').values(*EVENT_FIELDS)]
+    return {
+        'start': start_date.isoformat(),
+        'end': end_date.isoformat(),
+        'since': (queried_at - SINCE_OVERLAP).isoformat(),
+        'full': since is None,
+        'events': events,
+        'total': len(events) if since is None else booked_slots(start_date, end_date).count(),
+    }
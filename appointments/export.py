@@ -0,0 +1,136 @@
+"""
+Streaming CSV exports of appointments (FR-4.2 reports, Sec 7.1 customer data export).
+
+Rows are read with .values_list(...).iterator(chunk_size=...) and written one at a
+time into a StreamingHttpResponse (or a file, for the management command), so memory
+stays flat however many years of history are exported. Each export is a single query
+joined with customer and package, ordered by the (-created_at, -id) index.
+"""
+import csv
+from datetime import date
+
+from django.db.models import Count, Sum
+from django.http import StreamingHttpResponse
+
+from .search import search_appointments
+
+CHUNK_SIZE = 2000
+
+# (header, field, may contain user-entered text)
+APPOINTMENT_COLUMNS = [
+    ('ID', 'pk', False),
+    ('Date', 'date', False),
+    ('Time', 'time', False),
+    ('Duration (min)', 'duration', False),
+    ('Status', 'status', False),
+    ('Price (PKR)', 'price', False),
+    ('Customer', 'customer__username', True),
+    ('First name', 'customer__first_name', True),
+    ('Last name', 'customer__last_name', True),
+    ('Phone', 'customer__phone_number', False),
+    ('Email', 'customer__email', True),
+    ('Package', 'package__name', True),
+    ('Category', 'package__category', False),
+    ('Stylist/Chair', 'resource__name', True),
+    ('Notes', 'notes', True),
+    ('Booked at', 'created_at', False),
+]
+
+# Columns left out of a customer's own export
+CUSTOMER_HIDDEN_FIELDS = {'customer__username', 'customer__first_name', 'customer__last_name',
+                          'customer__phone_number', 'customer__email', 'resource__name'}
+
+REVENUE_COLUMNS = ['Date', 'Completed appointments', 'Revenue (PKR)']
+
+# Spreadsheet apps run cells starting with these as formulas
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def filter_appointments(queryset, params):
+    """
+    Apply the admin dashboard filters from `params` (a QueryDict or dict):
+    q (search), status, date_from and date_to (YYYY-MM-DD, inclusive).
+    """
+    search_query = params.get('q', '')
+    if search_query:
+        queryset = search_appointments(queryset, search_query)
+
+    status_filter = params.get('status', '')
+    if status_filter:
+        queryset = queryset.filter(status=status_filter)
+
+    for param, lookup in (('date_from', 'date__gte'), ('date_to', 'date__lte')):
+        try:
+            value = date.fromisoformat(params.get(param, ''))
+        except ValueError:
+            continue  # Missing or malformed: not filtered
+        queryset = queryset.filter(**{lookup: value})
+    return queryset
+
+
+class Echo:
+    """File-like object that hands back what is written, for csv.writer in a generator"""
+
+    def write(self, value):
+        return value
+
+
+def _cell(value, user_text):
+    if value is None:
+        return ''
+    if user_text and isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def appointment_rows(queryset, columns=APPOINTMENT_COLUMNS):
+    """Yield the header and one list per appointment, reading `CHUNK_SIZE` rows at a time"""
+    yield [header for header, _field, _text in columns]
+    fields = [field for _header, field, _text in columns]
+    text = [user_text for _header, _field, user_text in columns]
+    rows = queryset.order_by('-created_at', '-id').values_list(*fields).iterator(chunk_size=CHUNK_SIZE)
+    for row in rows:
+        yield [_cell(value, user_text) for value, user_text in zip(row, text)]
+
+
+def customer_columns():
+    return [column for column in APPOINTMENT_COLUMNS if column[1] not in CUSTOMER_HIDDEN_FIELDS]
+
+
+def revenue_rows(queryset):
+    """Yield the header and completed appointments and revenue per day, oldest first"""
+    yield REVENUE_COLUMNS
+    rows = (
+        queryset.filter(status='COMPLETED')
+        .order_by()
+        .values('date')
+        .annotate(count=Count('pk'), revenue=Sum('price'))
+        .order_by('date')
+        .values_list('date', 'count', 'revenue')
+    )
+    yield from rows.iterator(chunk_size=CHUNK_SIZE)
+
+
+def write_csv(rows, output):
+    """Write `rows` to a file object; returns the number of data rows"""
+    writer = csv.writer(output)
+    count = -1  # Header
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    return max(count, 0)
+
+
+def stream_csv(rows, filename):
+    """StreamingHttpResponse sending `rows` as a CSV download"""
+    response = StreamingHttpResponse(_csv_lines(rows), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def _csv_lines(rows):
+    writer = csv.writer(Echo())
+    # Byte order mark so Excel opens the UTF-8 file with the right encoding
+    yield '\ufeff'
+    for row in rows:
+        yield writer.writerow(row)
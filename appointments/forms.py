@@ -1,7 +1,11 @@
 from django import forms
-from .models import Appointment, BookingSlot
+from .models import Appointment
+from .availability import (
+    earliest_booking_time, fits_salon_hours, free_resources, get_end_time, get_schedule, is_holiday,
+    qualified_resources,
+)
 from django.utils import timezone
-from datetime import datetime, time, timedelta
+from datetime import datetime
 
 class AppointmentForm(forms.ModelForm):
     date = forms.DateField(widget=forms.DateInput(attrs={'type': 'date', 'min': datetime.now().date()}))
@@ -24,26 +28,44 @@ class AppointmentForm(forms.ModelForm):
 
         # Combine date and time for validation
         booking_datetime = datetime.combine(date, selected_time)
-        now = datetime.now()
         
         # 1. Lead Time Validation (Min 2 hours)
-        if booking_datetime < now + timedelta(hours=2):
+        if booking_datetime < earliest_booking_time():
             raise forms.ValidationError("Appointments must be booked at least 2 hours in advance.")
 
-        # 2. Salon Hours Validation (10 AM - 8 PM)
+        if is_holiday(date):
+            raise forms.ValidationError("The salon is closed on this day. Please choose another date.")
+
+        # 2. Salon Hours Validation (settings.SALON_SCHEDULE, default 10 AM - 8 PM)
         # Note: This is also checked in BookingSlot model, but good to have in form for user feedback
-        OPENING_TIME = time(10, 0)
-        CLOSING_TIME = time(20, 0)
-        if selected_time < OPENING_TIME or selected_time > CLOSING_TIME:
-             raise forms.ValidationError("Salon hours are between 10:00 AM and 8:00 PM.")
+        schedule = get_schedule()
+        if selected_time < schedule.opening or selected_time > schedule.closing:
+             raise forms.ValidationError(
+                 "Salon hours are between %s and %s." % (
+                     schedule.opening.strftime('%I:%M %p'), schedule.closing.strftime('%I:%M %p'),
+                 )
+             )
+
+        package = cleaned_data.get('package')
+        if not package:
+            return cleaned_data
+
+        if not fits_salon_hours(selected_time, package.duration):
+            raise forms.ValidationError(
+                "This service would run past closing time (%s). Please choose an earlier time."
+                % schedule.closing.strftime('%I:%M %p')
+            )
 
         # 3. Availability Validation (Double Booking)
-        # Check if any slot exists for this date/time. 
-        # Ideally, we should check duration overlap, but for Phase 1 basic slot check:
-        # Assuming slots are fixed or we check start time collision.
-        # A more robust check would see if (Start < ExistingEnd) and (End > ExistingStart).
-        # For this form, we check if a booking slot already exists at this exact start time.
-        if BookingSlot.objects.filter(date=date, start_time=selected_time, is_available=False).exists():
+        # At least one qualified stylist/chair must have no overlapping booking:
+        # (Start < ExistingEnd) and (End > ExistingStart).
+        # When rescheduling an existing appointment, its own slot is not a conflict.
+        resources = qualified_resources(package.category)
+        if not resources:
+            raise forms.ValidationError("No stylist is available for this service. Please contact the salon.")
+        end_time = get_end_time(selected_time, package.duration)
+        current = self.instance if self.instance.pk else None
+        if not free_resources(date, selected_time, end_time, resources, exclude_appointment=current):
             raise forms.ValidationError("This time slot is already booked. Please choose another time.")
 
         return cleaned_data
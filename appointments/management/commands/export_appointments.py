@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from appointments.export import appointment_rows, filter_appointments, revenue_rows, write_csv
+from appointments.models import Appointment
+
+
+class Command(BaseCommand):
+    help = "Write appointments (or revenue per day) as CSV, with the admin dashboard filters"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--status', default='', help="Only this status, e.g. COMPLETED")
+        parser.add_argument('--search', default='', help="Customer name, phone, email or notes")
+        parser.add_argument('--from', dest='date_from', default='', help="First appointment date, YYYY-MM-DD")
+        parser.add_argument('--to', dest='date_to', default='', help="Last appointment date, YYYY-MM-DD")
+        parser.add_argument('--customer', default='', help="Only this customer's appointments (username)")
+        parser.add_argument('--revenue', action='store_true', help="Completed appointments and revenue per day")
+        parser.add_argument('-o', '--output', default='-', help="Output file (default: standard output)")
+
+    def handle(self, *args, **options):
+        queryset = filter_appointments(Appointment.objects.all(), {
+            'q': options['search'],
+            'status': options['status'],
+            'date_from': options['date_from'],
+            'date_to': options['date_to'],
+        })
+        if options['customer']:
+            queryset = queryset.filter(customer__username=options['customer'])
+        rows = revenue_rows(queryset) if options['revenue'] else appointment_rows(queryset)
+
+        if options['output'] == '-':
+            write_csv(rows, self.stdout)
+            return
+        with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+            count = write_csv(rows, output)
+        self.stderr.write(self.style.SUCCESS(f"Wrote {count} rows to {options['output']}."))
@@ -0,0 +1,46 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from appointments.availability import active_resources, get_schedule
+from appointments.slots import BATCH_SIZE, generate_slot_grid
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the free booking slot grid for the coming weeks, for every active stylist/chair. "
+        "Hours, slot length and holidays come from settings.SALON_SCHEDULE, which booking also uses."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--weeks', type=int, default=4, help="Number of weeks to generate (default: 4)")
+        parser.add_argument('--start', type=date.fromisoformat, default=None, help="First day, YYYY-MM-DD (default: today)")
+        parser.add_argument(
+            '--resource', action='append', dest='resources', metavar='NAME',
+            help="Only this stylist/chair (repeatable; default: all active ones)",
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        start = options['start'] or date.today()
+        end = start + timedelta(weeks=options['weeks']) - timedelta(days=1)
+        schedule = get_schedule()
+        if schedule.opening >= schedule.closing:
+            raise CommandError("SALON_SCHEDULE: opening time must be before closing time.")
+        if schedule.slot_interval <= 0:
+            raise CommandError("SALON_SCHEDULE: the slot interval must be positive.")
+        if options['weeks'] <= 0:
+            raise CommandError("--weeks must be positive.")
+
+        # Same resources booking uses, including the default chair of a fresh install
+        resources = active_resources()
+        if options['resources']:
+            resources = [resource for resource in resources if resource.name in options['resources']]
+            unknown = set(options['resources']) - {resource.name for resource in resources}
+            if unknown:
+                raise CommandError(f"Unknown or inactive resource: {', '.join(sorted(unknown))}")
+        if not resources:
+            raise CommandError("No active stylists/chairs; add one in the admin first.")
+
+        created = generate_slot_grid(start, end, resources=resources, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Created {created} free slots from {start} to {end}."))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from appointments.stats import get_dashboard_stats, rebuild_status_totals
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-status appointment counts and revenue shown on the admin dashboard"
+
+    def handle(self, *args, **options):
+        rebuild_status_totals()
+        for key, value in get_dashboard_stats().items():
+            self.stdout.write(f"{key}: {value}")
+        self.stdout.write(self.style.SUCCESS("Appointment statistics rebuilt."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from appointments.rollups import rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily revenue and utilization rollups from all appointments"
+
+    def handle(self, *args, **options):
+        count = rebuild_daily_stats()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} daily stats rows."))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from appointments.models import Appointment
+from appointments.search import appointment_index, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Reindex every appointment in the admin full-text search index"
+
+    def handle(self, *args, **options):
+        if not appointment_index.backend:
+            self.stdout.write("No full-text backend for this database; searches use icontains lookups.")
+            return
+        appointment_index.clear()
+        count = rebuild_index(Appointment.objects.all())
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} appointments."))
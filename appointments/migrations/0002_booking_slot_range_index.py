@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bookingslot',
+            index=models.Index(fields=['date', 'is_available', 'start_time', 'end_time'], name='slot_day_range_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:07
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_package_prices(apps, schema_editor):
+    """Backfill the charged price of existing appointments from their package"""
+    Appointment = apps.get_model('appointments', 'Appointment')
+    ServicePackage = apps.get_model('services', 'ServicePackage')
+    Appointment.objects.update(
+        price=Subquery(ServicePackage.objects.filter(pk=OuterRef('package_id')).values('price')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0002_booking_slot_range_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AppointmentStatusTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('CONFIRMED', 'Confirmed'), ('COMPLETED', 'Completed'), ('CANCELLED', 'Cancelled')], max_length=20, unique=True)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='price',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='Price charged in PKR', max_digits=10),
+        ),
+        migrations.RunPython(copy_package_prices, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,87 @@
+"""
+Full-text index for the admin appointment search (see appointments.search).
+
+The table DDL and the backfill are frozen here instead of imported from
+appointments.search/core.search, so this migration keeps building the same index
+whatever those modules become. "manage.py rebuild_search_index" reindexes with the
+current code.
+"""
+import re
+
+from django.db import migrations
+
+TABLE = 'appointments_appointment_search'
+
+
+def full_text_backend(connection):
+    """'sqlite' (FTS5), 'postgresql' (tsvector) or None when there is no text index"""
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+            return 'sqlite' if cursor.fetchone()[0] else None
+    if connection.vendor == 'postgresql':
+        return 'postgresql'
+    return None
+
+
+def phone_variants(phone_number):
+    digits = re.sub(r'\D', '', phone_number or '')
+    if not digits:
+        return ''
+    national = digits[2:] if digits.startswith('92') else digits.lstrip('0')
+    return ' '.join(dict.fromkeys([digits, '0' + national, national, national[-7:]]))
+
+
+def create_search_index(apps, schema_editor):
+    backend = full_text_backend(schema_editor.connection)
+    if backend is None:
+        return
+    if backend == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} "
+            f"USING fts5(customer, phone, email, notes, tokenize='unicode61')"
+        )
+    else:
+        schema_editor.execute(f"CREATE TABLE IF NOT EXISTS {TABLE} (id bigint PRIMARY KEY, document tsvector NOT NULL)")
+        schema_editor.execute(f"CREATE INDEX IF NOT EXISTS {TABLE}_document ON {TABLE} USING GIN (document)")
+
+    Appointment = apps.get_model('appointments', 'Appointment')
+    rows = []
+    for appointment in Appointment.objects.select_related('customer').iterator(chunk_size=1000):
+        customer = appointment.customer
+        rows.append([
+            appointment.pk,
+            f"{customer.username} {customer.first_name} {customer.last_name}",
+            phone_variants(customer.phone_number),
+            customer.email or '',
+            appointment.notes or '',
+        ])
+    if not rows:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        if backend == 'sqlite':
+            cursor.executemany(
+                f"INSERT INTO {TABLE} (rowid, customer, phone, email, notes) VALUES (%s, %s, %s, %s, %s)", rows,
+            )
+        else:
+            cursor.executemany(
+                f"INSERT INTO {TABLE} (id, document) VALUES (%s, to_tsvector('simple', %s))",
+                [[row[0], ' '.join(row[1:])] for row in rows],
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    if full_text_backend(schema_editor.connection):
+        schema_editor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0004_appointment_lookup_indexes'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0005_appointment_search_index'),
+        ('services', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='appointment',
+            name='appt_customer_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='appointment',
+            name='appt_status_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='appointment',
+            name='appt_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['customer', '-created_at', '-id'], name='appt_customer_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='appt_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['-created_at', '-id'], name='appt_created_idx'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def assign_existing_bookings(apps, schema_editor):
+    """Existing slots and appointments were all served by the one salon chair"""
+    Appointment = apps.get_model('appointments', 'Appointment')
+    BookingSlot = apps.get_model('appointments', 'BookingSlot')
+    Resource = apps.get_model('appointments', 'Resource')
+    if not (Appointment.objects.exists() or BookingSlot.objects.exists()):
+        return
+    chair = Resource.objects.create(name='Chair 1', kind='CHAIR')
+    BookingSlot.objects.update(resource=chair)
+    Appointment.objects.update(resource=chair)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0006_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Resource',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('kind', models.CharField(choices=[('STYLIST', 'Stylist'), ('CHAIR', 'Chair')], default='STYLIST', max_length=20)),
+                ('categories', models.JSONField(blank=True, default=list)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='bookingslot',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='resource',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='appointments', to='appointments.resource'),
+        ),
+        migrations.AddField(
+            model_name='bookingslot',
+            name='resource',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='slots', to='appointments.resource'),
+        ),
+        migrations.RunPython(assign_existing_bookings, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='bookingslot',
+            name='resource',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slots', to='appointments.resource'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='bookingslot',
+            unique_together={('resource', 'date', 'start_time')},
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, Q, Sum
+
+
+def backfill_daily_stats(apps, schema_editor):
+    """Same totals as appointments.rollups.daily_totals, for the existing appointments"""
+    Appointment = apps.get_model('appointments', 'Appointment')
+    DailyStats = apps.get_model('appointments', 'DailyStats')
+    aggregates = {
+        f'{status.lower()}_count': Count('pk', filter=Q(status=status))
+        for status in ('PENDING', 'CONFIRMED', 'COMPLETED', 'CANCELLED')
+    }
+    aggregates['revenue'] = Sum('price', filter=Q(status='COMPLETED'), default=0)
+    aggregates['booked_minutes'] = Sum('duration', filter=~Q(status='CANCELLED'), default=0)
+    rows = (
+        Appointment.objects.order_by()
+        .values('date', 'package_id', category=F('package__category'))
+        .annotate(**aggregates)
+    )
+    DailyStats.objects.bulk_create([DailyStats(**values) for values in rows], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0007_resources'),
+        ('services', '0003_package_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('category', models.CharField(max_length=20)),
+                ('pending_count', models.IntegerField(default=0)),
+                ('confirmed_count', models.IntegerField(default=0)),
+                ('completed_count', models.IntegerField(default=0)),
+                ('cancelled_count', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, help_text='Completed appointments, PKR', max_digits=14)),
+                ('booked_minutes', models.IntegerField(default=0, help_text='Minutes of appointments that were not cancelled')),
+                ('package', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='services.servicepackage')),
+            ],
+            options={
+                'verbose_name_plural': 'Daily stats',
+                'constraints': [models.UniqueConstraint(fields=('date', 'package'), name='daily_stats_date_package_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_daily_stats, migrations.RunPython.noop),
+    ]
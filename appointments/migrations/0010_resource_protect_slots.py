@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 20:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0009_appointment_updated_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bookingslot',
+            name='resource',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='slots', to='appointments.resource'),
+        ),
+        migrations.AlterField(
+            model_name='resource',
+            name='is_active',
+            field=models.BooleanField(default=True, help_text='Untick to stop taking new bookings; existing ones are kept.'),
+        ),
+    ]
@@ -2,7 +2,6 @@ from django.db import models
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 from django.core.exceptions import ValidationError
-from datetime import time
 
 class ServicePackage(models.Model):
     # This is just a reference for Foreign Keys, imported from services app usually
@@ -10,6 +9,35 @@ class ServicePackage(models.Model):
     # we will use string reference 'services.ServicePackage'
     pass
 
+class Resource(models.Model):
+    """
+    A stylist or chair that serves one appointment at a time. Each resource has its own
+    slot schedule, so several customers can be booked at the same time.
+
+    Resources that have slots cannot be deleted, since that would drop their bookings
+    and free the times for someone else; retire them with is_active instead.
+    """
+    KIND_CHOICES = [
+        ('STYLIST', _('Stylist')),
+        ('CHAIR', _('Chair')),
+    ]
+
+    name = models.CharField(max_length=100, unique=True)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default='STYLIST')
+    # ServicePackage categories this resource is qualified for; empty means all
+    categories = models.JSONField(default=list, blank=True)
+    is_active = models.BooleanField(default=True, help_text=_("Untick to stop taking new bookings; existing ones are kept."))
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def can_serve(self, category):
+        return not self.categories or category in self.categories
+
+    def __str__(self):
+        return self.name
+
 class Appointment(models.Model):
     STATUS_CHOICES = [
         ('PENDING', _('Pending')),
@@ -20,23 +48,87 @@ class Appointment(models.Model):
 
     customer = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='appointments')
     package = models.ForeignKey('services.ServicePackage', on_delete=models.CASCADE)
+    resource = models.ForeignKey(Resource, on_delete=models.SET_NULL, null=True, blank=True, related_name='appointments') # Assigned at booking
     date = models.DateField()
     time = models.TimeField()
     duration = models.PositiveIntegerField(help_text=_("Duration in minutes"), editable=False) # Copied from package for history
+    price = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False, help_text=_("Price charged in PKR")) # Copied from package for history
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
     notes = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so status changes can be tracked (see appointments.stats)
+        instance._loaded_status = instance.__dict__.get('status')
+        # ...and where it is counted in the daily rollups (see appointments.rollups)
+        instance._loaded_rollup_key = (instance.__dict__.get('date'), instance.__dict__.get('package_id'))
+        return instance
+
+    class Meta:
+        indexes = [
+            # Customer dashboards: upcoming/history by date, and "my appointments" newest first
+            models.Index(fields=['customer', 'date', 'time'], name='appt_customer_date_idx'),
+            models.Index(fields=['customer', '-created_at', '-id'], name='appt_customer_created_idx'),
+            # Admin dashboard: newest first, optionally filtered by status
+            # (-id matches the keyset pagination order, see core.pagination)
+            models.Index(fields=['status', '-created_at', '-id'], name='appt_status_created_idx'),
+            models.Index(fields=['-created_at', '-id'], name='appt_created_idx'),
+            # Calendar feed "changes since" polling (see appointments.calendar)
+            models.Index(fields=['updated_at'], name='appt_updated_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.pk: # New appointment
             self.duration = self.package.duration
+            self.price = self.package.price
         super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.customer} - {self.date} {self.time} ({self.status})"
 
+class AppointmentStatusTotal(models.Model):
+    """
+    Running count and revenue per appointment status, kept up to date incrementally
+    whenever an appointment is created, changes status or is deleted.
+    """
+    status = models.CharField(max_length=20, choices=Appointment.STATUS_CHOICES, unique=True)
+    count = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.status}: {self.count} (PKR {self.revenue})"
+
+class DailyStats(models.Model):
+    """
+    Appointments per day and package, by status, with completed revenue and booked
+    minutes. Kept up to date incrementally as appointments change, so reports never
+    scan the appointments table (see appointments.rollups).
+    """
+    date = models.DateField()
+    package = models.ForeignKey('services.ServicePackage', on_delete=models.CASCADE, related_name='daily_stats')
+    category = models.CharField(max_length=20) # Copied from the package for grouping
+    pending_count = models.IntegerField(default=0)
+    confirmed_count = models.IntegerField(default=0)
+    completed_count = models.IntegerField(default=0)
+    cancelled_count = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text=_("Completed appointments, PKR"))
+    booked_minutes = models.IntegerField(default=0, help_text=_("Minutes of appointments that were not cancelled"))
+
+    class Meta:
+        verbose_name_plural = _("Daily stats")
+        constraints = [
+            # Also the index for date range scans
+            models.UniqueConstraint(fields=['date', 'package'], name='daily_stats_date_package_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.package_id}: {self.completed_count} completed (PKR {self.revenue})"
+
 class BookingSlot(models.Model):
+    resource = models.ForeignKey(Resource, on_delete=models.PROTECT, related_name='slots')
     date = models.DateField()
     start_time = models.TimeField()
     end_time = models.TimeField()
@@ -44,17 +136,26 @@ class BookingSlot(models.Model):
     appointment = models.OneToOneField(Appointment, on_delete=models.SET_NULL, null=True, blank=True, related_name='booking_slot')
 
     class Meta:
-        # Prevent creating multiple slots for same time
-        unique_together = ('date', 'start_time')
+        # Prevent creating multiple slots for same time on one chair/stylist
+        unique_together = ('resource', 'date', 'start_time')
         ordering = ['date', 'start_time']
+        indexes = [
+            # Overlap lookups for a single day (see appointments.availability)
+            models.Index(fields=['date', 'is_available', 'start_time', 'end_time'], name='slot_day_range_idx'),
+        ]
 
     def clean(self):
-        # Business Rule: Salon hours 10 AM - 8 PM
-        OPENING_TIME = time(10, 0)
-        CLOSING_TIME = time(20, 0)
+        # Business Rule: Salon hours (settings.SALON_SCHEDULE, default 10 AM - 8 PM)
+        from .availability import get_schedule
+        schedule = get_schedule()
 
-        if self.start_time < OPENING_TIME or self.end_time > CLOSING_TIME:
-            raise ValidationError(_("Appointments can only be booked between 10 AM and 8 PM."))
+        if self.start_time < schedule.opening or self.end_time > schedule.closing:
+            raise ValidationError(
+                _("Appointments can only be booked between %(opening)s and %(closing)s.") % {
+                    'opening': schedule.opening.strftime('%I:%M %p'),
+                    'closing': schedule.closing.strftime('%I:%M %p'),
+                }
+            )
         
         if self.start_time >= self.end_time:
              raise ValidationError(_("End time must be after start time."))
@@ -0,0 +1,53 @@
+"""
+Customer notifications for appointments (FR-2.1).
+
+Messages are queued in the core outbox inside the booking or status-change
+transaction and sent later by `manage.py send_notifications`, so a slow SMS gateway
+never slows down a request. Each appointment gets at most one message per event and
+channel (the idempotency key), however often the code path runs.
+"""
+from django.utils.translation import gettext as _
+
+from core.notifications import build_message, enqueue
+
+# Status changes a customer is told about
+NOTIFY_STATUSES = {'CONFIRMED', 'CANCELLED'}
+
+
+def _content(appointment, event):
+    """(subject, text) for `event`: 'BOOKED' or a status from NOTIFY_STATUSES"""
+    details = {
+        'package': appointment.package.name,
+        'date': appointment.date.strftime('%d %b %Y'),
+        'time': appointment.time.strftime('%H:%M'),
+    }
+    if event == 'BOOKED':
+        return (
+            _("Appointment request received"),
+            _("We received your booking for %(package)s on %(date)s at %(time)s. "
+              "We will let you know once it is confirmed.") % details,
+        )
+    if event == 'CONFIRMED':
+        return (
+            _("Appointment confirmed"),
+            _("Your appointment for %(package)s on %(date)s at %(time)s is confirmed. See you soon!") % details,
+        )
+    return (
+        _("Appointment cancelled"),
+        _("Your appointment for %(package)s on %(date)s at %(time)s has been cancelled.") % details,
+    )
+
+
+def queue_appointment_notifications(appointments, event):
+    """
+    Queue the SMS and, for customers with an address, the email about `event` for
+    each of `appointments` (with customer and package loaded).
+    """
+    messages = []
+    for appointment in appointments:
+        subject, text = _content(appointment, event)
+        key = f'appointment-{appointment.pk}-{event.lower()}'
+        customer = appointment.customer
+        messages.append(build_message('SMS', customer.phone_number, text, f'{key}-sms'))
+        messages.append(build_message('EMAIL', customer.email, text, f'{key}-email', subject=subject))
+    return enqueue(messages)
@@ -0,0 +1,190 @@
+"""
+Daily rollups for the reports page.
+
+DailyStats holds one row per (date, package): appointment counts by status, revenue of
+the completed ones and the minutes booked by those not cancelled. Every change to an
+appointment moves its contribution from the old (date, package, status) to the new
+one with record_rollup_change(), so report queries only read a few hundred rollup rows
+a year instead of scanning appointments. rebuild_daily_stats() recomputes the whole
+table (`manage.py rebuild_daily_stats`).
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from .availability import get_schedule
+from .models import Appointment, DailyStats, Resource
+from .stats import REVENUE_STATUS, STATUSES
+
+# Statuses that occupy a chair, for utilization
+BOOKED_STATUSES = {'PENDING', 'CONFIRMED', 'COMPLETED'}
+
+BATCH_SIZE = 1000
+
+
+def _contribution(status, count, revenue, minutes):
+    values = {f'{status.lower()}_count': count}
+    if status == REVENUE_STATUS:
+        values['revenue'] = revenue
+    if status in BOOKED_STATUSES:
+        values['booked_minutes'] = minutes
+    return values
+
+
+def record_rollup_change(day, package_id, category, old_status, new_status, count=1, revenue=0, minutes=0):
+    """
+    Move `count` appointments on `day` for one package, worth `revenue` and `minutes` in
+    total, from `old_status` to `new_status` (None for created/deleted appointments).
+    """
+    changes = defaultdict(int)
+    if old_status is not None:
+        for field, value in _contribution(old_status, count, revenue, minutes).items():
+            changes[field] -= value
+    if new_status is not None:
+        for field, value in _contribution(new_status, count, revenue, minutes).items():
+            changes[field] += value
+    changes = {field: value for field, value in changes.items() if value}
+    if not changes:
+        return
+    if new_status is not None:
+        DailyStats.objects.get_or_create(date=day, package_id=package_id, defaults={'category': category})
+    # Removals only touch an existing row, so a package being deleted is never re-referenced
+    DailyStats.objects.filter(date=day, package_id=package_id).update(
+        **{field: F(field) + value for field, value in changes.items()}
+    )
+
+
+def record_appointment_change(appointment, old_key, old_status):
+    """
+    Update the rollups after `appointment` was saved. `old_key` is the (date, package_id)
+    and `old_status` the status it was counted under before (None if it is new).
+    """
+    new_key = (appointment.date, appointment.package_id)
+    if old_key == new_key and old_status == appointment.status:
+        return
+    category = appointment.package.category
+    values = {'revenue': appointment.price, 'minutes': appointment.duration}
+    if old_status is None or old_key == new_key:
+        record_rollup_change(*new_key, category, old_status, appointment.status, **values)
+    else:
+        # Rescheduled: leaves one day (or package) and joins another
+        record_rollup_change(*old_key, category, old_status, None, **values)
+        record_rollup_change(*new_key, category, None, appointment.status, **values)
+
+
+def daily_totals(queryset=None):
+    """Rollup values per (date, package) computed from appointments, in one grouped query"""
+    if queryset is None:
+        queryset = Appointment.objects.all()
+    aggregates = {f'{status.lower()}_count': Count('pk', filter=Q(status=status)) for status in STATUSES}
+    aggregates['revenue'] = Sum('price', filter=Q(status=REVENUE_STATUS), default=0)
+    aggregates['booked_minutes'] = Sum('duration', filter=Q(status__in=BOOKED_STATUSES), default=0)
+    return (
+        queryset.order_by()
+        .values('date', 'package_id', category=F('package__category'))
+        .annotate(**aggregates)
+    )
+
+
+def rebuild_daily_stats():
+    """Recompute DailyStats from the appointments table; returns the number of rows"""
+    created = 0
+    with transaction.atomic():
+        DailyStats.objects.all().delete()
+        batch = []
+        for values in daily_totals().iterator(chunk_size=BATCH_SIZE):
+            batch.append(DailyStats(**values))
+            if len(batch) == BATCH_SIZE:
+                created += len(DailyStats.objects.bulk_create(batch))
+                batch = []
+        created += len(DailyStats.objects.bulk_create(batch))
+    return created
+
+
+# Report periods and the function truncating a date to the start of its period
+PERIODS = {
+    'day': lambda day: day,
+    'week': lambda day: day - timedelta(days=day.weekday()),
+    'month': lambda day: day.replace(day=1),
+}
+
+
+def _capacity_minutes(day, resources):
+    """Minutes the salon can be booked on `day` across `resources` chairs/stylists"""
+    schedule = get_schedule()
+    if day.weekday() in schedule.weekly_holidays:
+        return 0
+    opening = schedule.opening.hour * 60 + schedule.opening.minute
+    closing = schedule.closing.hour * 60 + schedule.closing.minute
+    return (closing - opening) * resources
+
+
+def period_report(start_date, end_date, period='day'):
+    """
+    Revenue, appointment counts and utilization of the opening hours per `period`
+    between two dates, oldest first. One query over the day totals of the rollups.
+    Utilization is booked minutes over capacity with the currently active resources.
+    """
+    truncate = PERIODS[period]
+    resources = Resource.objects.filter(is_active=True).count()
+    rows = (
+        DailyStats.objects.filter(date__range=(start_date, end_date))
+        .order_by('date')
+        .values('date')
+        .annotate(
+            revenue=Sum('revenue'),
+            completed=Sum('completed_count'),
+            cancelled=Sum('cancelled_count'),
+            booked=Sum(F('pending_count') + F('confirmed_count') + F('completed_count')),
+            minutes=Sum('booked_minutes'),
+        )
+    )
+    by_date = {row['date']: row for row in rows}
+
+    report = {}
+    day = start_date
+    while day <= end_date:
+        entry = report.setdefault(truncate(day), {
+            'period': truncate(day), 'revenue': Decimal('0'), 'completed': 0, 'cancelled': 0,
+            'booked': 0, 'minutes': 0, 'capacity': 0,
+        })
+        row = by_date.get(day)
+        if row:
+            for field in ('revenue', 'completed', 'cancelled', 'booked', 'minutes'):
+                entry[field] += row[field]
+        entry['capacity'] += _capacity_minutes(day, resources)
+        day += timedelta(days=1)
+
+    for entry in report.values():
+        entry['utilization'] = round(100 * entry['minutes'] / entry['capacity'], 1) if entry['capacity'] else 0
+    return list(report.values())
+
+
+def popular_packages(start_date, end_date, limit=10):
+    """Packages by appointments booked (not cancelled) between two dates"""
+    return (
+        DailyStats.objects.filter(date__range=(start_date, end_date))
+        .values('package_id', 'package__name', 'category')
+        .annotate(
+            booked=Sum(F('pending_count') + F('confirmed_count') + F('completed_count')),
+            revenue=Sum('revenue'),
+        )
+        .filter(booked__gt=0)
+        .order_by('-booked', '-revenue')[:limit]
+    )
+
+
+def category_totals(start_date, end_date):
+    """Appointments booked and revenue per package category between two dates"""
+    return (
+        DailyStats.objects.filter(date__range=(start_date, end_date))
+        .values('category')
+        .annotate(
+            booked=Sum(F('pending_count') + F('confirmed_count') + F('completed_count')),
+            revenue=Sum('revenue'),
+        )
+        .order_by('-revenue')
+    )
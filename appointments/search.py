@@ -0,0 +1,75 @@
+"""
+Full-text search over appointments for the admin dashboard and admin site.
+
+Each appointment is indexed with its customer's name, phone number, email and the
+appointment notes. Phone numbers are stored as digits in the forms people type them
+(923001234567, 03001234567, 3001234567 and the 7 digit subscriber number), and a
+phone-like query is collapsed to its digits, so "+92-300-1234567", "0300 1234567"
+and "1234567" all find the same customer.
+"""
+import re
+
+from core.search import SearchIndex
+
+appointment_index = SearchIndex(
+    table='appointments_appointment_search',
+    columns=['customer', 'phone', 'email', 'notes'],
+    fallback_fields=[
+        'customer__username', 'customer__first_name', 'customer__last_name',
+        'customer__phone_number', 'customer__email', 'notes',
+    ],
+)
+
+PHONE_QUERY = re.compile(r'^[\d\s()+-]+$')
+
+
+def phone_variants(phone_number):
+    """Digit-only spellings of a +92-XXX-XXXXXXX number"""
+    digits = re.sub(r'\D', '', phone_number or '')
+    if not digits:
+        return ''
+    national = digits[2:] if digits.startswith('92') else digits.lstrip('0')
+    return ' '.join(dict.fromkeys([digits, '0' + national, national, national[-7:]]))
+
+
+def normalize_query(query):
+    query = query.strip()
+    if not appointment_index.backend:
+        # icontains fallback matches the stored +92-XXX-XXXXXXX text as typed
+        return query
+    if PHONE_QUERY.match(query) and re.search(r'\d', query):
+        return re.sub(r'\D', '', query)
+    return query
+
+
+def appointment_document(appointment):
+    customer = appointment.customer
+    return {
+        'customer': f"{customer.username} {customer.first_name} {customer.last_name}",
+        'phone': phone_variants(customer.phone_number),
+        'email': customer.email or '',
+        'notes': appointment.notes or '',
+    }
+
+
+def index_appointment(appointment):
+    appointment_index.update(appointment.pk, appointment_document(appointment))
+
+
+def rebuild_index(queryset):
+    """(Re)index every appointment in `queryset`"""
+    count = 0
+    for appointment in queryset.select_related('customer').iterator(chunk_size=1000):
+        index_appointment(appointment)
+        count += 1
+    return count
+
+
+def search_appointments(queryset, query):
+    """Restrict `queryset` to appointments matching `query`, keeping its ordering"""
+    return appointment_index.filter(queryset, normalize_query(query))
+
+
+def rank_appointments(queryset, query):
+    """The best matches for `query` in `queryset`, most relevant first"""
+    return appointment_index.rank(queryset, normalize_query(query))
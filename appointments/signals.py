@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from services.recommendations import invalidate_user
+from .calendar import bump_schedule_version
+from .models import Appointment
+from .notifications import NOTIFY_STATUSES, queue_appointment_notifications
+from .search import appointment_index, index_appointment, rebuild_index
+from .rollups import record_appointment_change, record_rollup_change
+from .stats import record_status_change
+
+
+@receiver(post_save, sender=Appointment)
+def track_status_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_status = None if created else getattr(instance, '_loaded_status', instance.status)
+    old_key = None if created else getattr(instance, '_loaded_rollup_key', (instance.date, instance.package_id))
+    record_status_change(old_status, instance.status, instance.price)
+    record_appointment_change(instance, old_key, old_status)
+    # e.g. a status edited in the admin form; bulk transitions queue their own
+    if old_status not in (None, instance.status) and instance.status in NOTIFY_STATUSES:
+        queue_appointment_notifications([instance], instance.status)
+    instance._loaded_status = instance.status
+    instance._loaded_rollup_key = (instance.date, instance.package_id)
+
+
+@receiver(post_delete, sender=Appointment)
+def track_status_on_delete(sender, instance, **kwargs):
+    status = getattr(instance, '_loaded_status', instance.status)
+    record_status_change(status, None, instance.price)
+    day, package_id = getattr(instance, '_loaded_rollup_key', (instance.date, instance.package_id))
+    record_rollup_change(day, package_id, None, status, None, revenue=instance.price, minutes=instance.duration)
+
+
+@receiver(post_save, sender=Appointment)
+@receiver(post_delete, sender=Appointment)
+def refresh_calendar(sender, raw=False, **kwargs):
+    # Once committed, so no request caches the version of the old rows
+    if not raw:
+        transaction.on_commit(bump_schedule_version)
+
+
+@receiver(post_save, sender=Appointment)
+def index_appointment_on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_appointment(instance)
+
+
+@receiver(post_delete, sender=Appointment)
+def remove_appointment_from_index(sender, instance, **kwargs):
+    appointment_index.remove(instance.pk)
+
+
+@receiver(post_save, sender=Appointment)
+def refresh_recommendations(sender, instance, created, raw=False, **kwargs):
+    # A new booking can change which categories the customer books most
+    if created and not raw:
+        invalidate_user(instance.customer_id)
+
+
+# Customer fields that are indexed with each appointment
+INDEXED_CUSTOMER_FIELDS = {'username', 'first_name', 'last_name', 'phone_number', 'email'}
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def reindex_customer_appointments(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if created or raw:
+        return
+    # e.g. logins only save last_login
+    if update_fields is not None and not INDEXED_CUSTOMER_FIELDS.intersection(update_fields):
+        return
+    rebuild_index(Appointment.objects.filter(customer=instance))
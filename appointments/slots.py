@@ -0,0 +1,59 @@
+"""
+Pre-generated slot grid.
+
+Instead of inserting a BookingSlot at booking time, the working days ahead can be
+filled with free rows, one per slot interval and active resource, in advance. Booking then claims the free
+row at the chosen start time with a single UPDATE (see appointments.booking), and the
+admin can see the whole schedule, free and booked, as rows.
+
+Free rows never block anything: overlap checks only look at booked rows, so an
+appointment longer than one grid step simply covers the free rows after its start.
+"""
+from datetime import datetime, timedelta
+from itertools import islice
+
+from django.db import transaction
+
+from .availability import active_resources, get_schedule
+from .models import BookingSlot
+
+BATCH_SIZE = 1000
+
+
+def grid_slots(start_date, end_date, resources=None):
+    """
+    Yield unsaved free BookingSlots for every working day in [start_date, end_date] and
+    each of `resources` (default: every active resource), following the salon schedule
+    (availability.get_schedule) that booking checks against
+    """
+    if resources is None:
+        resources = active_resources()
+    schedule = get_schedule()
+    length = timedelta(minutes=schedule.slot_interval)
+    day = start_date
+    while day <= end_date:
+        if day.weekday() not in schedule.weekly_holidays:
+            start = datetime.combine(day, schedule.opening)
+            closes = datetime.combine(day, schedule.closing)
+            while start + length <= closes:
+                for resource in resources:
+                    yield BookingSlot(
+                        resource=resource, date=day, start_time=start.time(), end_time=(start + length).time(),
+                    )
+                start += length
+        day += timedelta(days=1)
+
+
+def generate_slot_grid(start_date, end_date, batch_size=BATCH_SIZE, **options):
+    """
+    Insert the free slot grid for [start_date, end_date] (see grid_slots).
+    Rows that already exist, free or booked, are skipped, so it is safe to re-run over
+    a range. Returns the number of rows inserted.
+    """
+    existing = BookingSlot.objects.filter(date__range=(start_date, end_date))
+    before = existing.count()
+    slots = grid_slots(start_date, end_date, **options)
+    with transaction.atomic():
+        while batch := list(islice(slots, batch_size)):
+            BookingSlot.objects.bulk_create(batch, ignore_conflicts=True)
+    return existing.count() - before
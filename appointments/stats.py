@@ -0,0 +1,84 @@
+"""
+Appointment statistics for the admin dashboard.
+
+summarize_appointments() computes every status count and the revenue in one
+conditional-aggregate query. Because even that is a full scan, the dashboard reads
+the AppointmentStatusTotal table instead: one small row per status, adjusted in place
+by record_status_change() as appointments are created, change status or are deleted.
+The table is (re)built from summarize_appointments() when it is empty, or on demand
+with `manage.py rebuild_appointment_stats`.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from .models import Appointment, AppointmentStatusTotal
+
+STATUSES = [status for status, _label in Appointment.STATUS_CHOICES]
+
+# Only completed appointments count towards revenue
+REVENUE_STATUS = 'COMPLETED'
+
+
+def summarize_appointments(queryset=None):
+    """Count and revenue for every status, computed in a single query"""
+    if queryset is None:
+        queryset = Appointment.objects.all()
+    aggregates = {}
+    for status in STATUSES:
+        aggregates[f'{status.lower()}_count'] = Count('pk', filter=Q(status=status))
+        aggregates[f'{status.lower()}_revenue'] = Sum('price', filter=Q(status=status))
+    totals = queryset.aggregate(**aggregates)
+    return {
+        status: (totals[f'{status.lower()}_count'], totals[f'{status.lower()}_revenue'] or Decimal('0'))
+        for status in STATUSES
+    }
+
+
+def rebuild_status_totals():
+    """Recompute AppointmentStatusTotal from the appointments table"""
+    summary = summarize_appointments()
+    with transaction.atomic():
+        AppointmentStatusTotal.objects.all().delete()
+        AppointmentStatusTotal.objects.bulk_create([
+            AppointmentStatusTotal(status=status, count=count, revenue=revenue)
+            for status, (count, revenue) in summary.items()
+        ])
+
+
+def _adjust(status, count, revenue):
+    AppointmentStatusTotal.objects.filter(status=status).update(
+        count=F('count') + count,
+        revenue=F('revenue') + revenue,
+    )
+
+
+def move_status_totals(old_status, new_status, count, revenue):
+    """
+    Move `count` appointments worth `revenue` in total from `old_status` to `new_status`.
+    Use None as `old_status` for new appointments and as `new_status` for deleted ones.
+    """
+    if old_status == new_status:
+        return
+    if old_status is not None:
+        _adjust(old_status, -count, -revenue)
+    if new_status is not None:
+        _adjust(new_status, count, revenue)
+
+
+def record_status_change(old_status, new_status, price, count=1):
+    """Move `count` appointments worth `price` each (see move_status_totals)"""
+    move_status_totals(old_status, new_status, count, price * count)
+
+
+def get_dashboard_stats():
+    """Status counts and total revenue for the admin dashboard, read from the totals table"""
+    totals = {row.status: row for row in AppointmentStatusTotal.objects.all()}
+    if not totals:
+        rebuild_status_totals()
+        totals = {row.status: row for row in AppointmentStatusTotal.objects.all()}
+
+    stats = {f'{status.lower()}_count': totals[status].count if status in totals else 0 for status in STATUSES}
+    stats['total_revenue'] = totals[REVENUE_STATUS].revenue if REVENUE_STATUS in totals else 0
+    return stats
@@ -1,3 +1,591 @@
-from django.test import TestCase
+import re
+import threading
+from datetime import date, datetime, time, timedelta
+from unittest import skipUnless
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import ProtectedError
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core import audit
+from services.models import ServicePackage
+from users.models import User
+from users import views as user_views
+from . import views
+from .availability import free_start_times, is_holiday, overlapping_slots, qualified_resources
+from .booking import SlotUnavailable, book_appointment
+from .forms import AppointmentForm
+from .models import Appointment, BookingSlot, DailyStats, Resource
+from .rollups import daily_totals, rebuild_daily_stats
+from .search import appointment_index, normalize_query, phone_variants, search_appointments
+from .slots import generate_slot_grid
+from .stats import get_dashboard_stats, rebuild_status_totals
+from .transitions import transition_appointment
+
+
+def make_customer(number):
+    return User.objects.create_user(
+        username=f'customer{number}',
+        phone_number=f'+92-300-{number:07d}',
+    )
+
+
+class BookAppointmentTests(TestCase):
+    def setUp(self):
+        self.package = ServicePackage.objects.create(
+            name='Bridal Makeup', description='Full bridal look', category='BRIDAL',
+            price=25000, duration=90,
+        )
+        self.chair = Resource.objects.create(name='Chair 1')
+        self.day = date.today() + timedelta(days=7)
+
+    def book(self, customer, start):
+        return book_appointment(Appointment(customer=customer, package=self.package, date=self.day, time=start))
+
+    def test_booking_claims_slot(self):
+        appointment = self.book(make_customer(1), time(11, 0))
+        slot = appointment.booking_slot
+        self.assertFalse(slot.is_available)
+        self.assertEqual(slot.end_time, time(12, 30))
+
+    def test_overlapping_booking_is_rejected(self):
+        self.book(make_customer(1), time(11, 0))
+        with self.assertRaises(SlotUnavailable):
+            self.book(make_customer(2), time(11, 30))
+        self.assertEqual(Appointment.objects.count(), 1)
+
+    def test_cancelled_slot_can_be_booked_again(self):
+        appointment = self.book(make_customer(1), time(11, 0))
+        BookingSlot.objects.filter(appointment=appointment).update(is_available=True)
+        rebooked = self.book(make_customer(2), time(11, 0))
+        self.assertEqual(BookingSlot.objects.get().appointment, rebooked)
+
+    def test_parallel_bookings_use_each_qualified_resource(self):
+        Resource.objects.create(name='Skin specialist', categories=['SKIN'])
+        second = Resource.objects.create(name='Chair 2', categories=['BRIDAL', 'MAKEUP'])
+        first = self.book(make_customer(1), time(11, 0))
+        parallel = self.book(make_customer(2), time(11, 30))
+        self.assertEqual({first.resource, parallel.resource}, {self.chair, second})
+        with self.assertRaises(SlotUnavailable):
+            self.book(make_customer(3), time(12, 0))
+
+    def test_least_loaded_resource_is_assigned(self):
+        second = Resource.objects.create(name='Chair 2')
+        self.assertEqual(self.book(make_customer(1), time(11, 0)).resource, self.chair)
+        # Chair 1 already has 90 minutes booked, so the next booking goes to Chair 2
+        self.assertEqual(self.book(make_customer(2), time(15, 0)).resource, second)
+
+    def test_resource_with_bookings_cannot_be_deleted(self):
+        self.book(make_customer(1), time(11, 0))
+        with self.assertRaises(ProtectedError):
+            self.chair.delete()
+        self.assertFalse(BookingSlot.objects.get().is_available)
+
+
+class DefaultResourceTests(TestCase):
+    def test_fresh_install_books_on_the_default_chair(self):
+        package = ServicePackage.objects.create(
+            name='Hydra Facial', description='Facial', category='SKIN', price=5000, duration=30,
+        )
+        day = date(2030, 1, 2)
+        self.assertEqual(free_start_times(day, day, 30)[day][0], time(10, 0))
+        appointment = book_appointment(Appointment(customer=make_customer(1), package=package, date=day, time=time(11, 0)))
+        self.assertEqual(appointment.resource.name, 'Chair 1')
+        self.assertEqual(Resource.objects.count(), 1)
+
+    def test_deactivated_resources_are_not_replaced(self):
+        Resource.objects.create(name='Chair 2', is_active=False)
+        self.assertEqual(qualified_resources('SKIN'), [])
+        self.assertEqual(Resource.objects.count(), 1)
+
+
+class AvailabilityTests(TestCase):
+    # A Wednesday, so never the weekly holiday
+    DAY = date(2030, 1, 2)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.package = ServicePackage.objects.create(
+            name='Hydra Facial', description='Facial', category='SKIN', price=5000, duration=60,
+        )
+        cls.chair = Resource.objects.create(name='Chair 1')
+
+    def free(self, day=None, duration=60, **kwargs):
+        day = day or self.DAY
+        return free_start_times(day, day, duration, **kwargs)[day]
+
+    def book(self, start, end, resource=None):
+        BookingSlot.objects.create(
+            date=self.DAY, start_time=start, end_time=end, resource=resource or self.chair, is_available=False,
+        )
+
+    def test_touching_bookings_do_not_overlap(self):
+        self.book(time(11, 0), time(12, 0))
+        free = self.free()
+        # Ending exactly at 11:00 or starting exactly at 12:00 is fine
+        self.assertIn(time(10, 0), free)
+        self.assertIn(time(12, 0), free)
+        self.assertNotIn(time(10, 30), free)
+        self.assertNotIn(time(11, 0), free)
+        self.assertNotIn(time(11, 30), free)
+
+    def test_free_times_are_the_union_over_resources(self):
+        second = Resource.objects.create(name='Chair 2')
+        self.book(time(11, 0), time(12, 0))
+        self.book(time(10, 30), time(11, 30), resource=second)
+        free = self.free()
+        self.assertNotIn(time(11, 0), free)
+        self.assertIn(time(11, 30), free)
+
+    def test_available_slots_do_not_block(self):
+        BookingSlot.objects.create(
+            date=self.DAY, start_time=time(11, 0), end_time=time(12, 0), resource=self.chair, is_available=True,
+        )
+        self.assertIn(time(11, 0), self.free())
+
+    def test_service_must_end_by_closing_time(self):
+        free = self.free(duration=90)
+        self.assertEqual(free[0], time(10, 0))
+        self.assertEqual(free[-1], time(18, 30))
+
+    def test_lead_time(self):
+        free = self.free(not_before=datetime(2030, 1, 2, 14, 10))
+        self.assertEqual(free[0], time(14, 30))
+        self.assertEqual(self.free(not_before=datetime(2030, 1, 3, 9, 0)), [])
+
+    def test_weekly_holiday_is_closed(self):
+        monday = date(2029, 12, 31)
+        self.assertTrue(is_holiday(monday))
+        self.assertEqual(self.free(day=monday), [])
+
+    @override_settings(SALON_SCHEDULE={'OPENING_TIME': '11:00', 'CLOSING_TIME': '19:00', 'SLOT_INTERVAL': 60,
+                                       'WEEKLY_HOLIDAYS': [2]})
+    def test_schedule_setting_is_shared(self):
+        monday, wednesday = date(2029, 12, 31), self.DAY
+        self.assertEqual(self.free(day=wednesday), [])
+        free = self.free(day=monday)
+        self.assertEqual((free[0], free[-1], len(free)), (time(11, 0), time(18, 0), 8))
+
+        form = AppointmentForm({'package': self.package.pk, 'date': wednesday, 'time': '12:00'})
+        self.assertFalse(form.is_valid())
+        self.assertTrue(AppointmentForm({'package': self.package.pk, 'date': monday, 'time': '12:00'}).is_valid())
+
+        generate_slot_grid(monday, wednesday)
+        days = BookingSlot.objects.values_list('date', flat=True)
+        self.assertEqual(set(days), {monday, date(2030, 1, 1)})
+        self.assertEqual(BookingSlot.objects.filter(date=monday).count(), 8)
+
+    def test_availability_endpoint(self):
+        url = reverse('appointments:availability')
+        response = self.client.get(url, {'package': self.package.pk, 'start': '2029-12-31', 'end': '2030-01-02'})
+        self.assertEqual(response.status_code, 200)
+        slots = response.json()['slots']
+        self.assertEqual(list(slots), ['2029-12-31', '2030-01-01', '2030-01-02'])
+        self.assertEqual(slots['2029-12-31'], [])
+        self.assertEqual(slots['2030-01-02'][0], '10:00')
+
+    def test_availability_endpoint_rejects_bad_input(self):
+        url = reverse('appointments:availability')
+        package = self.package.pk
+        for params in (
+            {},
+            {'package': 'facial'},
+            {'package': package, 'start': '02/01/2030'},
+            {'package': package, 'start': '2030-01-02', 'end': '2030-01-01'},
+            {'package': package, 'start': '2030-01-01', 'end': '2030-02-01'},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(url, params).status_code, 400)
+        self.assertEqual(self.client.get(url, {'package': package + 1}).status_code, 404)
+
+
+class AppointmentSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(
+            username='raazia', first_name='Raazia', phone_number='+92-300-1234567', email='raazia@example.com',
+        )
+        cls.package = ServicePackage.objects.create(
+            name='Hydra Facial', description='Facial', category='SKIN', price=5000, duration=30,
+        )
+        Resource.objects.create(name='Chair 1')
+
+    def book(self, number, notes=''):
+        day = date.today() + timedelta(days=3)
+        start = time(10 + number // 2, 30 * (number % 2))
+        return book_appointment(Appointment(customer=self.customer, package=self.package, date=day, time=start, notes=notes))
+
+    def search(self, query, queryset=None):
+        return list(search_appointments(queryset or Appointment.objects.all(), query))
+
+    def test_phone_variants(self):
+        self.assertEqual(phone_variants('+92-300-1234567'), '923001234567 03001234567 3001234567 1234567')
+        self.assertEqual(phone_variants(''), '')
+
+    def test_phone_queries_are_collapsed_to_digits(self):
+        if not appointment_index.backend:
+            self.skipTest('icontains fallback keeps the query as typed')
+        self.assertEqual(normalize_query(' +92-300-1234567 '), '923001234567')
+        self.assertEqual(normalize_query('(0300) 123 4567'), '03001234567')
+        self.assertEqual(normalize_query('Raazia 0300'), 'Raazia 0300')
+
+    def test_any_phone_spelling_finds_the_customer(self):
+        appointment = self.book(0)
+        for query in ('+92-300-1234567', '0300 1234567', '1234567', 'raaz'):
+            with self.subTest(query=query):
+                self.assertEqual(self.search(query), [appointment])
+
+    def test_index_follows_appointment_and_customer_changes(self):
+        appointment = self.book(0, notes='henna')
+        self.assertEqual(self.search('henna'), [appointment])
+        appointment.notes = 'threading'
+        appointment.save()
+        self.assertEqual(self.search('henna'), [])
+        self.assertEqual(self.search('threading'), [appointment])
+
+        self.customer.first_name = 'Sana'
+        self.customer.save()
+        self.assertEqual(self.search('sana'), [appointment])
+
+        appointment.delete()
+        self.assertEqual(self.search('threading'), [])
+
+    def test_rank_limit_applies_within_the_filtered_queryset(self):
+        if not appointment_index.backend:
+            self.skipTest('icontains fallback does not rank')
+        for number in range(5):
+            self.book(number, notes='bridal trial')
+        # The longest document, so the least relevant match in the whole index
+        weakest = self.book(5, notes='bridal trial with a long list of extra requests for the day')
+        Appointment.objects.filter(pk=weakest.pk).update(status='COMPLETED')
+        completed = Appointment.objects.filter(status='COMPLETED')
+        self.assertEqual(list(appointment_index.rank(completed, 'bridal', limit=3)), [weakest])
+        # Matches beyond the limit are kept, ranked after the best ones
+        ranked = list(appointment_index.rank(Appointment.objects.all(), 'bridal', limit=3))
+        self.assertEqual(len(ranked), 6)
+        self.assertEqual([appointment.search_rank for appointment in ranked], [0, 1, 2, 3, 3, 3])
+        self.assertIn(weakest, ranked[3:])
+
+
+class DashboardQueryCountTests(TestCase):
+    """Appointment lists must cost a fixed number of queries however many rows they show"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = make_customer(1)
+        cls.staff = User.objects.create_user(username='staff', phone_number='+92-300-9999999', is_staff=True)
+        cls.package = ServicePackage.objects.create(
+            name='Hydra Facial', description='Facial', category='SKIN', price=5000, duration=30,
+        )
+        Resource.objects.create(name='Chair 1')
+        rebuild_status_totals()
+
+    def add_appointments(self, count):
+        day = date.today() + timedelta(days=3)
+        for number in range(count):
+            start = time(10 + number // 2, 30 * (number % 2))
+            book_appointment(Appointment(customer=self.customer, package=self.package, date=day, time=start))
+
+    def assertConstantQueries(self, user, url, expected):
+        self.client.force_login(user)
+        for count in (1, 10):
+            self.add_appointments(count)
+            with self.assertNumQueries(expected):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            BookingSlot.objects.all().delete()
+            Appointment.objects.all().delete()
+
+    def test_customer_appointment_list(self):
+        self.assertConstantQueries(self.customer, reverse('appointments:dashboard'), 3)
+
+    def test_admin_dashboard(self):
+        self.assertConstantQueries(self.staff, reverse('appointments:admin_dashboard'), 4)
+
+
+class BulkTransitionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = make_customer(1)
+        cls.staff = User.objects.create_user(username='staff', phone_number='+92-300-9999999', is_staff=True)
+        cls.package = ServicePackage.objects.create(
+            name='Hydra Facial', description='Facial', category='SKIN', price=5000, duration=30,
+        )
+        Resource.objects.create(name='Chair 1')
+        rebuild_status_totals()
+
+    def setUp(self):
+        day = date.today() + timedelta(days=3)
+        self.appointments = [
+            book_appointment(Appointment(customer=self.customer, package=self.package, date=day, time=time(10 + n, 0)))
+            for n in range(3)
+        ]
+        Appointment.objects.filter(pk=self.appointments[2].pk).update(status='COMPLETED')
+        rebuild_status_totals()
+        rebuild_daily_stats()
+
+    def post(self, user, status):
+        self.client.force_login(user)
+        return self.client.post(reverse('appointments:bulk_transition'), {
+            'status': status, 'ids': [appointment.pk for appointment in self.appointments],
+        })
+
+    def test_bulk_cancel_frees_slots_and_skips_finished(self):
+        self.post(self.staff, 'CANCELLED')
+        statuses = list(Appointment.objects.order_by('time').values_list('status', flat=True))
+        self.assertEqual(statuses, ['CANCELLED', 'CANCELLED', 'COMPLETED'])
+        self.assertEqual(BookingSlot.objects.filter(is_available=True).count(), 2)
+        stats = get_dashboard_stats()
+        self.assertEqual((stats['pending_count'], stats['cancelled_count'], stats['completed_count']), (0, 2, 1))
+
+    def test_daily_rollups_match_a_full_rebuild(self):
+        self.post(self.staff, 'CONFIRMED')
+        self.post(self.staff, 'COMPLETED')
+        moved = Appointment.objects.get(pk=self.appointments[0].pk)
+        moved.date += timedelta(days=1)
+        moved.save()
+        Appointment.objects.get(pk=self.appointments[1].pk).delete()
+
+        fields = ['date', 'package_id', 'pending_count', 'confirmed_count', 'completed_count',
+                  'cancelled_count', 'revenue', 'booked_minutes']
+        expected = sorted(daily_totals().values_list(*fields))
+        self.assertEqual(sorted(DailyStats.objects.exclude(
+            pending_count=0, confirmed_count=0, completed_count=0, cancelled_count=0,
+        ).values_list(*fields)), expected)
+
+    def test_customers_cannot_change_status(self):
+        response = self.post(self.customer, 'CANCELLED')
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Appointment.objects.filter(status='CANCELLED').exists())
+
+    def test_single_status_changes_are_post_only(self):
+        url = reverse('appointments:approve_appointment', args=[self.appointments[0].pk])
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(url).status_code, 405)
+        self.assertEqual(Appointment.objects.get(pk=self.appointments[0].pk).status, 'PENDING')
+        next_url = reverse('appointments:admin_dashboard') + '?status=PENDING'
+        self.assertRedirects(self.client.post(url, {'next': next_url}), next_url)
+        self.assertEqual(Appointment.objects.get(pk=self.appointments[0].pk).status, 'CONFIRMED')
+
+    def test_admin_change_form_does_not_edit_status(self):
+        self.client.force_login(User.objects.create_superuser(username='owner', phone_number='+92-300-8888888'))
+        appointment = self.appointments[0]
+        url = reverse('admin:appointments_appointment_change', args=[appointment.pk])
+        self.assertNotContains(self.client.get(url), 'name="status"')
+        self.assertContains(self.client.get(reverse('admin:appointments_appointment_add')), 'name="status"')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('admin:appointments_appointment_changelist'), {
+                'action': 'mark_cancelled', '_selected_action': [appointment.pk],
+            })
+        self.addCleanup(audit.flush)
+        self.assertEqual(Appointment.objects.get(pk=appointment.pk).status, 'CANCELLED')
+        self.assertTrue(BookingSlot.objects.get(appointment=appointment).is_available)
+
+    def test_customer_dashboard_has_no_staff_actions(self):
+        self.client.force_login(self.customer)
+        response = self.client.get(reverse('appointments:dashboard'))
+        self.assertNotContains(response, reverse('appointments:approve_appointment', args=[self.appointments[0].pk]))
+        self.assertNotContains(response, reverse('appointments:cancel_appointment', args=[self.appointments[0].pk]))
+
+
+class CalendarFeedTests(TestCase):
+    DAY = date(2030, 1, 2)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(username='staff', phone_number='+92-300-9999999', is_staff=True)
+        cls.customer = make_customer(1)
+        cls.package = ServicePackage.objects.create(
+            name='Hydra Facial', description='Facial', category='SKIN', price=5000, duration=30,
+        )
+        Resource.objects.create(name='Chair 1')
+
+    def setUp(self):
+        # The schedule version lives in the cache, which outlives each test's transaction
+        cache.clear()
+        self.appointments = [
+            book_appointment(Appointment(customer=self.customer, package=self.package, date=self.DAY, time=time(11 + n, 0)))
+            for n in range(2)
+        ]
+        # Booked an hour ago, so they are older than any `since` handed out below
+        Appointment.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        self.client.force_login(self.staff)
+
+    def feed(self, **params):
+        params = {'start': '2030-01-01', 'end': '2030-01-07', **params}
+        return self.client.get(reverse('appointments:calendar_feed'), params)
+
+    def cancel(self, appointment):
+        with self.captureOnCommitCallbacks(execute=True):
+            transition_appointment(appointment, 'CANCELLED', self.staff)
+        # Write the buffered audit entries while the test database still exists
+        self.addCleanup(audit.flush)
+
+    def test_unchanged_poll_is_not_modified(self):
+        response = self.feed()
+        self.assertEqual([event['start'] for event in response.json()['events']], ['11:00', '12:00'])
+        url = reverse('appointments:calendar_feed') + '?start=2030-01-01&end=2030-01-07'
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': response['ETag']}).status_code, 304)
+
+        self.cancel(self.appointments[0])
+        response = self.client.get(url, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['events']), 1)
+
+    def test_since_returns_only_changes(self):
+        since = self.feed().json()['since']
+        data = self.feed(since=since).json()
+        self.assertEqual((data['full'], data['events'], data['total']), (False, [], 2))
+
+        self.cancel(self.appointments[0])
+        data = self.feed(since=since).json()
+        self.assertEqual([(event['id'], event['status']) for event in data['events']],
+                         [(self.appointments[0].pk, 'CANCELLED')])
+        self.assertEqual(data['total'], 1)
+
+    def test_bad_ranges_are_rejected(self):
+        for params in (
+            {'start': ''},
+            {'end': '07/01/2030'},
+            {'since': 'yesterday'},
+            {'end': '2029-12-31'},
+            {'end': '2030-02-12'},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self.feed(**params).status_code, 400)
+
+    def test_staff_only(self):
+        self.client.force_login(self.customer)
+        self.assertEqual(self.feed().status_code, 403)
+
+
+class ExportTests(TestCase):
+    def test_customer_export_contains_only_their_appointments(self):
+        package = ServicePackage.objects.create(
+            name='Hydra Facial', description='Facial', category='SKIN', price=5000, duration=30,
+        )
+        Resource.objects.create(name='Chair 1')
+        customer, other = make_customer(1), make_customer(2)
+        day = date.today() + timedelta(days=3)
+        for number, (owner, notes) in enumerate([(customer, 'mine'), (other, 'theirs')]):
+            book_appointment(Appointment(customer=owner, package=package, date=day, time=time(11 + number, 0), notes=notes))
+
+        self.client.force_login(customer)
+        response = self.client.get(reverse('appointments:export_my_appointments'))
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn('mine', lines[1])
+        self.assertNotIn('Phone', lines[0])
+
+
+class JsonBookingTests(TestCase):
+    async def test_async_booking_endpoint(self):
+        package = await ServicePackage.objects.acreate(
+            name='Hydra Facial', description='Facial', category='SKIN', price=5000, duration=30,
+        )
+        await Resource.objects.acreate(name='Chair 1')
+        customer = await User.objects.acreate(username='customer1', phone_number='+92-300-0000001')
+        day = date.today() + timedelta(days=7)
+        while is_holiday(day):
+            day += timedelta(days=1)
+        data = {'package': package.pk, 'date': day.isoformat(), 'time': '11:00'}
+        url = reverse('appointments:book_json')
+
+        response = await self.async_client.post(url, data)
+        self.assertEqual(response.status_code, 401)
+
+        await self.async_client.aforce_login(customer)
+        response = await self.async_client.post(url, data)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['resource'], 'Chair 1')
+        response = await self.async_client.post(url, data)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(await Appointment.objects.acount(), 1)
+
+
+class ConcurrentBookingTests(TransactionTestCase):
+    """Fire many simultaneous bookings at one slot: exactly one may win (NFR-1.4, NFR-4.4)"""
+
+    BOOKINGS = 10
+
+    def test_exactly_one_concurrent_booking_wins(self):
+        package = ServicePackage.objects.create(
+            name='Hydra Facial', description='Facial', category='SKIN', price=5000, duration=60,
+        )
+        Resource.objects.create(name='Chair 1')
+        customers = [make_customer(n) for n in range(self.BOOKINGS)]
+        day = date.today() + timedelta(days=7)
+        barrier = threading.Barrier(self.BOOKINGS)
+        results = []
+
+        def attempt(customer):
+            try:
+                barrier.wait()
+                book_appointment(Appointment(customer=customer, package=package, date=day, time=time(15, 0)))
+                results.append('booked')
+            except SlotUnavailable:
+                results.append('taken')
+            except Exception as exc:
+                results.append(repr(exc))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=attempt, args=(customer,)) for customer in customers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results.count('booked'), 1, results)
+        self.assertEqual(results.count('taken'), self.BOOKINGS - 1, results)
+        self.assertEqual(Appointment.objects.count(), 1)
+        self.assertEqual(BookingSlot.objects.filter(is_available=False).count(), 1)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+class HotQueryPlanTests(TestCase):
+    """The hot appointment lookups must be served by indexes, never a full table scan"""
+
+    # "SCAN <table>" not followed by "USING [COVERING] INDEX" is a full table scan
+    FULL_SCAN = re.compile(r'SCAN (\w+)(?! USING (COVERING )?INDEX)(\s|$)')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = make_customer(1)
+        cls.staff = User.objects.create_user(username='staff', phone_number='+92-300-9999999', is_staff=True)
+
+    def request(self, user, **params):
+        request = RequestFactory().get('/', params)
+        request.user = user
+        return request
+
+    def assertNoFullScan(self, queryset):
+        plan = queryset.explain()
+        match = self.FULL_SCAN.search(plan)
+        self.assertIsNone(match, f'Full table scan in query plan:\n{plan}\n\n{queryset.query}')
+
+    def test_customer_dashboard_queries(self):
+        view = user_views.CustomerDashboardView()
+        view.setup(self.request(self.customer))
+        context = view.get_context_data()
+        self.assertNoFullScan(context['upcoming_appointments'])
+        self.assertNoFullScan(context['appointment_history'])
+
+    def test_customer_appointment_list_query(self):
+        view = views.CustomerDashboardView()
+        view.setup(self.request(self.customer))
+        self.assertNoFullScan(view.get_queryset())
+
+    def test_admin_dashboard_queries(self):
+        for params in ({}, {'status': 'PENDING'}):
+            with self.subTest(params=params):
+                view = views.AdminDashboardView()
+                view.setup(self.request(self.staff, **params))
+                self.assertNoFullScan(view.get_queryset())
+
+    def test_slot_overlap_query(self):
+        day = date.today() + timedelta(days=1)
+        self.assertNoFullScan(overlapping_slots(day, time(11, 0), time(12, 30)))
@@ -0,0 +1,117 @@
+"""
+Appointment status transitions, one or many at a time.
+
+TRANSITIONS lists the statuses each status may move to. transition_appointments()
+moves any number of appointments in one transaction with a handful of
+UPDATE ... WHERE id IN (...) statements: one for the appointments, one to free their
+BookingSlots on cancel, one per old status for the dashboard totals and one per
+affected day and package for the daily rollups, plus the customer notifications for
+confirmations and cancellations, and an audit entry per moved appointment
+(core.audit). Appointments whose current status does not allow the move are left
+alone and reported as skipped.
+
+Bulk updates bypass post_save, so everything the signals would do for a single save
+(updated_at, status totals, daily rollups, calendar version) is done here explicitly.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from core import audit
+
+from .calendar import bump_schedule_version
+from .models import Appointment, BookingSlot
+from .notifications import NOTIFY_STATUSES, queue_appointment_notifications
+from .rollups import record_rollup_change
+from .stats import move_status_totals
+
+TRANSITIONS = {
+    'PENDING': {'CONFIRMED', 'CANCELLED'},
+    'CONFIRMED': {'COMPLETED', 'CANCELLED'},
+    'COMPLETED': set(),
+    'CANCELLED': set(),
+}
+
+# Cancelled appointments give their time back
+FREES_SLOT = {'CANCELLED'}
+
+# Stay well under the database limit on query parameters (999 on older SQLite)
+CHUNK_SIZE = 500
+
+
+class InvalidTransition(ValueError):
+    pass
+
+
+def allowed_sources(new_status):
+    """Statuses from which an appointment may move to `new_status`"""
+    return [status for status, targets in TRANSITIONS.items() if new_status in targets]
+
+
+def _chunks(items, size=CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def transition_appointments(pks, new_status, actor=None):
+    """
+    Move the appointments with primary keys `pks` to `new_status`, audited as done by
+    `actor` (None for the system). Returns (changed, skipped): the moved pks and the number left unchanged.
+    """
+    if new_status not in TRANSITIONS:
+        raise InvalidTransition(f"Unknown status {new_status!r}")
+    pks = sorted(set(pks))
+    changed = []
+    audit_entries = []
+    totals = defaultdict(lambda: [0, 0])  # old status -> [count, revenue]
+    rollups = defaultdict(lambda: [0, 0, 0])  # (date, package, category, old status) -> [count, revenue, minutes]
+
+    with transaction.atomic():
+        for chunk in _chunks(pks):
+            rows = (
+                Appointment.objects.select_for_update(of=('self',))
+                .filter(pk__in=chunk, status__in=allowed_sources(new_status))
+                .values_list('pk', 'status', 'price', 'date', 'package_id', 'package__category', 'duration')
+            )
+            for pk, status, price, day, package_id, category, duration in rows:
+                changed.append(pk)
+                audit_entries.append(audit.entry(actor, audit.TRANSITION, Appointment, pk, status, new_status))
+                totals[status][0] += 1
+                totals[status][1] += price
+                rollup = rollups[day, package_id, category, status]
+                rollup[0] += 1
+                rollup[1] += price
+                rollup[2] += duration
+
+        now = timezone.now()
+        for chunk in _chunks(changed):
+            Appointment.objects.filter(pk__in=chunk).update(status=new_status, updated_at=now)
+            if new_status in FREES_SLOT:
+                BookingSlot.objects.filter(appointment__in=chunk).update(is_available=True)
+            if new_status in NOTIFY_STATUSES:
+                queue_appointment_notifications(
+                    Appointment.objects.filter(pk__in=chunk).select_related('customer', 'package'), new_status,
+                )
+
+        for old_status, (count, revenue) in totals.items():
+            move_status_totals(old_status, new_status, count, revenue)
+        for (day, package_id, category, old_status), (count, revenue, minutes) in rollups.items():
+            record_rollup_change(day, package_id, category, old_status, new_status, count, revenue, minutes)
+        if changed:
+            transaction.on_commit(bump_schedule_version)
+        audit.record(audit_entries)
+
+    return changed, len(pks) - len(changed)
+
+
+def transition_appointment(appointment, new_status, actor=None):
+    """Move a single appointment; raises InvalidTransition if its status does not allow it"""
+    changed, _skipped = transition_appointments([appointment.pk], new_status, actor)
+    if not changed:
+        raise InvalidTransition(
+            f"Cannot move appointment {appointment.pk} from {appointment.status} to {new_status}"
+        )
+    appointment.status = new_status
+    appointment._loaded_status = new_status
+    return appointment
@@ -6,9 +6,18 @@ app_name = 'appointments'
 urlpatterns = [
     path('book/', views.BookingView.as_view(), name='book_appointment'),
     path('book/<int:service_id>/', views.BookingView.as_view(), name='book_appointment'),
+    path('availability/', views.availability_json, name='availability'),
+    path('api/book/', views.book_json, name='book_json'),
     path('dashboard/', views.CustomerDashboardView.as_view(), name='dashboard'),
     path('admin-dashboard/', views.AdminDashboardView.as_view(), name='admin_dashboard'),
+    path('reports/', views.ReportsView.as_view(), name='reports'),
+    path('calendar/', views.CalendarView.as_view(), name='calendar'),
+    path('calendar/feed/', views.calendar_feed, name='calendar_feed'),
     path('approve/<int:pk>/', views.approve_appointment, name='approve_appointment'),
     path('cancel/<int:pk>/', views.cancel_appointment, name='cancel_appointment'),
     path('complete/<int:pk>/', views.complete_appointment, name='complete_appointment'),
+    path('bulk-status/', views.bulk_transition, name='bulk_transition'),
+    path('export/appointments.csv', views.export_appointments, name='export_appointments'),
+    path('export/revenue.csv', views.export_revenue, name='export_revenue'),
+    path('export/my-appointments.csv', views.export_my_appointments, name='export_my_appointments'),
 ]
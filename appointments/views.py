@@ -1,14 +1,42 @@
-from django.shortcuts import render, redirect, get_object_or_404
-from django.views.generic import CreateView, ListView
+from django.shortcuts import aget_object_or_404, render, redirect, get_object_or_404
+from django.views.generic import CreateView, ListView, TemplateView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.urls import reverse_lazy
 from django.contrib import messages
-from .models import Appointment, BookingSlot
+from .models import Appointment
 from .forms import AppointmentForm
+from . import calendar
+from .availability import earliest_booking_time, free_start_times, qualified_resources
+from .booking import SlotUnavailable, book_appointment
+from .rollups import PERIODS, category_totals, period_report, popular_packages
+from .stats import get_dashboard_stats
+from .export import appointment_rows, customer_columns, filter_appointments, revenue_rows, stream_csv
+from .transitions import TRANSITIONS, InvalidTransition, transition_appointment, transition_appointments
 from services.models import ServicePackage
-from datetime import datetime, timedelta
-from django.db.models import Q, Sum
-from django.utils.translation import gettext_lazy as _
+from datetime import date, datetime, timedelta
+from django.http import JsonResponse
+from django.views.decorators.http import condition, require_GET, require_POST
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
+from django.utils.http import url_has_allowed_host_and_scheme
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from core.pagination import KeysetPaginationMixin
+import hashlib
+from django.utils.translation import gettext_lazy as _, ngettext
+
+def staff_required(view):
+    """Like AdminDashboardView's test: anonymous users log in, other non-staff get 403"""
+    @wraps(view)
+    @login_required
+    def wrapper(request, *args, **kwargs):
+        if not (request.user.is_staff or request.user.is_superuser):
+            raise PermissionDenied
+        return view(request, *args, **kwargs)
+    return wrapper
 
 class BookingView(LoginRequiredMixin, CreateView):
     model = Appointment
@@ -35,115 +63,321 @@ class BookingView(LoginRequiredMixin, CreateView):
 
     def form_valid(self, form):
         form.instance.customer = self.request.user
-        response = super().form_valid(form)
-        
-        # Create corresponding BookingSlot
-        # Calculate End Time based on package duration
-        start_time = form.cleaned_data['time']
-        duration = form.instance.package.duration
-        
-        # Simple duration addition (logic might need refinement for creating datetime then extracting time 
-        # to handle day overflow, but assuming same-day appointments for Phase 1)
-        # Using a dummy date to add time
-        dummy_date = datetime(2000, 1, 1, start_time.hour, start_time.minute)
-        end_time = (dummy_date + timedelta(minutes=duration)).time()
-        
-        BookingSlot.objects.create(
-            date=form.cleaned_data['date'],
-            start_time=start_time,
-            end_time=end_time,
-            is_available=False,
-            appointment=self.object
-        )
+
+        # Save the appointment and claim its BookingSlot in one transaction
+        try:
+            self.object = book_appointment(form.instance)
+        except SlotUnavailable:
+            form.add_error(None, _("Sorry, this time slot was just taken. Please choose another time."))
+            return self.form_invalid(form)
         
         messages.success(self.request, "Appointment booked successfully! We look forward to seeing you.")
-        return response
+        return redirect(self.get_success_url())
 
-class CustomerDashboardView(LoginRequiredMixin, ListView):
+class CustomerDashboardView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     model = Appointment
     template_name = 'appointments/dashboard.html'
     context_object_name = 'appointments'
+    paginate_by = 20
 
     def get_queryset(self):
-        return Appointment.objects.filter(customer=self.request.user).order_by('-created_at')
+        return Appointment.objects.filter(customer=self.request.user).select_related('package', 'booking_slot').order_by('-created_at')
 
-class AdminDashboardView(LoginRequiredMixin, UserPassesTestMixin, ListView):
+class AdminDashboardView(LoginRequiredMixin, UserPassesTestMixin, KeysetPaginationMixin, ListView):
     """Admin dashboard for managing all appointments"""
     model = Appointment
     template_name = 'appointments/admin_dashboard.html'
     context_object_name = 'appointments'
     paginate_by = 20
+    # Seconds a search result count is reused across pages
+    SEARCH_COUNT_TIMEOUT = 60
     
     def test_func(self):
         """Only allow superusers/staff to access"""
         return self.request.user.is_staff or self.request.user.is_superuser
+
+    def get_stats(self):
+        if not hasattr(self, '_stats'):
+            self._stats = get_dashboard_stats()
+        return self._stats
+
+    def get_total_count(self, queryset):
+        params = [self.request.GET.get(name, '') for name in ('q', 'status', 'date_from', 'date_to')]
+        search_query, status_filter, date_from, date_to = params
+        if not (search_query or date_from or date_to):
+            # Served by the per-status totals, no COUNT(*) needed
+            stats = self.get_stats()
+            if status_filter:
+                return stats.get(f'{status_filter.lower()}_count', 0)
+            return sum(stats[f'{status.lower()}_count'] for status, _label in Appointment.STATUS_CHOICES)
+        key = 'admin_dashboard_count:' + hashlib.md5('|'.join(params).encode()).hexdigest()
+        return cache.get_or_set(key, queryset.count, self.SEARCH_COUNT_TIMEOUT)
     
     def get_queryset(self):
-        queryset = Appointment.objects.select_related('customer', 'package').order_by('-created_at')
-        
-        # Search functionality
-        search_query = self.request.GET.get('q', '')
-        if search_query:
-            queryset = queryset.filter(
-                Q(customer__username__icontains=search_query) |
-                Q(customer__phone_number__icontains=search_query) |
-                Q(customer__email__icontains=search_query)
-            )
-        
-        # Status filter
-        status_filter = self.request.GET.get('status', '')
-        if status_filter:
-            queryset = queryset.filter(status=status_filter)
-        
-        return queryset
+        queryset = Appointment.objects.select_related('customer', 'package', 'resource').order_by('-created_at')
+        # Search, status and date range (shared with the CSV export)
+        return filter_appointments(queryset, self.request.GET)
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Calculate total revenue from completed appointments
-        total_revenue = Appointment.objects.filter(
-            status='COMPLETED'
-        ).aggregate(total=Sum('package__price'))['total'] or 0
-        
-        context['total_revenue'] = total_revenue
         context['search_query'] = self.request.GET.get('q', '')
         context['status_filter'] = self.request.GET.get('status', '')
+        context['date_from'] = self.request.GET.get('date_from', '')
+        context['date_to'] = self.request.GET.get('date_to', '')
         
-        # Count by status
-        context['pending_count'] = Appointment.objects.filter(status='PENDING').count()
-        context['confirmed_count'] = Appointment.objects.filter(status='CONFIRMED').count()
-        context['completed_count'] = Appointment.objects.filter(status='COMPLETED').count()
-        context['cancelled_count'] = Appointment.objects.filter(status='CANCELLED').count()
+        # Count by status and revenue from completed appointments (maintained incrementally)
+        context.update(self.get_stats())
         
         return context
 
-def approve_appointment(request, pk):
-    appointment = get_object_or_404(Appointment, pk=pk)
-    # Ideally should check for staff permission, but keeping it simple as requested
-    appointment.status = 'CONFIRMED'
-    appointment.save()
-    messages.success(request, _("Appointment confirmed successfully."))
+class ReportsView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
+    """Revenue, utilization and popular packages (FR-4.2), read from the daily rollups"""
+    template_name = 'appointments/reports.html'
+    # Default range shown for each period
+    DEFAULT_DAYS = {'day': 30, 'week': 12 * 7, 'month': 365}
+    # Longest range with one row per day
+    MAX_DAILY_DAYS = 366
+
+    def test_func(self):
+        return self.request.user.is_staff or self.request.user.is_superuser
+
+    def get_range(self, period):
+        try:
+            end = date.fromisoformat(self.request.GET.get('date_to', ''))
+        except ValueError:
+            end = date.today()
+        try:
+            start = date.fromisoformat(self.request.GET.get('date_from', ''))
+        except ValueError:
+            start = end - timedelta(days=self.DEFAULT_DAYS[period] - 1)
+        if start > end:
+            start, end = end, start
+        if period == 'day':
+            start = max(start, end - timedelta(days=self.MAX_DAILY_DAYS - 1))
+        return start, end
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        period = self.request.GET.get('period', 'day')
+        if period not in PERIODS:
+            period = 'day'
+        start, end = self.get_range(period)
+
+        labels = dict(ServicePackage.CATEGORY_CHOICES)
+        rows = period_report(start, end, period)
+        top_revenue = max((row['revenue'] for row in rows), default=0) or 1
+        for row in rows:
+            row['revenue_share'] = round(100 * row['revenue'] / top_revenue)
+
+        context.update({
+            'period': period,
+            'date_from': start,
+            'date_to': end,
+            'rows': rows,
+            'total_revenue': sum(row['revenue'] for row in rows),
+            'total_completed': sum(row['completed'] for row in rows),
+            'popular_packages': popular_packages(start, end),
+            'categories': [
+                dict(row, label=labels.get(row['category'], row['category']))
+                for row in category_totals(start, end)
+            ],
+        })
+        return context
+
+class CalendarView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
+    """Week/month appointment calendar (FR-2.4); the page loads its data from calendar_feed"""
+    template_name = 'appointments/calendar.html'
+
+    def test_func(self):
+        return self.request.user.is_staff or self.request.user.is_superuser
+
+def calendar_etag(request):
+    # Any appointment change makes a new version, so unchanged polls get a 304
+    raw = f"{calendar.schedule_version()}|{request.GET.urlencode()}"
+    return hashlib.md5(raw.encode()).hexdigest()
+
+@require_GET
+@staff_required
+@condition(etag_func=calendar_etag)
+def calendar_feed(request):
+    """
+    Booked slots for ?start=2025-12-01&end=2025-12-07, or with &since=<since of the
+    previous response> only what changed after it (see appointments.calendar)
+    """
+    try:
+        start = date.fromisoformat(request.GET.get('start', ''))
+        end = date.fromisoformat(request.GET.get('end', ''))
+        since = datetime.fromisoformat(request.GET['since']) if request.GET.get('since') else None
+    except ValueError:
+        return JsonResponse({'error': _('Dates must be in ISO 8601 format.')}, status=400)
+    if end < start or (end - start).days >= calendar.MAX_RANGE_DAYS:
+        return JsonResponse(
+            {'error': _('Date range must cover between 1 and %(days)d days.') % {'days': calendar.MAX_RANGE_DAYS}},
+            status=400,
+        )
+    if since is not None and timezone.is_naive(since):
+        since = timezone.make_aware(since)
+
+    response = JsonResponse(calendar.calendar_feed(start, end, since))
+    # Revalidate every time: the browser sends If-None-Match and reuses the body on a 304
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+# Longest date range the availability API will compute in one request
+MAX_AVAILABILITY_DAYS = 31
+
+# The JSON endpoints below are async: under ASGI a slow mobile connection waiting on
+# them holds no worker thread. Their database work still runs in sync code, on the
+# thread Django keeps for it, because the booking logic needs transactions.
+
+def _free_start_times(package, start, end):
+    return free_start_times(
+        start, end, package.duration,
+        not_before=earliest_booking_time(),
+        resources=qualified_resources(package.category),
+    )
+
+@require_GET
+async def availability_json(request):
+    """
+    Free start times for a package over a date range, e.g.
+    ?package=1&start=2025-12-20&end=2025-12-26 (end defaults to a week from start).
+    """
+    package_id = request.GET.get('package', '')
+    if not package_id.isdigit():
+        return JsonResponse({'error': _('A valid package is required.')}, status=400)
+    package = await aget_object_or_404(ServicePackage, pk=package_id, is_active=True)
+
+    try:
+        start = date.fromisoformat(request.GET['start']) if request.GET.get('start') else date.today()
+        end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else start + timedelta(days=6)
+    except ValueError:
+        return JsonResponse({'error': _('Dates must be in YYYY-MM-DD format.')}, status=400)
+
+    if end < start or (end - start).days >= MAX_AVAILABILITY_DAYS:
+        return JsonResponse(
+            {'error': _('Date range must cover between 1 and %(days)d days.') % {'days': MAX_AVAILABILITY_DAYS}},
+            status=400,
+        )
+
+    grid = await sync_to_async(_free_start_times)(package, start, end)
+    return JsonResponse({
+        'package': package.pk,
+        'duration': package.duration,
+        'slots': {
+            day.isoformat(): [slot.strftime('%H:%M') for slot in slots]
+            for day, slots in grid.items()
+        },
+    })
+
+def _book(user, data):
+    form = AppointmentForm(data)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors.get_json_data()}, status=400)
+    form.instance.customer = user
+    try:
+        appointment = book_appointment(form.instance)
+    except SlotUnavailable:
+        return JsonResponse({'error': _("Sorry, this time slot was just taken. Please choose another time.")}, status=409)
+    return JsonResponse({
+        'id': appointment.pk,
+        'package': appointment.package_id,
+        'date': appointment.date.isoformat(),
+        'time': appointment.time.strftime('%H:%M'),
+        'resource': appointment.resource.name,
+        'status': appointment.status,
+    }, status=201)
+
+@require_POST
+async def book_json(request):
+    """
+    Book for the logged-in customer from POSTed package, date, time and notes, like
+    BookingView. 201 with the appointment, 400 with the form errors, or 409 when
+    the slot was taken meanwhile.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'error': _('Log in to book an appointment.')}, status=401)
+    return await sync_to_async(_book)(user, request.POST)
+
+def _redirect_back(request):
+    """Back to the POSTed `next` page (the dashboard with its filters), if it is ours"""
+    next_url = request.POST.get('next', '')
+    if url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+        return redirect(next_url)
     return redirect('appointments:admin_dashboard')
 
-def cancel_appointment(request, pk):
+def _transition_one(request, pk, new_status, success_message):
     appointment = get_object_or_404(Appointment, pk=pk)
-    appointment.status = 'CANCELLED'
-    appointment.save()
-    
-    # Also free up the slot
-    if hasattr(appointment, 'booking_slot'):
-        slot = appointment.booking_slot
-        slot.is_available = True
-        slot.save()
-        
-    messages.success(request, _("Appointment cancelled."))
-    return redirect('appointments:admin_dashboard')
+    try:
+        transition_appointment(appointment, new_status, request.user)
+    except InvalidTransition:
+        messages.error(request, _("This appointment is already %(status)s.") % {'status': appointment.get_status_display()})
+    else:
+        messages.success(request, success_message)
+    return _redirect_back(request)
+
+# Status changes are POST only (buttons on the admin dashboard), so they carry a CSRF token
+
+@require_POST
+@staff_required
+def approve_appointment(request, pk):
+    return _transition_one(request, pk, 'CONFIRMED', _("Appointment confirmed successfully."))
 
+@require_POST
+@staff_required
+def cancel_appointment(request, pk):
+    # Also frees up the slot
+    return _transition_one(request, pk, 'CANCELLED', _("Appointment cancelled."))
+
+@require_POST
+@staff_required
 def complete_appointment(request, pk):
     """Mark appointment as completed"""
-    appointment = get_object_or_404(Appointment, pk=pk)
-    appointment.status = 'COMPLETED'
-    appointment.save()
-    messages.success(request, _("Appointment marked as completed."))
-    return redirect('appointments:admin_dashboard')
+    return _transition_one(request, pk, 'COMPLETED', _("Appointment marked as completed."))
+
+@require_POST
+@staff_required
+def bulk_transition(request):
+    """Move every appointment ticked on the admin dashboard to one status"""
+    new_status = request.POST.get('status', '')
+    pks = [int(pk) for pk in request.POST.getlist('ids') if pk.isdigit()]
+    if new_status not in TRANSITIONS or not pks:
+        messages.error(request, _("Select some appointments and an action."))
+    else:
+        changed, skipped = transition_appointments(pks, new_status, request.user)
+        label = dict(Appointment.STATUS_CHOICES)[new_status]
+        messages.success(request, ngettext(
+            "%(count)d appointment marked as %(status)s.",
+            "%(count)d appointments marked as %(status)s.",
+            len(changed),
+        ) % {'count': len(changed), 'status': label})
+        if skipped:
+            messages.warning(request, ngettext(
+                "%(count)d appointment skipped: its current status does not allow this change.",
+                "%(count)d appointments skipped: their current status does not allow this change.",
+                skipped,
+            ) % {'count': skipped})
+    return _redirect_back(request)
+
+@require_GET
+@staff_required
+def export_appointments(request):
+    """CSV of every appointment matching the admin dashboard filters"""
+    queryset = filter_appointments(Appointment.objects.all(), request.GET)
+    return stream_csv(appointment_rows(queryset), f'appointments-{date.today()}.csv')
+
+@require_GET
+@staff_required
+def export_revenue(request):
+    """CSV of completed appointments and revenue per day, for the dashboard filters"""
+    queryset = filter_appointments(Appointment.objects.all(), request.GET)
+    return stream_csv(revenue_rows(queryset), f'revenue-{date.today()}.csv')
 
+@require_GET
+@login_required
+def export_my_appointments(request):
+    """The logged-in customer's own appointment history"""
+    queryset = Appointment.objects.filter(customer=request.user)
+    return stream_csv(appointment_rows(queryset, customer_columns()), f'my-appointments-{date.today()}.csv')
@@ -1,3 +1,41 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.utils import timezone
 
-# Register your models here.
+from .audit import AuditedAdminMixin
+from .models import AuditEntry, OutboxMessage
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(AuditedAdminMixin, admin.ModelAdmin):
+    list_display = ('recipient', 'channel', 'subject', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'created_at')
+    list_filter = ('status', 'channel')
+    search_fields = ('recipient', 'idempotency_key', 'body')
+    readonly_fields = ('idempotency_key', 'attempts', 'last_error', 'created_at', 'sent_at')
+    date_hierarchy = 'created_at'
+    actions = ['retry_now']
+
+    @admin.action(description="Retry selected messages now", permissions=['change'])
+    def retry_now(self, request, queryset):
+        count = queryset.exclude(status__in=['SENT', 'SENDING']).update(
+            status='PENDING', attempts=0, next_attempt_at=timezone.now(), last_error='',
+        )
+        self.message_user(request, f"{count} message(s) queued for another try.", messages.SUCCESS)
+
+
+@admin.register(AuditEntry)
+class AuditEntryAdmin(admin.ModelAdmin):
+    """Read-only: the audit log is append-only"""
+    list_display = ('created_at', 'actor_name', 'action', 'object_type', 'object_id', 'object_repr',
+                    'status_before', 'status_after')
+    list_filter = ('action', 'object_type')
+    search_fields = ('=object_id', 'actor_name', 'object_repr')
+    date_hierarchy = 'created_at'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
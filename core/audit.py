@@ -0,0 +1,262 @@
+"""
+Audit log of staff actions (NFR-2.6): appointment status changes from the dashboard,
+bulk and admin actions, and every add, change and delete on the admin site.
+
+Writing an audit row inside each action would add a write transaction to every click,
+and SQLite has a single writer. Instead record() keeps entries in an in-process buffer
+and they are written together:
+
+* when AUDIT_BUFFER_SIZE entries are waiting,
+* when the oldest has waited AUDIT_FLUSH_INTERVAL seconds (a timer thread),
+* when the process exits, and before history() or query() read the log.
+
+AUDIT_LOG_BACKEND picks where they go: 'database' writes AuditEntry rows with one
+bulk_create per flush, 'file' appends one JSON line per entry to AUDIT_LOG_FILE,
+rotated at AUDIT_LOG_MAX_BYTES. Entries are buffered when the action's transaction
+commits, so a rolled-back action leaves no trace; the price is that a process killed
+outright loses what was still in its buffer, at most a few seconds' worth.
+"""
+import atexit
+import json
+import logging
+import threading
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import AuditEntry
+
+logger = logging.getLogger(__name__)
+
+# Actions
+TRANSITION = 'transition'
+ADMIN_ADDITION = 'admin.addition'
+ADMIN_CHANGE = 'admin.change'
+ADMIN_DELETION = 'admin.deletion'
+
+FIELDS = [
+    'created_at', 'actor_id', 'actor_name', 'action', 'object_type', 'object_id',
+    'object_repr', 'status_before', 'status_after', 'message',
+]
+
+
+def entry(actor, action, model, object_id, before='', after='', object_repr='', message=''):
+    """An unsaved AuditEntry for `object_id` of `model` (a model class or instance)"""
+    authenticated = actor is not None and actor.is_authenticated
+    return AuditEntry(
+        created_at=timezone.now(),
+        actor=actor if authenticated else None,
+        actor_name=actor.get_username() if authenticated else '',
+        action=action,
+        object_type=model._meta.label_lower,
+        object_id=str(object_id),
+        object_repr=object_repr[:200],
+        status_before=before or '',
+        status_after=after or '',
+        message=message,
+    )
+
+
+def record(entries):
+    """Buffer unsaved AuditEntries once the current transaction commits"""
+    entries = list(entries)
+    if entries:
+        transaction.on_commit(lambda: _buffer.add(entries))
+
+
+class DatabaseSink:
+    def write(self, entries):
+        AuditEntry.objects.bulk_create(entries, batch_size=500)
+
+
+class FileSink:
+    """JSON lines in AUDIT_LOG_FILE, rotated like a log file"""
+    _handlers = {}
+    _lock = threading.Lock()
+
+    def handler(self):
+        path = Path(settings.AUDIT_LOG_FILE)
+        with self._lock:
+            if path not in self._handlers:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                handler = RotatingFileHandler(
+                    path, maxBytes=settings.AUDIT_LOG_MAX_BYTES,
+                    backupCount=settings.AUDIT_LOG_BACKUP_COUNT, encoding='utf-8',
+                )
+                handler.setFormatter(logging.Formatter('%(message)s'))
+                self._handlers[path] = handler
+            return self._handlers[path]
+
+    def write(self, entries):
+        handler = self.handler()
+        for audit_entry in entries:
+            line = json.dumps({
+                field: getattr(audit_entry, field) for field in FIELDS
+            }, default=str, ensure_ascii=False)
+            handler.handle(logging.makeLogRecord({'msg': line}))
+
+    def read(self):
+        """Every entry in the current and rotated files, as unsaved AuditEntries"""
+        path = Path(settings.AUDIT_LOG_FILE)
+        files = [path.with_name(f'{path.name}.{n}') for n in range(settings.AUDIT_LOG_BACKUP_COUNT, 0, -1)]
+        for file in files + [path]:
+            if not file.exists():
+                continue
+            with file.open(encoding='utf-8') as lines:
+                for line in lines:
+                    values = json.loads(line)
+                    values['created_at'] = parse_datetime(values['created_at'])
+                    yield AuditEntry(**values)
+
+
+def load_sink():
+    return FileSink() if settings.AUDIT_LOG_BACKEND == 'file' else DatabaseSink()
+
+
+class AuditBuffer:
+    """Thread-safe list of entries waiting to be written"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = []
+        self._timer = None
+
+    def add(self, entries):
+        with self._lock:
+            self._entries.extend(entries)
+            full = len(self._entries) >= settings.AUDIT_BUFFER_SIZE
+            if not full:
+                self._start_timer()
+        if full:
+            self.flush()
+
+    def _start_timer(self):
+        if self._timer is None:
+            self._timer = threading.Timer(settings.AUDIT_FLUSH_INTERVAL, self._flush_in_background)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_in_background(self):
+        try:
+            self.flush()
+        finally:
+            connection.close() # The timer thread's own connection
+
+    def flush(self):
+        """Write everything buffered; returns the number of entries written"""
+        with self._lock:
+            entries, self._entries = self._entries, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not entries:
+            return 0
+        try:
+            load_sink().write(entries)
+        except Exception:
+            # Keep them for the next flush rather than lose them
+            logger.exception("Could not write %d audit entries", len(entries))
+            with self._lock:
+                self._entries[:0] = entries
+                self._start_timer()
+            return 0
+        return len(entries)
+
+
+_buffer = AuditBuffer()
+flush = _buffer.flush
+atexit.register(flush)
+
+
+def query(model=None, object_id=None, actor=None, action=None, since=None, until=None):
+    """
+    Audit entries, newest first, optionally only those about `model` (a model class or
+    instance) and `object_id`, by `actor`, of `action` or within [since, until).
+    A QuerySet with the database backend, a list with the file backend.
+    """
+    flush()
+    filters = {}
+    if model is not None:
+        filters['object_type'] = model._meta.label_lower
+        if object_id is None and not isinstance(model, type):
+            object_id = model.pk
+    if object_id is not None:
+        filters['object_id'] = str(object_id)
+    if actor is not None:
+        filters['actor_id'] = actor.pk
+    if action is not None:
+        filters['action'] = action
+    if since is not None:
+        filters['created_at__gte'] = since
+    if until is not None:
+        filters['created_at__lt'] = until
+
+    if settings.AUDIT_LOG_BACKEND != 'file':
+        return AuditEntry.objects.filter(**filters)
+    entries = [audit_entry for audit_entry in FileSink().read() if _matches(audit_entry, filters)]
+    entries.reverse()
+    return entries
+
+
+def _matches(audit_entry, filters):
+    for lookup, value in filters.items():
+        field, _, operator = lookup.partition('__')
+        actual = getattr(audit_entry, field)
+        if operator == 'gte' and not actual >= value:
+            return False
+        if operator == 'lt' and not actual < value:
+            return False
+        if not operator and actual != value:
+            return False
+    return True
+
+
+def history(model, object_id=None):
+    """What happened to one object: history(appointment) or history(Appointment, 12)"""
+    return query(model, object_id)
+
+
+class AuditedAdminMixin:
+    """
+    ModelAdmin mixin auditing admin-site adds, changes and deletes. Set
+    audit_status_field to also record the status before and after.
+    """
+    audit_status_field = None
+
+    def _status(self, obj):
+        return str(getattr(obj, self.audit_status_field, '')) if self.audit_status_field else ''
+
+    def save_model(self, request, obj, form, change):
+        if change and self.audit_status_field:
+            obj._audit_status_before = str(form.initial.get(self.audit_status_field, ''))
+        super().save_model(request, obj, form, change)
+
+    def log_addition(self, request, obj, message):
+        record([entry(
+            request.user, ADMIN_ADDITION, obj, obj.pk, after=self._status(obj),
+            object_repr=str(obj), message=_message(message),
+        )])
+        return super().log_addition(request, obj, message)
+
+    def log_change(self, request, obj, message):
+        record([entry(
+            request.user, ADMIN_CHANGE, obj, obj.pk,
+            before=getattr(obj, '_audit_status_before', ''), after=self._status(obj),
+            object_repr=str(obj), message=_message(message),
+        )])
+        return super().log_change(request, obj, message)
+
+    def log_deletions(self, request, queryset):
+        record([
+            entry(request.user, ADMIN_DELETION, obj, obj.pk, before=self._status(obj), object_repr=str(obj))
+            for obj in queryset
+        ])
+        return super().log_deletions(request, queryset)
+
+
+def _message(message):
+    return message if isinstance(message, str) else json.dumps(message)
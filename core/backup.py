@@ -0,0 +1,159 @@
+"""
+Online backups of the SQLite database (`manage.py backup_database`, NFR-4.2).
+
+Copying db.sqlite3 while the site runs gives a torn copy, and locking it for the copy
+stops bookings. SQLite's backup API copies BACKUP_PAGES_PER_STEP pages at a time and
+pauses BACKUP_STEP_SLEEP seconds in between, so writers keep going. SQLite restarts the
+copy whenever another connection commits. Under busy traffic that could go on for
+ever. So with WAL, the copy reads inside one read transaction: it sees a fixed version
+of the database, and writers are not blocked.
+
+The backup API writes to a database file, not a stream. So the snapshot goes to a
+temporary file in BACKUP_DIR. That copy is checked with PRAGMA integrity_check, then
+streamed through gzip to db-YYYYMMDD-HHMMSS.sqlite3.gz, and the temporary file is
+removed. Only the newest BACKUP_KEEP snapshots are kept.
+
+Each run appends its timings and throughput to BACKUP_DIR/history.jsonl.
+"""
+import gzip
+import json
+import os
+import shutil
+import sqlite3
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+PREFIX = 'db-'
+SUFFIX = '.sqlite3.gz'
+CHUNK_SIZE = 1024 * 1024
+
+
+class BackupError(Exception):
+    pass
+
+
+def snapshots(directory):
+    """Backup files in `directory`, oldest first"""
+    return sorted(Path(directory).glob(f'{PREFIX}*{SUFFIX}'))
+
+
+def prune(directory, keep):
+    """Delete all but the newest `keep` snapshots; returns the deleted paths"""
+    old = snapshots(directory)[:-keep] if keep > 0 else []
+    for path in old:
+        path.unlink()
+    return old
+
+
+def _copy(target, pages, sleep):
+    """Online copy of the default database into `target`; returns (pages, restarts)"""
+    connection.ensure_connection()
+    if connection.connection.in_transaction:
+        # The copy would wait forever for this connection's own write lock
+        raise BackupError("Cannot take a backup inside a transaction.")
+    copied = {'total': 0, 'remaining': None, 'restarts': 0}
+
+    def progress(status, remaining, total):
+        # Remaining going up again means a write restarted the copy
+        if copied['remaining'] is not None and remaining > copied['remaining']:
+            copied['restarts'] += 1
+        copied['remaining'], copied['total'] = remaining, total
+        if remaining:
+            time.sleep(sleep)  # backup()'s own sleep only applies when the database is busy
+
+    source = connection.connection
+    destination = sqlite3.connect(target)
+    try:
+        snapshot = _journal_mode(source) == 'wal'
+        if snapshot:
+            # Under WAL a read transaction pins one version of the database without
+            # blocking writers, so their commits no longer restart the copy
+            source.execute('BEGIN DEFERRED')
+            source.execute('SELECT 1 FROM sqlite_master LIMIT 1').fetchall()
+        try:
+            source.backup(destination, pages=pages, progress=progress, sleep=sleep)
+        finally:
+            if snapshot:
+                source.execute('COMMIT')
+        # The copy is a snapshot: no -wal file next to it
+        destination.execute('PRAGMA journal_mode=DELETE')
+    finally:
+        destination.close()
+    return copied['total'], copied['restarts']
+
+
+def _journal_mode(source):
+    return source.execute('PRAGMA journal_mode').fetchone()[0].lower()
+
+
+def _verify(path):
+    check = sqlite3.connect(path)
+    try:
+        problems = [row[0] for row in check.execute('PRAGMA integrity_check')]
+    finally:
+        check.close()
+    if problems != ['ok']:
+        raise BackupError(f"Integrity check failed: {'; '.join(problems[:5])}")
+
+
+def _compress(source, target, level):
+    partial = target.with_name(target.name + '.partial')
+    try:
+        with open(source, 'rb') as data, gzip.open(partial, 'wb', compresslevel=level) as compressed:
+            shutil.copyfileobj(data, compressed, CHUNK_SIZE)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    os.replace(partial, target)  # A snapshot file is never half-written
+
+
+def backup(directory=None, keep=None, pages=None, sleep=None, level=6):
+    """
+    Snapshot the default database into `directory` and prune old snapshots.
+    Returns a dict of the path, sizes, timings and throughput.
+    """
+    if connection.vendor != 'sqlite':
+        raise BackupError(f"Online backups are only supported on SQLite, not {connection.vendor}.")
+    directory = Path(directory or settings.BACKUP_DIR)
+    keep = settings.BACKUP_KEEP if keep is None else keep
+    pages = pages or settings.BACKUP_PAGES_PER_STEP
+    sleep = settings.BACKUP_STEP_SLEEP if sleep is None else sleep
+    directory.mkdir(parents=True, exist_ok=True)
+
+    started = timezone.localtime()
+    target = directory / f'{PREFIX}{started:%Y%m%d-%H%M%S}{SUFFIX}'
+    temporary = directory / f'.{target.name}.tmp'
+    try:
+        clock = time.perf_counter()
+        page_count, restarts = _copy(temporary, pages, sleep)
+        copied = time.perf_counter()
+        _verify(temporary)
+        verified = time.perf_counter()
+        _compress(temporary, target, level)
+        finished = time.perf_counter()
+        size = temporary.stat().st_size
+    finally:
+        temporary.unlink(missing_ok=True)
+
+    total = finished - clock
+    result = {
+        'started': started.isoformat(),
+        'path': str(target),
+        'pages': page_count,
+        'restarts': restarts,
+        'bytes': size,
+        'compressed_bytes': target.stat().st_size,
+        'copy_seconds': round(copied - clock, 3),
+        'verify_seconds': round(verified - copied, 3),
+        'compress_seconds': round(finished - verified, 3),
+        'seconds': round(total, 3),
+        'mb_per_second': round(size / 1024 / 1024 / total, 1) if total else 0.0,
+    }
+    result['pruned'] = [path.name for path in prune(directory, keep)]
+    with open(directory / 'history.jsonl', 'a', encoding='utf-8') as history:
+        history.write(json.dumps(result) + '\n')
+    return result
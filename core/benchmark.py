@@ -0,0 +1,207 @@
+"""
+End-to-end URL benchmark (`manage.py benchmark_routes`).
+
+Every named route of the project is requested through the test client as the kind
+of user who normally sees it, a few times after a warm-up request, recording the
+response status, the number of queries and the latency. The results are saved as a
+JSON baseline; later runs compare against it and report routes whose queries grew or
+whose median latency regressed past a threshold.
+
+Routes are listed in ROUTES (what to request) or SKIPPED (why not), and
+uncovered_routes() names any new route that is in neither, so it gets added here
+rather than silently left out.
+"""
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, get_resolver, reverse
+
+from services.models import ServicePackage
+from users.models import User
+
+# label -> (url name, kwargs, who requests it, query string). Values in kwargs and
+# query strings are formatted with the samples from sample_values().
+ROUTES = {
+    'home': ('home', {}, 'anonymous', ''),
+    'about': ('about', {}, 'anonymous', ''),
+    'contact': ('contact', {}, 'anonymous', ''),
+    'metrics': ('metrics', {}, 'staff', ''),
+    'service_list': ('service_list', {}, 'anonymous', ''),
+    'service_list?search': ('service_list', {}, 'anonymous', 'q=facial'),
+    'service_detail': ('service_detail', {'pk': '{package}'}, 'anonymous', ''),
+    'package_list_json': ('package_list_json', {}, 'anonymous', ''),
+    'register': ('register', {}, 'anonymous', ''),
+    'login': ('login', {}, 'anonymous', ''),
+    'dashboard': ('dashboard', {}, 'customer', ''),
+    'profile': ('profile', {}, 'customer', ''),
+    'password_change': ('password_change', {}, 'customer', ''),
+    'appointments:book_appointment': ('appointments:book_appointment', {}, 'customer', ''),
+    'appointments:book_appointment/package': (
+        'appointments:book_appointment', {'service_id': '{package}'}, 'customer', '',
+    ),
+    'appointments:availability': (
+        'appointments:availability', {}, 'customer', 'package={package}&start={next_week}',
+    ),
+    'appointments:dashboard': ('appointments:dashboard', {}, 'customer', ''),
+    'appointments:admin_dashboard': ('appointments:admin_dashboard', {}, 'staff', ''),
+    'appointments:admin_dashboard?status': ('appointments:admin_dashboard', {}, 'staff', 'status=PENDING'),
+    'appointments:admin_dashboard?search': ('appointments:admin_dashboard', {}, 'staff', 'q={customer_name}'),
+    'appointments:reports': ('appointments:reports', {}, 'staff', ''),
+    'appointments:reports?month': ('appointments:reports', {}, 'staff', 'period=month&date_from={year_ago}'),
+    'appointments:calendar': ('appointments:calendar', {}, 'staff', ''),
+    'appointments:calendar_feed': (
+        'appointments:calendar_feed', {}, 'staff', 'start={monday}&end={sunday}',
+    ),
+    'appointments:export_appointments': (
+        'appointments:export_appointments', {}, 'staff', 'date_from={monday}&date_to={sunday}',
+    ),
+    'appointments:export_revenue': ('appointments:export_revenue', {}, 'staff', ''),
+    'appointments:export_my_appointments': ('appointments:export_my_appointments', {}, 'customer', ''),
+}
+
+# Routes that change data or the session, keyed by url name
+SKIPPED = {
+    'logout': "logs the client out",
+    'set_language': "POST only, changes the session",
+    'appointments:approve_appointment': "changes an appointment's status",
+    'appointments:cancel_appointment': "changes an appointment's status",
+    'appointments:complete_appointment': "changes an appointment's status",
+    'appointments:bulk_transition': "changes appointment statuses",
+    'appointments:book_json': "POST only, books an appointment",
+}
+# Namespaces left to Django's own test suite
+SKIPPED_NAMESPACES = ('admin',)
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a sorted list"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, round(fraction * len(values)) - 1))]
+
+
+def named_routes(patterns=None, namespace=''):
+    """Every named URL pattern of the project, as 'namespace:name'"""
+    names = set()
+    for pattern in get_resolver().url_patterns if patterns is None else patterns:
+        if isinstance(pattern, URLResolver):
+            prefix = f'{namespace}{pattern.namespace}:' if pattern.namespace else namespace
+            names |= named_routes(pattern.url_patterns, prefix)
+        elif pattern.name:
+            names.add(f'{namespace}{pattern.name}')
+    return names
+
+
+def uncovered_routes():
+    covered = {name for name, _kwargs, _user, _query in ROUTES.values()} | set(SKIPPED)
+    return sorted(
+        name for name in named_routes()
+        if name not in covered and name.split(':')[0] not in SKIPPED_NAMESPACES
+    )
+
+
+def benchmark_users():
+    """{'anonymous': None, 'customer': ..., 'staff': ...}; the customer with most appointments"""
+    customer = (
+        User.objects.filter(is_staff=False).annotate(booked=Count('appointments'))
+        .order_by('-booked', 'pk').first()
+    )
+    staff = User.objects.filter(is_staff=True).order_by('pk').first()
+    return {'anonymous': None, 'customer': customer, 'staff': staff}
+
+
+def sample_values(users):
+    today = date.today()
+    monday = today - timedelta(days=today.weekday())
+    package = ServicePackage.objects.filter(is_active=True).order_by('pk').first()
+    customer = users['customer']
+    return {
+        'package': package.pk if package else 0,
+        'next_week': (today + timedelta(days=7)).isoformat(),
+        'monday': monday.isoformat(),
+        'sunday': (monday + timedelta(days=6)).isoformat(),
+        'year_ago': (today - timedelta(days=365)).isoformat(),
+        'customer_name': customer.last_name or customer.username if customer else '',
+    }
+
+
+def _request(client, url):
+    response = client.get(url)
+    if response.streaming:
+        # Exports do their work while streaming
+        b''.join(response.streaming_content)
+    return response
+
+
+def measure(client, url, repeat):
+    """(status, queries, [seconds per request]) for `repeat` requests after one warm-up"""
+    _request(client, url)
+    timings = []
+    for _run in range(repeat):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = _request(client, url)
+            timings.append(time.perf_counter() - started)
+    return response.status_code, len(queries), timings
+
+
+def run(repeat=5, only=None, log=None):
+    """Benchmark ROUTES (or the labels in `only`); returns {label: result}"""
+    log = log or (lambda label, result: None)
+    users = benchmark_users()
+    samples = sample_values(users)
+    clients = {}
+    for kind, user in users.items():
+        # SERVER_NAME: localhost is allowed whenever DEBUG is on
+        clients[kind] = Client(SERVER_NAME='localhost')
+        if user is not None:
+            clients[kind].force_login(user)
+
+    results = {}
+    for label, (name, kwargs, kind, query) in ROUTES.items():
+        if only and label not in only:
+            continue
+        if kind != 'anonymous' and users[kind] is None:
+            results[label] = {'skipped': f"no {kind} user in the database"}
+            log(label, results[label])
+            continue
+        url = reverse(name, kwargs={key: value.format(**samples) for key, value in kwargs.items()})
+        if query:
+            url += '?' + query.format(**samples)
+        status, queries, timings = measure(clients[kind], url, repeat)
+        timings.sort()
+        results[label] = {
+            'url': url,
+            'status': status,
+            'queries': queries,
+            'median_ms': round(statistics.median(timings) * 1000, 2),
+            'max_ms': round(timings[-1] * 1000, 2),
+        }
+        log(label, results[label])
+    return results
+
+
+def compare(results, baseline, threshold, min_delta_ms=2.0):
+    """
+    Regressions of `results` against `baseline` as {label: reason}: a different status,
+    more queries, or a median more than `threshold` (0.25 = 25%) and `min_delta_ms`
+    slower, so sub-millisecond noise on fast pages does not count
+    """
+    regressions = {}
+    for label, result in results.items():
+        before = baseline.get(label)
+        if not before or 'skipped' in result or 'skipped' in before:
+            continue
+        if result['status'] != before['status']:
+            regressions[label] = f"status {before['status']} -> {result['status']}"
+        elif result['queries'] > before['queries']:
+            regressions[label] = f"queries {before['queries']} -> {result['queries']}"
+        elif (result['median_ms'] > before['median_ms'] * (1 + threshold)
+              and result['median_ms'] - before['median_ms'] > min_delta_ms):
+            regressions[label] = f"median {before['median_ms']} ms -> {result['median_ms']} ms"
+    return regressions
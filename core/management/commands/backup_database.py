@@ -0,0 +1,52 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.backup import BackupError, backup
+
+
+class Command(BaseCommand):
+    help = (
+        "Take a gzipped snapshot of the SQLite database while the site keeps running, check "
+        "it with PRAGMA integrity_check and delete the oldest snapshots. Run it nightly from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', type=Path, default=settings.BACKUP_DIR, help="Where snapshots are kept")
+        parser.add_argument('--keep', type=int, default=settings.BACKUP_KEEP, help="Newest snapshots kept")
+        parser.add_argument(
+            '--pages', type=int, default=settings.BACKUP_PAGES_PER_STEP,
+            help="Pages copied per step; smaller steps hold the database for less time",
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=settings.BACKUP_STEP_SLEEP, help="Seconds to pause between steps",
+        )
+        parser.add_argument('--level', type=int, default=6, choices=range(1, 10), help="gzip compression level")
+
+    def handle(self, *args, **options):
+        if options['keep'] < 1:
+            raise CommandError("--keep must be at least 1.")
+        try:
+            result = backup(
+                options['dir'], keep=options['keep'], pages=max(options['pages'], 1),
+                sleep=options['sleep'], level=options['level'],
+            )
+        except BackupError as error:
+            raise CommandError(str(error))
+
+        megabytes = result['bytes'] / 1024 / 1024
+        self.stdout.write(
+            f"Copied {result['pages']} pages ({megabytes:.1f} MB) in {result['copy_seconds']:.2f}s, "
+            f"verified in {result['verify_seconds']:.2f}s, compressed to "
+            f"{result['compressed_bytes'] / 1024 / 1024:.1f} MB in {result['compress_seconds']:.2f}s."
+        )
+        if result['restarts']:
+            self.stdout.write(self.style.WARNING(
+                f"Writes restarted the copy {result['restarts']} time(s); try a larger --pages."
+            ))
+        for name in result['pruned']:
+            self.stdout.write(f"Deleted old snapshot {name}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Backup written to {result['path']} in {result['seconds']:.2f}s ({result['mb_per_second']} MB/s)."
+        ))
@@ -0,0 +1,167 @@
+import asyncio
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, timedelta
+from io import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+from django.urls import reverse
+
+from core.benchmark import percentile
+from services.models import ServicePackage
+
+
+@contextmanager
+def conn_max_age(seconds):
+    """Temporarily change CONN_MAX_AGE for connections opened meanwhile"""
+    settings_dict = connections.settings['default']
+    previous = settings_dict['CONN_MAX_AGE']
+    settings_dict['CONN_MAX_AGE'] = seconds
+    try:
+        yield
+    finally:
+        settings_dict['CONN_MAX_AGE'] = previous
+
+
+def wsgi_get(application, url):
+    path, _, query = url.partition('?')
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query, 'SCRIPT_NAME': '',
+        'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost',
+        'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http', 'wsgi.input': BytesIO(), 'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True, 'wsgi.multiprocess': False, 'wsgi.run_once': False,
+    }
+    status = []
+    body = application(environ, lambda status_line, headers, exc_info=None: status.append(status_line))
+    try:
+        b''.join(body)
+    finally:
+        body.close()  # Sends request_finished, which closes or keeps the connection
+    return int(status[0].split()[0])
+
+
+async def asgi_get(application, url, latency):
+    path, _, query = url.partition('?')
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': query.encode(),
+        'root_path': '', 'headers': [(b'host', b'localhost')],
+        'client': ('127.0.0.1', 50000), 'server': ('localhost', 80),
+    }
+    request_sent = False
+    status = None
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await asyncio.Future()  # The client stays connected until the response is done
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+        elif not message.get('more_body'):
+            await asyncio.sleep(latency)  # The slow client receiving the body
+
+    await application(scope, receive, send)
+    return status
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the WSGI (Beauty/wsgi.py) and ASGI (Beauty/asgi.py) handlers on the async JSON "
+        "endpoints with many concurrent slow clients, in process: WSGI requests run on a "
+        "fixed pool of worker threads, ASGI requests as tasks on one event loop."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=200, help="Concurrent simulated clients")
+        parser.add_argument('--requests', type=int, default=5, help="Requests per client")
+        parser.add_argument(
+            '--latency', type=float, default=0.2,
+            help="Seconds a slow (e.g. mobile) client takes to receive each response",
+        )
+        parser.add_argument('--threads', type=int, default=8, help="WSGI worker threads, like gunicorn --threads")
+
+    def handle(self, *args, **options):
+        package = ServicePackage.objects.filter(is_active=True).order_by('pk').first()
+        if package is None:
+            raise CommandError("Create at least one active service package first.")
+        next_week = (date.today() + timedelta(days=7)).isoformat()
+        urls = [
+            reverse('package_list_json'),
+            reverse('appointments:availability') + f'?package={package.pk}&start={next_week}',
+        ]
+        from Beauty.asgi import application as asgi_application
+        from Beauty.wsgi import application as wsgi_application
+
+        # Warm the caches both handlers share, so neither pays for filling them
+        for url in urls:
+            wsgi_get(wsgi_application, url)
+        close_old_connections()
+
+        results = {}
+        results['WSGI'] = self.run_wsgi(wsgi_application, urls, options)
+        # As with Beauty/settings_asgi.py: per-request threads cannot reuse connections
+        with conn_max_age(0):
+            results['ASGI'] = asyncio.run(self.run_asgi(asgi_application, urls, options))
+
+        self.stdout.write(
+            f"{options['clients']} clients x {options['requests']} requests, "
+            f"{options['latency'] * 1000:.0f} ms client latency, {options['threads']} WSGI threads\n"
+        )
+        self.stdout.write(f"{'handler':<8}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        for handler, (latencies, errors, wall) in results.items():
+            latencies.sort()
+            self.stdout.write(
+                f"{handler:<8}{len(latencies) / wall:>9.1f}"
+                + ''.join(f"{percentile(latencies, fraction) * 1000:>10.1f}" for fraction in (0.5, 0.95, 0.99))
+                + f"{errors:>8}"
+            )
+
+    def run_wsgi(self, application, urls, options):
+        latencies = []
+        errors = 0
+        lock = threading.Lock()
+        started = time.perf_counter()
+
+        def client(number):
+            nonlocal errors
+            # A client waiting for a free thread is already waiting on its first response
+            issued = started
+            for request in range(options['requests']):
+                status = wsgi_get(application, urls[(number + request) % len(urls)])
+                time.sleep(options['latency'])  # The worker thread is busy writing to the slow client
+                finished = time.perf_counter()
+                with lock:
+                    latencies.append(finished - issued)
+                    errors += status >= 400
+                issued = finished
+
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            list(pool.map(client, range(options['clients'])))
+        return latencies, errors, time.perf_counter() - started
+
+    async def run_asgi(self, application, urls, options):
+        latencies = []
+        errors = 0
+        started = time.perf_counter()
+
+        async def client(number):
+            nonlocal errors
+            issued = started
+            for request in range(options['requests']):
+                status = await asgi_get(application, urls[(number + request) % len(urls)], options['latency'])
+                finished = time.perf_counter()
+                latencies.append(finished - issued)
+                errors += status >= 400
+                issued = finished
+
+        await asyncio.gather(*(client(number) for number in range(options['clients'])))
+        return latencies, errors, time.perf_counter() - started
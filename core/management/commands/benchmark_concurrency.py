@@ -0,0 +1,183 @@
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, close_old_connections, connection
+from django.test import Client
+from django.urls import reverse
+
+from appointments.availability import get_schedule, is_holiday
+from appointments.models import Appointment, BookingSlot
+from core.benchmark import percentile
+from core.models import OutboxMessage
+from services.models import ServicePackage
+from users.models import User
+
+USERNAME_PREFIX = 'bench-user-'
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive concurrent simulated customers through the dashboard and booking views and "
+        "report latency percentiles and database lock errors (NFR-1.2). Creates bench-user-* "
+        "customers and real bookings; they are removed afterwards unless --keep is given. "
+        "Run it against a copy of the database, not the live one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50, help="Simulated customers running at once")
+        parser.add_argument('--staff', type=int, default=5, help="Simulated staff polling the admin dashboard")
+        parser.add_argument('--iterations', type=int, default=10, help="Dashboard + booking rounds per customer")
+        parser.add_argument('--days', type=int, default=14, help="Booking dates are spread over this many days")
+        parser.add_argument('--seed', type=int, default=None, help="Random seed, for repeatable runs")
+        parser.add_argument('--keep', action='store_true', help="Keep the benchmark users and their bookings")
+
+    def handle(self, *args, **options):
+        packages = list(ServicePackage.objects.filter(is_active=True))
+        if not packages:
+            raise CommandError("Create at least one active service package first.")
+        rng = random.Random(options['seed'])
+
+        self.report_settings()
+        customers = self.make_users(options['users'], staff=False)
+        staff = self.make_users(options['staff'], staff=True, offset=options['users'])
+        days = []
+        day = date.today() + timedelta(days=2)
+        while len(days) < options['days']:
+            if not is_holiday(day):
+                days.append(day)
+            day += timedelta(days=1)
+        schedule = get_schedule()
+        times = [
+            (datetime.combine(date.today(), schedule.opening) + timedelta(minutes=15 * step)).time()
+            for step in range((schedule.closing.hour - schedule.opening.hour) * 4)
+        ]
+
+        samples = defaultdict(list)  # route -> latencies in seconds
+        outcomes = defaultdict(int)
+        lock = threading.Lock()
+        barrier = threading.Barrier(len(customers) + len(staff))
+
+        def timed(route, request):
+            started = time.perf_counter()
+            try:
+                response = request()
+            except OperationalError as exc:
+                outcome = 'lock errors' if 'locked' in str(exc) else 'errors'
+                response = None
+            except Exception:
+                outcome = 'errors'
+                response = None
+            else:
+                outcome = f'HTTP {response.status_code}'
+            elapsed = time.perf_counter() - started
+            with lock:
+                samples[route].append(elapsed)
+                outcomes[outcome] += 1
+            return response
+
+        def customer_session(user, seed):
+            local = random.Random(seed)
+            client = self.client_for(user)
+            try:
+                barrier.wait()
+                for _round in range(options['iterations']):
+                    timed('dashboard', lambda: client.get(reverse('appointments:dashboard')))
+                    package = local.choice(packages)
+                    form = {
+                        'package': package.pk,
+                        'date': local.choice(days).isoformat(),
+                        'time': local.choice(times).strftime('%H:%M'),
+                    }
+                    response = timed('book', lambda: client.post(reverse('appointments:book_appointment'), form))
+                    if response is not None:
+                        with lock:
+                            outcomes['booked' if response.status_code == 302 else 'rejected by the form'] += 1
+            finally:
+                connection.close()
+
+        def staff_session(user):
+            client = self.client_for(user)
+            try:
+                barrier.wait()
+                for _round in range(options['iterations']):
+                    timed('admin_dashboard', lambda: client.get(reverse('appointments:admin_dashboard')))
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=customer_session, args=(user, rng.random())) for user in customers
+        ] + [threading.Thread(target=staff_session, args=(user,)) for user in staff]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+        close_old_connections()
+
+        self.report(samples, outcomes, wall)
+        if not options['keep']:
+            self.clean_up()
+
+    def report_settings(self):
+        with connection.cursor() as cursor:
+            pragmas = {
+                name: cursor.execute(f'PRAGMA {name}').fetchone()[0]
+                for name in ('journal_mode', 'synchronous', 'busy_timeout')
+            }
+        options = connection.settings_dict
+        self.stdout.write(
+            f"journal_mode={pragmas['journal_mode']} synchronous={pragmas['synchronous']} "
+            f"busy_timeout={pragmas['busy_timeout']}ms "
+            f"transaction_mode={options['OPTIONS'].get('transaction_mode') or 'DEFERRED'} "
+            f"CONN_MAX_AGE={options['CONN_MAX_AGE']}"
+        )
+
+    def make_users(self, count, staff, offset=0):
+        users = []
+        for number in range(offset, offset + count):
+            user, _created = User.objects.get_or_create(
+                username=f'{USERNAME_PREFIX}{number}',
+                defaults={'phone_number': f'+92-399-{number:07d}', 'is_staff': staff},
+            )
+            users.append(user)
+        return users
+
+    def client_for(self, user):
+        # localhost is always allowed while DEBUG is on; logging in writes the session
+        # before the clock starts
+        client = Client(raise_request_exception=True, SERVER_NAME='localhost')
+        client.force_login(user)
+        return client
+
+    def report(self, samples, outcomes, wall):
+        total = sum(len(latencies) for latencies in samples.values())
+        self.stdout.write(f"\n{total} requests in {wall:.1f}s ({total / wall:.1f} req/s)\n")
+        self.stdout.write(f"{'route':<16}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+        for route, latencies in sorted(samples.items()):
+            latencies.sort()
+            self.stdout.write(
+                f"{route:<16}{len(latencies):>7}"
+                + ''.join(f"{percentile(latencies, fraction) * 1000:>10.1f}" for fraction in (0.5, 0.95, 0.99))
+                + f"{latencies[-1] * 1000:>10.1f}"
+            )
+        self.stdout.write('')
+        for outcome, count in sorted(outcomes.items()):
+            self.stdout.write(f"{outcome:<24}{count:>7}")
+        locked = outcomes.get('lock errors', 0)
+        style = self.style.SUCCESS if not locked else self.style.ERROR
+        self.stdout.write(style(f"\nDatabase lock errors: {locked}"))
+
+    def clean_up(self):
+        users = User.objects.filter(username__startswith=USERNAME_PREFIX)
+        appointments = Appointment.objects.filter(customer__in=users)
+        BookingSlot.objects.filter(appointment__in=appointments).delete()
+        OutboxMessage.objects.filter(recipient__in=users.values('phone_number')).delete()
+        # One by one, so the signals keep the dashboard totals, rollups and search index right
+        for appointment in appointments:
+            appointment.delete()
+        users.delete()
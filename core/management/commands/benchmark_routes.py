@@ -0,0 +1,75 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from appointments.models import Appointment
+from core.benchmark import ROUTES, compare, run, uncovered_routes
+from services.models import ServicePackage
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Request every named route through the test client, record status, query count and "
+        "latency, and compare them with a JSON baseline. Fails when a route regresses."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--baseline', type=Path, default=settings.BASE_DIR / 'benchmarks' / 'routes.json',
+            help="Baseline file; written on the first run",
+        )
+        parser.add_argument('--save', action='store_true', help="Overwrite the baseline with this run")
+        parser.add_argument('--repeat', type=int, default=5, help="Timed requests per route, after a warm-up")
+        parser.add_argument(
+            '--threshold', type=float, default=0.25,
+            help="Allowed slowdown of the median latency, as a fraction (0.25 = 25%%)",
+        )
+        parser.add_argument('--route', action='append', choices=sorted(ROUTES), help="Only these routes")
+
+    def handle(self, *args, **options):
+        for name in uncovered_routes():
+            self.stderr.write(self.style.WARNING(f"Route {name} is not benchmarked; add it to core.benchmark.ROUTES"))
+
+        baseline = None
+        if options['baseline'].exists() and not options['save']:
+            baseline = json.loads(options['baseline'].read_text())
+
+        self.stdout.write(f"{'route':<44}{'status':>7}{'queries':>9}{'median ms':>11}{'max ms':>10}")
+
+        def log(label, result):
+            if 'skipped' in result:
+                self.stdout.write(f"{label:<44}  skipped: {result['skipped']}")
+            else:
+                self.stdout.write(
+                    f"{label:<44}{result['status']:>7}{result['queries']:>9}"
+                    f"{result['median_ms']:>11.1f}{result['max_ms']:>10.1f}"
+                )
+
+        results = run(repeat=max(options['repeat'], 1), only=options['route'], log=log)
+
+        if baseline is None:
+            options['baseline'].parent.mkdir(parents=True, exist_ok=True)
+            options['baseline'].write_text(json.dumps({
+                'created': timezone.now().isoformat(),
+                'database': {
+                    'vendor': connection.vendor,
+                    'users': User.objects.count(),
+                    'packages': ServicePackage.objects.count(),
+                    'appointments': Appointment.objects.count(),
+                },
+                'routes': results,
+            }, indent=2) + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {options['baseline']}"))
+            return
+
+        regressions = compare(results, baseline['routes'], options['threshold'])
+        if regressions:
+            for label, reason in regressions.items():
+                self.stderr.write(self.style.ERROR(f"{label}: {reason}"))
+            raise CommandError(f"{len(regressions)} route(s) regressed against {options['baseline']}.")
+        self.stdout.write(self.style.SUCCESS(f"No regressions against {options['baseline']}."))
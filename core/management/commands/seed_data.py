@@ -0,0 +1,51 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core.seed import BATCH_SIZE, PASSWORD, PREFIX, seed
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with reproducible synthetic customers, packages, stylists and "
+        "appointments for load testing, e.g. --users 100000 --packages 500 --appointments 2000000. "
+        "Use a scratch database: the rows are not meant to be deleted one by one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--packages', type=int, default=50)
+        parser.add_argument('--resources', type=int, default=10, help="Stylists and chairs")
+        parser.add_argument('--appointments', type=int, default=20000)
+        parser.add_argument('--seed', type=int, default=0, help="Same seed, same data")
+        parser.add_argument(
+            '--until', type=date.fromisoformat, default=None,
+            help="Last day with appointments, YYYY-MM-DD (default: 60 days from today); "
+                 "earlier days are filled backwards from it",
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if min(options['users'], options['packages'], options['resources']) < 1:
+            raise CommandError("--users, --packages and --resources must be at least 1.")
+        if not connection.features.can_return_rows_from_bulk_insert:
+            raise CommandError(f"{connection.vendor} cannot return primary keys from bulk inserts.")
+        if User.objects.filter(username__startswith=PREFIX).exists():
+            raise CommandError(
+                f"This database already has seeded data ({PREFIX}* users). Start from a fresh one, "
+                "e.g. with manage.py flush."
+            )
+
+        started = time.perf_counter()
+
+        def log(message):
+            self.stdout.write(f"[{time.perf_counter() - started:7.1f}s] {message}")
+
+        seed(
+            options['users'], options['packages'], options['resources'], options['appointments'],
+            seed=options['seed'], last_day=options['until'], batch_size=options['batch_size'], log=log,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Done. Seeded accounts log in with the password {PASSWORD!r}."))
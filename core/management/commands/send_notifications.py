@@ -0,0 +1,38 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.notifications import BATCH_SIZE, drain
+
+
+class Command(BaseCommand):
+    help = "Send queued email and SMS notifications; runs until stopped unless --once is given"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Send everything that is due, then exit")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="Messages claimed per batch")
+        parser.add_argument(
+            '--workers', type=int, default=getattr(settings, 'NOTIFICATION_WORKERS', 4),
+            help="Messages sent in parallel",
+        )
+        parser.add_argument('--interval', type=float, default=5, help="Seconds to wait when nothing is due")
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        try:
+            while True:
+                sent, failed = drain(batch_size=options['batch_size'], workers=max(options['workers'], 1))
+                total_sent += sent
+                total_failed += failed
+                if sent or failed:
+                    self.stdout.write(f"Sent {sent}, failed {failed}.")
+                    continue  # More may be due already
+                if options['once']:
+                    break
+                close_old_connections()
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"Sent {total_sent} notification(s), {total_failed} failed."))
@@ -0,0 +1,151 @@
+"""
+In-process request metrics.
+
+RequestMetricsMiddleware (core.middleware) fills a RequestRecorder for every request
+and adds it to the registry below, keyed by the resolved URL name. The registry keeps
+running totals per view and is exported in Prometheus text format by the /metrics/
+endpoint, so page and query budgets (NFR-1.1: 3 s pages, NFR-1.3: 2 s queries) can be
+checked against real traffic.
+
+Totals live in the memory of each worker process and reset on restart.
+"""
+import logging
+import re
+import contextvars
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Placeholder lists of any length count as the same query shape
+IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+
+
+def enabled():
+    return getattr(settings, 'REQUEST_METRICS_ENABLED', True)
+
+
+def sql_shape(sql):
+    """Normalize SQL so the same query with different parameters has one shape"""
+    return IN_LIST.sub('IN (...)', sql)
+
+
+class RequestRecorder:
+    """Query count, SQL time, template render time and wall time of one request"""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.slowest_query = 0.0
+        self.render_time = 0.0
+        self.wall_time = 0.0
+        self.shapes = Counter()
+
+    def sql_wrapper(self, execute, sql, params, many, context):
+        """Database execute wrapper (see connection.execute_wrapper)"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.queries += 1
+            self.sql_time += elapsed
+            self.slowest_query = max(self.slowest_query, elapsed)
+            self.shapes[sql_shape(sql)] += 1
+
+    def repeated_queries(self, threshold):
+        """Query shapes run at least `threshold` times: the signature of an N+1 loop"""
+        return [(shape, count) for shape, count in self.shapes.items() if count >= threshold]
+
+
+# The recorder of the request being handled. A context variable rather than a wrapper
+# added to `connection` for the request, because under ASGI the queries run on a
+# worker thread with its own connection; context variables follow them there.
+current_recorder = contextvars.ContextVar('request_metrics_recorder', default=None)
+
+
+def sql_wrapper(execute, sql, params, many, context):
+    """Database execute wrapper on every connection; counts queries for the current request"""
+    recorder = current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder.sql_wrapper(execute, sql, params, many, context)
+
+
+def install_sql_wrapper(sender, connection, **kwargs):
+    """connection_created receiver (see CoreConfig.ready)"""
+    if sql_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(sql_wrapper)
+
+
+class MetricsRegistry:
+    FIELDS = ('requests', 'wall_time', 'wall_time_max', 'queries', 'sql_time', 'render_time', 'n_plus_one')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def record(self, view_name, recorder, n_plus_one=0):
+        with self._lock:
+            stats = self._views.setdefault(view_name, dict.fromkeys(self.FIELDS, 0))
+            stats['requests'] += 1
+            stats['wall_time'] += recorder.wall_time
+            stats['wall_time_max'] = max(stats['wall_time_max'], recorder.wall_time)
+            stats['queries'] += recorder.queries
+            stats['sql_time'] += recorder.sql_time
+            stats['render_time'] += recorder.render_time
+            stats['n_plus_one'] += n_plus_one
+
+    def snapshot(self):
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._views.items()}
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+registry = MetricsRegistry()
+
+
+def record_request(view_name, recorder):
+    """Add a finished request to the registry and log budget violations"""
+    threshold = getattr(settings, 'REQUEST_METRICS_N_PLUS_ONE_THRESHOLD', 5)
+    repeated = recorder.repeated_queries(threshold) if threshold else []
+    for shape, count in repeated:
+        logger.warning("Possible N+1 in %s: query ran %d times: %s", view_name, count, shape)
+
+    if recorder.wall_time > getattr(settings, 'REQUEST_METRICS_SLOW_REQUEST', 3.0):
+        logger.warning("Slow request in %s: %.2f s", view_name, recorder.wall_time)
+    if recorder.slowest_query > getattr(settings, 'REQUEST_METRICS_SLOW_QUERY', 2.0):
+        logger.warning("Slow query in %s: %.2f s", view_name, recorder.slowest_query)
+
+    registry.record(view_name, recorder, n_plus_one=len(repeated))
+
+
+# (metric name, registry field, type, help)
+EXPORTED = [
+    ('salon_requests_total', 'requests', 'counter', 'Requests handled'),
+    ('salon_request_seconds_total', 'wall_time', 'counter', 'Wall time spent handling requests'),
+    ('salon_request_seconds_max', 'wall_time_max', 'gauge', 'Slowest request'),
+    ('salon_sql_queries_total', 'queries', 'counter', 'SQL queries executed'),
+    ('salon_sql_seconds_total', 'sql_time', 'counter', 'Time spent in SQL queries'),
+    ('salon_template_seconds_total', 'render_time', 'counter', 'Time spent rendering templates'),
+    ('salon_n_plus_one_total', 'n_plus_one', 'counter', 'Repeated query shapes flagged as possible N+1'),
+]
+
+
+def render_prometheus(snapshot=None):
+    """The registry in Prometheus text exposition format"""
+    snapshot = registry.snapshot() if snapshot is None else snapshot
+    lines = []
+    for metric, field, kind, help_text in EXPORTED:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for view_name in sorted(snapshot):
+            value = snapshot[view_name][field]
+            lines.append(f'{metric}{{view="{view_name}"}} {value:.6g}')
+    return '\n'.join(lines) + '\n'
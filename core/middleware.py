@@ -0,0 +1,102 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from . import metrics
+
+
+class RequestMetricsMiddleware:
+    """
+    Record query count, SQL time, template render time and wall time for every
+    request, tagged by URL name (see core.metrics). Place it first in MIDDLEWARE so
+    the wall time covers the whole stack.
+
+    Works in both modes, so under ASGI the async views are not pushed onto a thread.
+
+    The same numbers go out in a Server-Timing header, but only with DEBUG on or to
+    staff: they describe the backend, which visitors should not see (NFR-4.3).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self._acall(request)
+        if not metrics.enabled():
+            return self.get_response(request)
+
+        recorder = self._start(request)
+        start = time.perf_counter()
+        token = metrics.current_recorder.set(recorder)
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.current_recorder.reset(token)
+        self._finish(request, response, recorder, start)
+        if self._shows_timing(getattr(request, 'user', None)):
+            self._add_server_timing(response, recorder)
+        return response
+
+    async def _acall(self, request):
+        if not metrics.enabled():
+            return await self.get_response(request)
+
+        recorder = self._start(request)
+        start = time.perf_counter()
+        token = metrics.current_recorder.set(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.current_recorder.reset(token)
+        self._finish(request, response, recorder, start)
+        # request.user cannot be touched synchronously here; auser() loads it without blocking
+        user = await request.auser() if hasattr(request, 'auser') else None
+        if self._shows_timing(user):
+            self._add_server_timing(response, recorder)
+        return response
+
+    def _start(self, request):
+        recorder = metrics.RequestRecorder()
+        request._metrics = recorder
+        return recorder
+
+    def _finish(self, request, response, recorder, start):
+        recorder.wall_time = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        metrics.record_request(match.view_name if match else '<unresolved>', recorder)
+
+    def _shows_timing(self, user):
+        return settings.DEBUG or bool(user is not None and user.is_staff)
+
+    def _add_server_timing(self, response, recorder):
+        response['Server-Timing'] = (
+            f"db;desc=\"{recorder.queries} queries\";dur={recorder.sql_time * 1000:.1f}, "
+            f"tpl;dur={recorder.render_time * 1000:.1f}, "
+            f"total;dur={recorder.wall_time * 1000:.1f}"
+        )
+
+    def process_template_response(self, request, response):
+        recorder = getattr(request, '_metrics', None)
+        if recorder is None:
+            return response
+
+        # TemplateResponses are rendered after the view returns; time that step
+        render = response.render
+
+        def timed_render():
+            start = time.perf_counter()
+            try:
+                return render()
+            finally:
+                recorder.render_time += time.perf_counter() - start
+
+        response.render = timed_render
+        return response
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:44
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('actor_name', models.CharField(blank=True, max_length=150)),
+                ('action', models.CharField(max_length=30)),
+                ('object_type', models.CharField(max_length=100)),
+                ('object_id', models.CharField(max_length=64)),
+                ('object_repr', models.CharField(blank=True, max_length=200)),
+                ('status_before', models.CharField(blank=True, max_length=20)),
+                ('status_after', models.CharField(blank=True, max_length=20)),
+                ('message', models.TextField(blank=True)),
+                ('actor', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'audit entries',
+                'ordering': ['-created_at', '-pk'],
+                'indexes': [models.Index(fields=['object_type', 'object_id', '-created_at'], name='audit_object_idx')],
+            },
+        ),
+    ]
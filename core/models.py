@@ -1,3 +1,97 @@
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
 
-# Create your models here.
+
+class OutboxMessage(models.Model):
+    """
+    An email or SMS waiting to be sent. Rows are written in the same transaction as
+    the change they announce and delivered later by `manage.py send_notifications`
+    (see core.notifications).
+    """
+    CHANNEL_CHOICES = [
+        ('EMAIL', _('Email')),
+        ('SMS', _('SMS')),
+    ]
+    STATUS_CHOICES = [
+        ('PENDING', _('Pending')),
+        ('SENDING', _('Sending')),
+        ('SENT', _('Sent')),
+        ('FAILED', _('Failed')),
+    ]
+
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
+    recipient = models.CharField(max_length=254) # Email address or phone number
+    subject = models.CharField(max_length=200, blank=True)
+    body = models.TextField()
+    # Same key, same message: enqueueing twice is a no-op and the key is handed to the gateway
+    idempotency_key = models.CharField(max_length=100, unique=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claim_token = models.CharField(max_length=32, blank=True, editable=False) # Set by the worker holding the row
+    claimed_at = models.DateTimeField(null=True, blank=True, editable=False)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # The worker's "what is due" query
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_channel_display()} to {self.recipient} ({self.status})"
+
+
+class AuditEntryQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        raise TypeError("Audit entries are append-only.")
+
+    def delete(self):
+        raise TypeError("Audit entries are append-only.")
+
+
+class AuditEntry(models.Model):
+    """
+    One staff action: who did what to which object, and the status before and after.
+    Append-only; rows are written in batches by core.audit, never updated.
+    """
+    created_at = models.DateTimeField(default=timezone.now) # When the action happened, not when it was flushed
+    # No database constraint: the entry outlives the account, actor_name keeps who it was
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.DO_NOTHING, db_constraint=False,
+        null=True, blank=True, related_name='+',
+    )
+    actor_name = models.CharField(max_length=150, blank=True)
+    action = models.CharField(max_length=30) # See the constants in core.audit
+    object_type = models.CharField(max_length=100) # Model label, e.g. appointments.appointment
+    object_id = models.CharField(max_length=64)
+    object_repr = models.CharField(max_length=200, blank=True)
+    status_before = models.CharField(max_length=20, blank=True)
+    status_after = models.CharField(max_length=20, blank=True)
+    message = models.TextField(blank=True)
+
+    objects = AuditEntryQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['-created_at', '-pk']
+        verbose_name_plural = 'audit entries'
+        indexes = [
+            # "History of appointment X"
+            models.Index(fields=['object_type', 'object_id', '-created_at'], name='audit_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.actor_name or 'system'} {self.action} {self.object_type} #{self.object_id}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise TypeError("Audit entries are append-only.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise TypeError("Audit entries are append-only.")
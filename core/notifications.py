@@ -0,0 +1,199 @@
+"""
+Transactional outbox for customer emails and SMS.
+
+Views never talk to a mail server or SMS gateway. They call enqueue(), which writes
+OutboxMessage rows inside the current transaction: if the booking rolls back, so does
+its confirmation, and a committed booking always has one. `manage.py
+send_notifications` then drains the table in the background:
+
+* a batch of due rows is claimed with a conditional UPDATE, so several workers never
+  pick up the same message,
+* the batch is sent on a thread pool, as gateway calls are slow network round trips,
+* failures are retried with exponential backoff until NOTIFICATION_MAX_ATTEMPTS and
+  then marked FAILED for someone to look at in the admin.
+
+Delivery is at least once: a worker that dies after sending but before recording it
+leaves the row claimed, and it is retried once the claim expires. Backends receive the
+message's idempotency_key so a gateway that supports it can drop the duplicate.
+
+Backends are set per channel in NOTIFICATION_BACKENDS. Each is a class with a
+send(message) method that raises on failure.
+"""
+import json
+import logging
+import sys
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKENDS = {
+    'EMAIL': 'core.notifications.EmailBackend',
+    'SMS': 'core.notifications.ConsoleBackend',
+}
+BATCH_SIZE = 100
+# A claim older than this belongs to a worker that died mid-batch
+CLAIM_TIMEOUT = timedelta(minutes=5)
+
+
+def build_message(channel, recipient, body, idempotency_key, subject=''):
+    """An unsaved OutboxMessage, or None if `recipient` is empty"""
+    if not recipient:
+        return None
+    return OutboxMessage(
+        channel=channel, recipient=recipient, subject=subject, body=body, idempotency_key=idempotency_key,
+    )
+
+
+def enqueue(messages):
+    """
+    Queue unsaved OutboxMessages (None entries are skipped) with one INSERT per batch.
+    Call it inside the transaction that makes the change being announced. Messages
+    whose idempotency_key is already queued are ignored.
+    """
+    messages = [message for message in messages if message is not None]
+    OutboxMessage.objects.bulk_create(messages, batch_size=BATCH_SIZE, ignore_conflicts=True)
+    return len(messages)
+
+
+# Backends
+
+class ConsoleBackend:
+    """Print messages to stdout; the default for development"""
+    _lock = threading.Lock()
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def send(self, message):
+        lines = [f"[{message.channel}] to {message.recipient} ({message.idempotency_key})"]
+        if message.subject:
+            lines.append(message.subject)
+        lines.append(message.body)
+        with self._lock:
+            self.stream.write('\n'.join(lines) + '\n\n')
+            self.stream.flush()
+
+
+class FileBackend:
+    """Append messages as JSON lines to NOTIFICATION_FILE_PATH"""
+    _lock = threading.Lock()
+
+    def __init__(self, path=None):
+        self.path = path or getattr(settings, 'NOTIFICATION_FILE_PATH', settings.BASE_DIR / 'notifications.jsonl')
+
+    def send(self, message):
+        line = json.dumps({
+            'key': message.idempotency_key,
+            'channel': message.channel,
+            'recipient': message.recipient,
+            'subject': message.subject,
+            'body': message.body,
+            'sent_at': timezone.now().isoformat(),
+        })
+        with self._lock, open(self.path, 'a', encoding='utf-8') as output:
+            output.write(line + '\n')
+
+
+class MemoryBackend:
+    """Keep sent messages in MemoryBackend.outbox, like Django's locmem mail backend; for tests"""
+    outbox = []
+
+    def send(self, message):
+        self.outbox.append(message)
+
+
+class EmailBackend:
+    """Send through Django's mail framework (EMAIL_BACKEND and EMAIL_* settings)"""
+
+    def send(self, message):
+        EmailMessage(
+            subject=message.subject,
+            body=message.body,
+            to=[message.recipient],
+            headers={'X-Idempotency-Key': message.idempotency_key},
+        ).send(fail_silently=False)
+
+
+def load_backends():
+    paths = {**DEFAULT_BACKENDS, **getattr(settings, 'NOTIFICATION_BACKENDS', {})}
+    return {channel: import_string(path)() for channel, path in paths.items()}
+
+
+# Worker
+
+def retry_delay(attempts):
+    """Backoff before the next try after `attempts` failed ones: base, 2x, 4x, ... capped"""
+    base = getattr(settings, 'NOTIFICATION_RETRY_DELAY', 60)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), getattr(settings, 'NOTIFICATION_MAX_RETRY_DELAY', 3600)))
+
+
+def claim_batch(batch_size=BATCH_SIZE):
+    """Mark up to `batch_size` due messages as SENDING for this worker and return them"""
+    now = timezone.now()
+    due = Q(status='PENDING', next_attempt_at__lte=now) | Q(status='SENDING', claimed_at__lt=now - CLAIM_TIMEOUT)
+    pks = list(
+        OutboxMessage.objects.filter(due)
+        .order_by('next_attempt_at', 'pk')
+        .values_list('pk', flat=True)[:batch_size]
+    )
+    if not pks:
+        return []
+    token = uuid.uuid4().hex
+    # Repeating the due condition makes the claim atomic: rows another worker claimed
+    # between the SELECT and this UPDATE no longer match
+    OutboxMessage.objects.filter(due, pk__in=pks).update(status='SENDING', claim_token=token, claimed_at=now)
+    return list(OutboxMessage.objects.filter(pk__in=pks, claim_token=token).order_by('pk'))
+
+
+def _deliver(backends, message):
+    try:
+        backends[message.channel].send(message)
+    except Exception as exc:
+        return exc
+    return None
+
+
+def drain(batch_size=BATCH_SIZE, workers=None, backends=None):
+    """
+    Claim and send one batch. Returns (sent, failed) counts; (0, 0) means nothing was due.
+    """
+    messages = claim_batch(batch_size)
+    if not messages:
+        return 0, 0
+    backends = backends or load_backends()
+    workers = workers or getattr(settings, 'NOTIFICATION_WORKERS', 4)
+    with ThreadPoolExecutor(max_workers=min(workers, len(messages)), thread_name_prefix='notifications') as pool:
+        errors = list(pool.map(lambda message: _deliver(backends, message), messages))
+
+    now = timezone.now()
+    max_attempts = getattr(settings, 'NOTIFICATION_MAX_ATTEMPTS', 5)
+    sent = [message.pk for message, error in zip(messages, errors) if error is None]
+    # Filtering on the token leaves alone rows whose claim expired and moved to another worker
+    token = messages[0].claim_token
+    OutboxMessage.objects.filter(pk__in=sent, claim_token=token).update(
+        status='SENT', sent_at=now, attempts=F('attempts') + 1, claim_token='', last_error='',
+    )
+    for message, error in zip(messages, errors):
+        if error is None:
+            continue
+        attempts = message.attempts + 1
+        logger.warning("Sending %s failed (attempt %s): %s", message.idempotency_key, attempts, error)
+        OutboxMessage.objects.filter(pk=message.pk, claim_token=token).update(
+            status='FAILED' if attempts >= max_attempts else 'PENDING',
+            attempts=attempts,
+            next_attempt_at=now + retry_delay(attempts),
+            claim_token='',
+            last_error=f"{type(error).__name__}: {error}"[:1000],
+        )
+    return len(sent), len(messages) - len(sent)
@@ -0,0 +1,116 @@
+"""
+Keyset (cursor) pagination for newest-first lists.
+
+Offset pagination makes the database walk past every skipped row and count the whole
+result set, so deep pages get slower as history grows. Keyset pagination instead
+remembers the (created_at, id) of the last row shown and asks for rows strictly
+older than it, which an index on created_at answers directly. Page 500 costs the
+same as page one.
+"""
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+# Query parameters carrying the cursor
+AFTER_PARAM = 'after'    # rows older than the cursor (next page)
+BEFORE_PARAM = 'before'  # rows newer than the cursor (previous page)
+
+
+def encode_cursor(obj):
+    raw = f"{obj.created_at.isoformat()}|{obj.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (created_at, pk) from a cursor, or None if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, pk = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+class KeysetPage:
+    def __init__(self, object_list, has_next, has_previous, total=None):
+        self.object_list = object_list
+        self.has_next_page = has_next
+        self.has_previous_page = has_previous
+        # Optional approximate total supplied by the view
+        self.total = total
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.has_next_page
+
+    def has_previous(self):
+        return self.has_previous_page
+
+    def has_other_pages(self):
+        return self.has_next_page or self.has_previous_page
+
+    @property
+    def next_cursor(self):
+        return encode_cursor(self.object_list[-1]) if self.has_next_page and self.object_list else None
+
+    @property
+    def previous_cursor(self):
+        return encode_cursor(self.object_list[0]) if self.has_previous_page and self.object_list else None
+
+
+def paginate_newest_first(queryset, per_page, after=None, before=None):
+    """
+    One page of `queryset` ordered by (-created_at, -id).
+    `after`/`before` are cursors from a previous page's next_cursor/previous_cursor.
+    A `before` cursor with no newer rows left (they were deleted or filtered out since)
+    gives the first page.
+    """
+    after = decode_cursor(after) if after else None
+    before = decode_cursor(before) if before else None
+
+    if before:
+        created_at, pk = before
+        rows = list(
+            queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk))
+            .order_by('created_at', 'pk')[:per_page + 1]
+        )
+        if rows:
+            has_previous = len(rows) > per_page
+            rows = rows[:per_page][::-1]
+            return KeysetPage(rows, has_next=True, has_previous=has_previous)
+        after = None
+
+    if after:
+        created_at, pk = after
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+    rows = list(queryset.order_by('-created_at', '-pk')[:per_page + 1])
+    return KeysetPage(rows[:per_page], has_next=len(rows) > per_page, has_previous=bool(after))
+
+
+class KeysetPaginationMixin:
+    """
+    ListView mixin that replaces offset pagination with keyset pagination on
+    (created_at, id). Templates get `page_obj` with has_next/has_previous and
+    next_cursor/previous_cursor for the `after`/`before` query parameters.
+    """
+    paginate_by = 20
+
+    def get_total_count(self, queryset):
+        """Optional (possibly approximate or cached) total for display; None to skip"""
+        return None
+
+    def paginate_queryset(self, queryset, page_size):
+        page = paginate_newest_first(
+            queryset,
+            page_size,
+            after=self.request.GET.get(AFTER_PARAM),
+            before=self.request.GET.get(BEFORE_PARAM),
+        )
+        page.total = self.get_total_count(queryset)
+        return None, page, page.object_list, page.has_other_pages()
@@ -0,0 +1,210 @@
+"""
+Pluggable full-text search.
+
+A SearchIndex mirrors a few text columns of one model into a database specific
+text index, keyed by the model's primary key:
+
+* SQLite: an FTS5 virtual table, ranked with bm25()
+* PostgreSQL: a table with a tsvector column and a GIN index, ranked with ts_rank()
+* anything else: no index table; queries fall back to icontains lookups
+
+Apps declare their index (see appointments.search), create its table from a
+migration with create_table()/drop_table(), and keep rows in sync with signals.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+# Most matches ordered by relevance; the rest follow unranked
+RANK_LIMIT = 500
+
+
+def tokenize(query):
+    """Split a user query into plain word tokens, dropping any search syntax"""
+    return re.findall(r'\w+', query.lower())
+
+
+class SQLiteFTS5Backend:
+    def __init__(self, index):
+        self.index = index
+
+    def create_sql(self):
+        columns = ', '.join(self.index.columns)
+        return [f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.index.table} USING fts5({columns}, tokenize='unicode61')"]
+
+    def drop_sql(self):
+        return [f"DROP TABLE IF EXISTS {self.index.table}"]
+
+    def update(self, cursor, pk, values):
+        columns = ', '.join(self.index.columns)
+        placeholders = ', '.join(['%s'] * len(self.index.columns))
+        cursor.execute(f"DELETE FROM {self.index.table} WHERE rowid = %s", [pk])
+        cursor.execute(
+            f"INSERT INTO {self.index.table} (rowid, {columns}) VALUES (%s, {placeholders})",
+            [pk] + [values.get(column, '') for column in self.index.columns],
+        )
+
+    def remove(self, cursor, pk):
+        cursor.execute(f"DELETE FROM {self.index.table} WHERE rowid = %s", [pk])
+
+    def match(self, tokens):
+        # Every token must match as a prefix: "raz 0300" finds "Raazia", "03001234567"
+        return ' '.join(f'"{token}"*' for token in tokens)
+
+    def matching_sql(self, tokens):
+        return f"SELECT rowid FROM {self.index.table} WHERE {self.index.table} MATCH %s", [self.match(tokens)]
+
+    def ranked_sql(self, tokens, limit, within):
+        within_sql, within_params = within
+        return (
+            f"SELECT rowid FROM {self.index.table} WHERE {self.index.table} MATCH %s "
+            f"AND rowid IN ({within_sql}) "
+            f"ORDER BY bm25({self.index.table}) LIMIT %s",
+            [self.match(tokens), *within_params, limit],
+        )
+
+
+class PostgreSQLBackend:
+    def __init__(self, index):
+        self.index = index
+
+    def create_sql(self):
+        return [
+            f"CREATE TABLE IF NOT EXISTS {self.index.table} (id bigint PRIMARY KEY, document tsvector NOT NULL)",
+            f"CREATE INDEX IF NOT EXISTS {self.index.table}_document ON {self.index.table} USING GIN (document)",
+        ]
+
+    def drop_sql(self):
+        return [f"DROP TABLE IF EXISTS {self.index.table}"]
+
+    def update(self, cursor, pk, values):
+        document = ' '.join(values.get(column, '') for column in self.index.columns)
+        cursor.execute(
+            f"INSERT INTO {self.index.table} (id, document) VALUES (%s, to_tsvector('simple', %s)) "
+            f"ON CONFLICT (id) DO UPDATE SET document = EXCLUDED.document",
+            [pk, document],
+        )
+
+    def remove(self, cursor, pk):
+        cursor.execute(f"DELETE FROM {self.index.table} WHERE id = %s", [pk])
+
+    def match(self, tokens):
+        return ' & '.join(f'{token}:*' for token in tokens)
+
+    def matching_sql(self, tokens):
+        return (
+            f"SELECT id FROM {self.index.table} WHERE document @@ to_tsquery('simple', %s)",
+            [self.match(tokens)],
+        )
+
+    def ranked_sql(self, tokens, limit, within):
+        query = self.match(tokens)
+        within_sql, within_params = within
+        return (
+            f"SELECT id FROM {self.index.table} WHERE document @@ to_tsquery('simple', %s) "
+            f"AND id IN ({within_sql}) "
+            f"ORDER BY ts_rank(document, to_tsquery('simple', %s)) DESC LIMIT %s",
+            [query, *within_params, query, limit],
+        )
+
+
+def _sqlite_has_fts5():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+class SearchIndex:
+    """
+    A full-text index over `columns`, stored in `table`, for the model whose
+    queryset is searched. `fallback_fields` are the ORM paths searched with
+    icontains when the database has no supported text index.
+    """
+
+    def __init__(self, table, columns, fallback_fields):
+        self.table = table
+        self.columns = columns
+        self.fallback_fields = fallback_fields
+        self._backend = None
+
+    @property
+    def backend(self):
+        """The backend for the default database, or None to fall back to icontains"""
+        if self._backend is None:
+            if connection.vendor == 'sqlite' and _sqlite_has_fts5():
+                self._backend = SQLiteFTS5Backend(self)
+            elif connection.vendor == 'postgresql':
+                self._backend = PostgreSQLBackend(self)
+            else:
+                self._backend = False
+        return self._backend or None
+
+    def create_table(self, schema_editor):
+        if self.backend:
+            for sql in self.backend.create_sql():
+                schema_editor.execute(sql)
+
+    def drop_table(self, schema_editor):
+        if self.backend:
+            for sql in self.backend.drop_sql():
+                schema_editor.execute(sql)
+
+    def update(self, pk, values):
+        """Insert or replace the indexed text for `pk`; `values` maps column -> text"""
+        if self.backend:
+            with connection.cursor() as cursor:
+                self.backend.update(cursor, pk, values)
+
+    def remove(self, pk):
+        if self.backend:
+            with connection.cursor() as cursor:
+                self.backend.remove(cursor, pk)
+
+    def clear(self):
+        if self.backend:
+            with connection.cursor() as cursor:
+                cursor.execute(f"DELETE FROM {self.table}")
+
+    def _fallback(self, queryset, query):
+        condition = Q()
+        for field in self.fallback_fields:
+            condition |= Q(**{f'{field}__icontains': query})
+        return queryset.filter(condition)
+
+    def filter(self, queryset, query):
+        """Restrict `queryset` to rows matching `query`, keeping its ordering"""
+        tokens = tokenize(query)
+        if not tokens:
+            return queryset
+        if not self.backend:
+            return self._fallback(queryset, query)
+        sql, params = self.backend.matching_sql(tokens)
+        return queryset.filter(pk__in=RawSQL(sql, params))
+
+    def rank(self, queryset, query, limit=RANK_LIMIT):
+        """
+        Restrict `queryset` to rows matching `query`, annotated with `search_rank`
+        (0 = most relevant) and ordered by it. Only the `limit` best matches inside
+        `queryset` (e.g. after admin filters) are ranked individually; every other match
+        is still included, after them, with search_rank = limit.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return queryset
+        if not self.backend:
+            return self._fallback(queryset, query)
+        within = queryset.order_by().values('pk').query.sql_with_params()
+        sql, params = self.backend.ranked_sql(tokens, limit, within)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            ids = [row[0] for row in cursor.fetchall()]
+        if not ids:
+            return queryset.none()
+        rank = Case(
+            *[When(pk=pk, then=Value(position)) for position, pk in enumerate(ids)],
+            default=Value(limit),
+            output_field=IntegerField(),
+        )
+        return self.filter(queryset, query).annotate(search_rank=rank).order_by('search_rank')
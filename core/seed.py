@@ -0,0 +1,213 @@
+"""
+Reproducible synthetic data at production-like volume (`manage.py seed_data`).
+
+Customers, packages, stylists/chairs and appointments with their BookingSlots are
+written with bulk_create in large batches, so millions of rows take minutes rather than
+hours. The same --seed always produces the same data. Each stylist's day is filled
+back to back from opening time, so booked slots never overlap.
+
+Bulk inserts skip post_save, so afterwards seed() rebuilds what the signals would
+have kept up to date: dashboard totals, daily rollups, search indexes and the cached
+catalog and calendar versions.
+"""
+import random
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from appointments.availability import get_schedule, is_holiday
+from appointments.calendar import bump_schedule_version
+from appointments.models import Appointment, BookingSlot, Resource
+from appointments.rollups import rebuild_daily_stats
+from appointments.search import rebuild_index as rebuild_appointment_index
+from appointments.stats import rebuild_status_totals
+from services.catalog import bump_catalog_version
+from services.models import ServicePackage
+from services.recommendations import invalidate_catalog
+from services.search import rebuild_index as rebuild_package_index
+from users.models import User
+
+PREFIX = 'seed-'
+# Every seeded account, staff included, can log in with this password
+PASSWORD = 'seed-password'
+BATCH_SIZE = 5000
+
+FIRST_NAMES = ['Ayesha', 'Fatima', 'Hira', 'Maryam', 'Sana', 'Zainab', 'Amna', 'Iqra', 'Mahnoor', 'Sadia']
+LAST_NAMES = ['Khan', 'Ahmed', 'Malik', 'Hussain', 'Butt', 'Sheikh', 'Qureshi', 'Chaudhry', 'Raza', 'Iqbal']
+CATEGORIES = [code for code, _label in ServicePackage.CATEGORY_CHOICES]
+DURATIONS = (30, 45, 60, 90, 120)
+GAPS = (0, 0, 0, 15, 30, 60)  # Minutes left free before each appointment
+FUTURE_STATUSES = (('PENDING', 'CONFIRMED', 'CANCELLED'), (3, 6, 1))
+PAST_STATUSES = (('COMPLETED', 'CANCELLED', 'CONFIRMED'), (85, 12, 3))
+
+
+def seed_phone(number):
+    """A unique valid +92-3XX-XXXXXXX number, in the 350-399 range of network codes"""
+    return f'+92-3{50 + number // 10 ** 7:02d}-{number % 10 ** 7:07d}'
+
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def seed_users(count, rng, batch_size=BATCH_SIZE):
+    """Create `count` customers and one staff account; returns the customers' pks"""
+    password = make_password(PASSWORD)  # Hashed once: hashing per user would take hours
+    users = (
+        User(
+            username=f'{PREFIX}user-{number}',
+            first_name=rng.choice(FIRST_NAMES),
+            last_name=rng.choice(LAST_NAMES),
+            email=f'{PREFIX}user-{number}@example.com',
+            phone_number=seed_phone(number),
+            password=password,
+        )
+        for number in range(count)
+    )
+    for batch in _batches(users, batch_size):
+        User.objects.bulk_create(batch)
+    User.objects.create(
+        username=f'{PREFIX}staff', phone_number=seed_phone(count), password=password, is_staff=True,
+    )
+    return list(
+        User.objects.filter(username__startswith=f'{PREFIX}user-').order_by('pk').values_list('pk', flat=True)
+    )
+
+
+def seed_packages(count, rng):
+    packages = []
+    for number in range(count):
+        category = CATEGORIES[number % len(CATEGORIES)]
+        packages.append(ServicePackage(
+            name=f'{rng.choice(["Classic", "Deluxe", "Signature", "Express", "Premium"])} '
+                 f'{dict(ServicePackage.CATEGORY_CHOICES)[category]} {number + 1}',
+            description=f'Synthetic {category.lower()} package for load testing.',
+            category=category,
+            price=Decimal(rng.randrange(1000, 50000, 500)),
+            duration=rng.choice(DURATIONS),
+            # A few retired packages, like a real catalog
+            is_active=rng.random() > 0.05,
+        ))
+    return ServicePackage.objects.bulk_create(packages)
+
+
+def seed_resources(count, rng):
+    resources = []
+    for number in range(count):
+        # Every third one serves all categories, the rest two categories each
+        categories = [] if number % 3 == 0 else rng.sample(CATEGORIES, 2)
+        resources.append(Resource(
+            name=f'{PREFIX}{"stylist" if number % 2 else "chair"}-{number + 1}',
+            kind='STYLIST' if number % 2 else 'CHAIR',
+            categories=categories,
+        ))
+    return Resource.objects.bulk_create(resources)
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def schedule(count, customers, packages, resources, rng, last_day):
+    """
+    Yield (Appointment, BookingSlot) pairs, `count` in total, filling each resource's
+    days back to back, from `last_day` backwards
+    """
+    servable = {resource.pk: [p for p in packages if resource.can_serve(p.category)] for resource in resources}
+    salon = get_schedule()
+    opening, closing = _minutes(salon.opening), _minutes(salon.closing)
+    today = date.today()
+    day = last_day
+    while True:
+        if not is_holiday(day):
+            statuses = FUTURE_STATUSES if day >= today else PAST_STATUSES
+            for resource in resources:
+                if not servable[resource.pk]:
+                    continue
+                start = opening
+                while True:
+                    package = rng.choice(servable[resource.pk])
+                    start += rng.choice(GAPS)
+                    end = start + package.duration
+                    if end > closing:
+                        break
+                    status = rng.choices(*statuses)[0]
+                    appointment = Appointment(
+                        customer_id=rng.choice(customers),
+                        package=package,
+                        resource=resource,
+                        date=day,
+                        time=time(start // 60, start % 60),
+                        duration=package.duration,
+                        price=package.price,
+                        status=status,
+                    )
+                    slot = BookingSlot(
+                        resource=resource,
+                        date=day,
+                        start_time=appointment.time,
+                        end_time=time(end // 60, end % 60),
+                        # Cancelling gives the time back (see appointments.transitions)
+                        is_available=status == 'CANCELLED',
+                    )
+                    yield appointment, slot
+                    count -= 1
+                    if not count:
+                        return
+                    start = end
+        day -= timedelta(days=1)
+
+
+def seed_appointments(count, customers, packages, resources, rng, last_day, batch_size=BATCH_SIZE):
+    created = 0
+    for batch in _batches(schedule(count, customers, packages, resources, rng, last_day), batch_size):
+        with transaction.atomic():
+            # bulk_create sets the primary keys (RETURNING), which the slots point to
+            appointments = Appointment.objects.bulk_create([appointment for appointment, _slot in batch])
+            slots = []
+            for appointment, slot in batch:
+                slot.appointment = appointment
+                slots.append(slot)
+            BookingSlot.objects.bulk_create(slots)
+        created += len(appointments)
+    return created
+
+
+def rebuild_derived_data():
+    """Refresh everything post_save would have maintained for bulk-created rows"""
+    rebuild_status_totals()
+    rebuild_daily_stats()
+    with transaction.atomic():
+        rebuild_package_index(ServicePackage.objects.filter(description__startswith='Synthetic'))
+        rebuild_appointment_index(Appointment.objects.filter(customer__username__startswith=PREFIX))
+    bump_catalog_version()
+    invalidate_catalog()
+    bump_schedule_version()
+
+
+def seed(users, packages, resources, appointments, seed=0, last_day=None, batch_size=BATCH_SIZE, log=None):
+    """Create the whole dataset; `log` is called with a progress line after each step"""
+    log = log or (lambda message: None)
+    rng = random.Random(seed)
+    last_day = last_day or date.today() + timedelta(days=60)
+
+    customers = seed_users(users, rng, batch_size)
+    log(f"{len(customers)} customers and 1 staff account ({PREFIX}staff)")
+    package_objects = seed_packages(packages, rng)
+    log(f"{len(package_objects)} service packages")
+    resource_objects = seed_resources(resources, rng)
+    log(f"{len(resource_objects)} stylists/chairs")
+    created = seed_appointments(appointments, customers, package_objects, resource_objects, rng, last_day, batch_size)
+    log(f"{created} appointments with their booking slots")
+    rebuild_derived_data()
+    log("Rebuilt dashboard totals, daily rollups and search indexes")
+    return created
@@ -1,3 +1,323 @@
-from django.test import TestCase
+import gzip
+import json
+import sqlite3
+import tempfile
+from datetime import date, time, timedelta
+from pathlib import Path
 
-# Create your tests here.
+from django.core import mail
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from appointments.booking import SlotUnavailable, book_appointment
+from appointments.models import Appointment, BookingSlot, Resource
+from appointments.stats import get_dashboard_stats
+from appointments.transitions import transition_appointment
+from services.models import ServicePackage
+from users.models import User
+from . import audit, metrics
+from .backup import backup
+from .benchmark import uncovered_routes
+from .models import AuditEntry, OutboxMessage
+from .notifications import MemoryBackend, drain
+from .pagination import encode_cursor, paginate_newest_first
+from .seed import seed
+
+
+class FailingBackend:
+    def send(self, message):
+        raise ConnectionError("gateway down")
+
+
+class RequestMetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(username='staff', phone_number='+92-300-7654321', is_staff=True)
+        ServicePackage.objects.create(
+            name='Hydra Facial', description='Facial', category='SKIN', price=5000, duration=30,
+        )
+
+    def setUp(self):
+        metrics.registry.reset()
+        cache.clear()
+
+    def recorded(self, url, view_name):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        stats = metrics.registry.snapshot()[view_name]
+        self.assertEqual(stats['requests'], 1)
+        self.assertEqual(stats['queries'], len(queries))
+        return stats
+
+    def test_sync_view_is_tagged_with_its_queries(self):
+        self.client.force_login(self.staff)
+        stats = self.recorded(reverse('appointments:dashboard'), 'appointments:dashboard')
+        self.assertGreater(stats['queries'], 0)
+        self.assertGreater(stats['wall_time'], 0)
+        self.assertGreater(stats['render_time'], 0)
+
+    def test_async_view_is_tagged_with_its_queries(self):
+        stats = self.recorded(reverse('package_list_json'), 'package_list_json')
+        self.assertGreater(stats['queries'], 0)
+
+    def test_repeated_query_shape_is_flagged_as_n_plus_one(self):
+        recorder = metrics.RequestRecorder()
+        for pk in range(6):
+            recorder.sql_wrapper(lambda *args: None, 'SELECT * FROM "users_user" WHERE "id" = %s', [pk], False, {})
+        recorder.sql_wrapper(lambda *args: None, 'SELECT 1 WHERE "id" IN (%s, %s)', [1, 2], False, {})
+        recorder.sql_wrapper(lambda *args: None, 'SELECT 1 WHERE "id" IN (%s)', [1], False, {})
+        self.assertEqual(recorder.repeated_queries(2), [
+            ('SELECT * FROM "users_user" WHERE "id" = %s', 6), ('SELECT 1 WHERE "id" IN (...)', 2),
+        ])
+
+        with self.assertLogs('core.metrics', 'WARNING') as logs:
+            metrics.record_request('customer_dashboard', recorder)
+        self.assertIn('Possible N+1 in customer_dashboard', logs.output[0])
+        self.assertEqual(metrics.registry.snapshot()['customer_dashboard']['n_plus_one'], 1)
+        self.assertIn('salon_n_plus_one_total{view="customer_dashboard"} 1\n', metrics.render_prometheus())
+
+    def test_server_timing_is_only_shown_to_staff(self):
+        for url in (reverse('home'), reverse('package_list_json')):
+            with self.subTest(url=url):
+                self.client.logout()
+                self.assertNotIn('Server-Timing', self.client.get(url))
+                self.client.force_login(self.staff)
+                self.assertIn('queries', self.client.get(url)['Server-Timing'])
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_metrics_endpoint_is_staff_or_token_only(self):
+        url = reverse('metrics')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(self.client.get(url, headers={'Authorization': 'Bearer wrong'}).status_code, 403)
+
+        response = self.client.get(url, headers={'Authorization': 'Bearer s3cret'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('salon_requests_total{view="metrics"} 2', response.content.decode())
+
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(username='customer', phone_number='+92-300-1234567')
+        package = ServicePackage.objects.create(
+            name='Hydra Facial', description='Facial', category='SKIN', price=5000, duration=30,
+        )
+        Resource.objects.create(name='Chair 1')
+        day = date.today() + timedelta(days=7)
+        start = timezone.now()
+        for number in range(5):
+            appointment = book_appointment(
+                Appointment(customer=cls.customer, package=package, date=day, time=time(10 + number, 0)),
+            )
+            # The last two share a timestamp, so the id breaks the tie
+            Appointment.objects.filter(pk=appointment.pk).update(created_at=start + timedelta(minutes=min(number, 3)))
+        cls.newest_first = list(Appointment.objects.order_by('-created_at', '-pk'))
+
+    def page(self, **cursors):
+        return paginate_newest_first(Appointment.objects.all(), 2, **cursors)
+
+    def test_pages_walk_forward_and_back(self):
+        first = self.page()
+        self.assertEqual(first.object_list, self.newest_first[:2])
+        self.assertFalse(first.has_previous())
+        self.assertIsNone(first.previous_cursor)
+
+        second = self.page(after=first.next_cursor)
+        self.assertEqual(second.object_list, self.newest_first[2:4])
+        third = self.page(after=second.next_cursor)
+        self.assertEqual(third.object_list, self.newest_first[4:])
+        self.assertFalse(third.has_next())
+        self.assertIsNone(third.next_cursor)
+
+        back = self.page(before=third.previous_cursor)
+        self.assertEqual(back.object_list, self.newest_first[2:4])
+        self.assertEqual(self.page(before=back.previous_cursor).object_list, self.newest_first[:2])
+
+    def test_before_with_nothing_newer_gives_the_first_page(self):
+        page = self.page(before=encode_cursor(self.newest_first[0]))
+        self.assertEqual(page.object_list, self.newest_first[:2])
+        self.assertFalse(page.has_previous())
+
+    def test_empty_page_has_no_cursors(self):
+        page = self.page(after=encode_cursor(self.newest_first[-1]))
+        self.assertEqual(page.object_list, [])
+        self.assertIsNone(page.next_cursor)
+        self.assertIsNone(page.previous_cursor)
+
+    def test_malformed_cursor_gives_the_first_page(self):
+        self.assertEqual(self.page(after='not-a-cursor').object_list, self.newest_first[:2])
+
+    def test_stale_previous_link_renders(self):
+        self.client.force_login(self.customer)
+        cursor = encode_cursor(self.newest_first[0])
+        response = self.client.get(reverse('appointments:dashboard'), {'before': cursor})
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(NOTIFICATION_BACKENDS={
+    'EMAIL': 'core.notifications.MemoryBackend',
+    'SMS': 'core.notifications.MemoryBackend',
+})
+class NotificationOutboxTests(TestCase):
+    def setUp(self):
+        MemoryBackend.outbox.clear()
+        self.customer = User.objects.create_user(
+            username='customer', phone_number='+92-300-1234567', email='customer@example.com',
+        )
+        self.package = ServicePackage.objects.create(
+            name='Hydra Facial', description='Facial', category='SKIN', price=5000, duration=30,
+        )
+        Resource.objects.create(name='Chair 1')
+        self.day = date.today() + timedelta(days=7)
+
+    def book(self, start):
+        return book_appointment(Appointment(customer=self.customer, package=self.package, date=self.day, time=start))
+
+    def test_messages_are_queued_with_the_booking_and_sent_once(self):
+        appointment = self.book(time(11, 0))
+        with self.assertRaises(SlotUnavailable):
+            self.book(time(11, 0))  # Rolled back, and its messages with it
+        transition_appointment(appointment, 'CONFIRMED')
+        self.assertEqual(OutboxMessage.objects.filter(status='PENDING').count(), 4)
+
+        self.assertEqual(drain(), (4, 0))
+        self.assertEqual(drain(), (0, 0))
+        self.assertEqual(
+            sorted(message.idempotency_key for message in MemoryBackend.outbox),
+            [f'appointment-{appointment.pk}-{event}-{channel}'
+             for event in ('booked', 'confirmed') for channel in ('email', 'sms')],
+        )
+        self.assertEqual(OutboxMessage.objects.filter(status='SENT').count(), 4)
+
+    @override_settings(NOTIFICATION_BACKENDS={'SMS': 'core.notifications.MemoryBackend'})
+    def test_confirmation_email_is_sent_by_default(self):
+        appointment = self.book(time(11, 0))
+        self.assertEqual(drain(), (2, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['customer@example.com'])
+        self.assertEqual(mail.outbox[0].extra_headers['X-Idempotency-Key'], f'appointment-{appointment.pk}-booked-email')
+
+    @override_settings(
+        NOTIFICATION_BACKENDS={'EMAIL': 'core.tests.FailingBackend', 'SMS': 'core.tests.FailingBackend'},
+        NOTIFICATION_MAX_ATTEMPTS=2,
+        NOTIFICATION_RETRY_DELAY=60,
+    )
+    def test_failures_are_retried_with_backoff_then_given_up(self):
+        self.book(time(11, 0))
+        with self.assertLogs('core.notifications', 'WARNING'):
+            self.assertEqual(drain(), (0, 2))
+        message = OutboxMessage.objects.first()
+        self.assertEqual((message.status, message.attempts), ('PENDING', 1))
+        self.assertGreater(message.next_attempt_at, timezone.now() + timedelta(seconds=50))
+        self.assertIn('gateway down', message.last_error)
+        self.assertEqual(drain(), (0, 0))  # Not due yet
+
+        OutboxMessage.objects.update(next_attempt_at=timezone.now())
+        with self.assertLogs('core.notifications', 'WARNING'):
+            self.assertEqual(drain(), (0, 2))
+        self.assertEqual(set(OutboxMessage.objects.values_list('status', flat=True)), {'FAILED'})
+
+
+class AuditLogTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(
+            username='staff', phone_number='+92-300-7654321', is_staff=True, is_superuser=True,
+        )
+        customer = User.objects.create_user(username='customer', phone_number='+92-300-1234567')
+        package = ServicePackage.objects.create(
+            name='Hydra Facial', description='Facial', category='SKIN', price=5000, duration=30,
+        )
+        Resource.objects.create(name='Chair 1')
+        self.appointment = book_appointment(Appointment(
+            customer=customer, package=package, date=date.today() + timedelta(days=7), time=time(11, 0),
+        ))
+        self.client.force_login(self.staff)
+
+    def test_staff_actions_are_buffered_then_written_together(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('appointments:approve_appointment', args=[self.appointment.pk]))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('admin:appointments_appointment_changelist'), {
+                'action': 'mark_cancelled', '_selected_action': [self.appointment.pk],
+            })
+        self.assertEqual(AuditEntry.objects.count(), 0)  # Still in the buffer
+
+        entries = list(audit.history(self.appointment))
+        self.assertEqual(
+            [(entry.actor, entry.action, entry.status_before, entry.status_after) for entry in entries],
+            [(self.staff, 'transition', 'CONFIRMED', 'CANCELLED'), (self.staff, 'transition', 'PENDING', 'CONFIRMED')],
+        )
+        with self.assertRaises(TypeError):
+            entries[0].save()
+        with self.assertRaises(TypeError):
+            AuditEntry.objects.update(status_after='')
+
+    def test_file_backend_rotates_and_can_be_queried(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            AUDIT_LOG_BACKEND='file', AUDIT_LOG_FILE=Path(directory) / 'audit.jsonl',
+            AUDIT_LOG_MAX_BYTES=1000, AUDIT_BUFFER_SIZE=3,
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                for number in range(9):
+                    audit.record([audit.entry(self.staff, audit.ADMIN_CHANGE, Resource, number, message='x' * 100)])
+            self.assertTrue((Path(directory) / 'audit.jsonl.1').exists())  # Rotated
+            self.assertEqual(AuditEntry.objects.count(), 0)
+            entries = audit.query(Resource, actor=self.staff)
+            self.assertEqual([entry.object_id for entry in entries], [str(n) for n in range(8, -1, -1)])
+            self.assertEqual(audit.history(Resource, 4)[0].actor_name, 'staff')
+
+
+class BackupTests(TransactionTestCase):
+    def test_backup_is_a_verified_gzipped_snapshot_with_retention(self):
+        User.objects.create_user(username='customer', phone_number='+92-300-1234567')
+        with tempfile.TemporaryDirectory() as directory:
+            directory = Path(directory)
+            for day in (1, 2, 3):
+                (directory / f'db-2000010{day}-020000.sqlite3.gz').write_bytes(b'')
+
+            result = backup(directory, keep=2, pages=5, sleep=0)
+
+            self.assertEqual(result['pruned'], ['db-20000101-020000.sqlite3.gz', 'db-20000102-020000.sqlite3.gz'])
+            self.assertEqual(
+                sorted(path.name for path in directory.iterdir()),
+                ['db-20000103-020000.sqlite3.gz', Path(result['path']).name, 'history.jsonl'],
+            )
+            copy = directory / 'copy.sqlite3'
+            copy.write_bytes(gzip.decompress(Path(result['path']).read_bytes()))
+            database = sqlite3.connect(copy)
+            try:
+                self.assertEqual(database.execute("SELECT username FROM users_user").fetchall(), [('customer',)])
+            finally:
+                database.close()
+            history = json.loads((directory / 'history.jsonl').read_text())
+            self.assertEqual((history['pages'], history['restarts']), (result['pages'], 0))
+            self.assertGreater(history['mb_per_second'], 0)
+
+
+class SeedDataTests(TestCase):
+    def test_seeded_schedule_is_consistent(self):
+        seed(users=20, packages=5, resources=3, appointments=300, seed=1)
+        self.assertEqual(Appointment.objects.count(), 300)
+        self.assertEqual(BookingSlot.objects.filter(appointment__isnull=False).count(), 300)
+        stats = get_dashboard_stats()
+        self.assertEqual(
+            sum(stats[f'{status}_count'] for status in ('pending', 'confirmed', 'completed', 'cancelled')), 300,
+        )
+        # No two slots of one stylist/chair overlap
+        previous = {}
+        for resource, day, start, end in BookingSlot.objects.order_by('resource', 'date', 'start_time').values_list(
+            'resource', 'date', 'start_time', 'end_time',
+        ):
+            if previous.get(resource, (None, None))[0] == day:
+                self.assertLessEqual(previous[resource][1], start)
+            previous[resource] = (day, end)
+
+    def test_every_route_is_benchmarked_or_skipped(self):
+        self.assertEqual(uncovered_routes(), [])
@@ -1,4 +1,9 @@
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
 from django.shortcuts import render
+from django.utils.crypto import constant_time_compare
+from .metrics import render_prometheus
 
 def home(request):
     return render(request, 'core/home.html')
@@ -11,3 +16,10 @@ def contact_view(request):
     """Contact page view"""
     return render(request, 'core/contact.html')
 
+def metrics_view(request):
+    """Per-view request metrics in Prometheus text format (staff or METRICS_TOKEN bearer only)"""
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    bearer = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    if not (request.user.is_staff or (token and constant_time_compare(bearer, token))):
+        raise PermissionDenied
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
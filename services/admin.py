@@ -1,8 +1,9 @@
 from django.contrib import admin
+from core.audit import AuditedAdminMixin
 from .models import ServicePackage
 
 @admin.register(ServicePackage)
-class ServicePackageAdmin(admin.ModelAdmin):
+class ServicePackageAdmin(AuditedAdminMixin, admin.ModelAdmin):
     list_display = ('name', 'category', 'price', 'duration', 'is_active')
     list_filter = ('category', 'is_active')
     search_fields = ('name', 'description')
@@ -0,0 +1,70 @@
+"""
+Cached service catalog state for the package list and detail pages.
+
+The catalog changes maybe weekly, but the list is most of our anonymous traffic.
+The catalog version and last-modified time are derived from the package table
+(row count and newest updated_at) and cached; post_save/post_delete on
+ServicePackage drops the cached state so the next request derives a new version.
+
+The version keys the cached page fragments and package objects, and gives the
+ETag/Last-Modified for conditional GETs, so repeat visitors get a 304 and most
+requests never touch the database.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils.translation import get_language
+
+from .models import ServicePackage
+
+STATE_KEY = 'services:catalog_state'
+# Seconds before the state is re-derived anyway, for worker processes whose local
+# cache missed an invalidation
+STATE_TIMEOUT = 600
+# Seconds cached fragments and packages live; a new version makes them unreachable
+FRAGMENT_TIMEOUT = 86400
+
+
+def catalog_state():
+    """{'version': str, 'last_modified': datetime or None} for the whole catalog"""
+    state = cache.get(STATE_KEY)
+    if state is None:
+        totals = ServicePackage.objects.aggregate(count=Count('pk'), last_modified=Max('updated_at'))
+        last_modified = totals['last_modified']
+        stamp = int(last_modified.timestamp() * 1000) if last_modified else 0
+        state = {'version': f"{totals['count']}.{stamp}", 'last_modified': last_modified}
+        cache.set(STATE_KEY, state, STATE_TIMEOUT)
+    return state
+
+
+def catalog_version():
+    return catalog_state()['version']
+
+
+def bump_catalog_version():
+    cache.delete(STATE_KEY)
+
+
+def get_package(pk):
+    """An active package by pk from the cache, or None"""
+    key = f'services:package:{catalog_version()}:{pk}'
+    package = cache.get(key)
+    if package is None:
+        package = ServicePackage.objects.filter(pk=pk, is_active=True).first() or False
+        cache.set(key, package, FRAGMENT_TIMEOUT)
+    return package or None
+
+
+def catalog_etag(request, *args, **kwargs):
+    """
+    ETag for a catalog page. Pages differ by language, query string and whether the
+    visitor is logged in (the navigation changes), so all three are part of it.
+    """
+    user = request.user.pk if request.user.is_authenticated else 'anon'
+    query = hashlib.md5(request.GET.urlencode().encode()).hexdigest()[:8]
+    return f"{catalog_version()}-{get_language()}-{user}-{query}"
+
+
+def catalog_last_modified(request, *args, **kwargs):
+    return catalog_state()['last_modified']
@@ -0,0 +1,129 @@
+"""
+Responsive image variants for ServicePackage.image.
+
+Every card on the package list used to download the full-size upload. Here each image
+is resized once into several widths, in WebP and JPEG, and stored next to the
+original under packages/variants/ with a content hash in the filename, so the files
+can be cached forever. The list of variants is kept on the package
+(`image_variants`) and rendered as a srcset by the `package_picture` template tag.
+
+Resizing runs off the request thread: saving a package with a new image schedules
+the work on a small thread pool once the transaction commits, and
+`manage.py generate_image_variants` processes the whole catalog in batch.
+"""
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .models import ServicePackage
+
+logger = logging.getLogger(__name__)
+
+VARIANT_WIDTHS = (320, 640, 1024)
+# (format, Pillow format name, file extension, save options)
+VARIANT_FORMATS = (
+    ('webp', 'WEBP', 'webp', {'quality': 80, 'method': 6}),
+    ('jpeg', 'JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+)
+VARIANT_DIR = 'packages/variants'
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'IMAGE_VARIANT_WORKERS', 2),
+            thread_name_prefix='image-variants',
+        )
+    return _executor
+
+
+def _target_widths(original_width):
+    """Variant widths no larger than the original; small images get one copy at their own width"""
+    widths = [width for width in VARIANT_WIDTHS if width <= original_width]
+    return widths or [original_width]
+
+
+def render_variants(source):
+    """Yield (width, format, extension, bytes) for every variant of the open image `source`"""
+    image = ImageOps.exif_transpose(Image.open(source))
+    image = image.convert('RGB')
+    for width in _target_widths(image.width):
+        height = round(image.height * width / image.width)
+        resized = image.resize((width, height), Image.LANCZOS) if width != image.width else image
+        for name, pil_format, extension, options in VARIANT_FORMATS:
+            buffer = BytesIO()
+            resized.save(buffer, pil_format, **options)
+            yield width, name, extension, buffer.getvalue()
+
+
+def generate_variants(package, force=False):
+    """
+    Create the variants for `package.image` and record them on the package.
+    Returns True if anything was generated.
+    """
+    if not package.image:
+        if package.image_variants:
+            ServicePackage.objects.filter(pk=package.pk).update(image_variants={}, updated_at=timezone.now())
+        return False
+    if not force and package.image_variants.get('source') == package.image.name:
+        return False
+
+    stem = os.path.splitext(os.path.basename(package.image.name))[0]
+    variants = []
+    with package.image.open('rb') as source:
+        for width, name, extension, data in render_variants(source):
+            digest = hashlib.sha256(data).hexdigest()[:12]
+            path = f'{VARIANT_DIR}/{stem}-{width}w-{digest}.{extension}'
+            if not default_storage.exists(path):
+                path = default_storage.save(path, ContentFile(data))
+            variants.append({'width': width, 'format': name, 'name': path})
+
+    # Remove files of a previous upload that are no longer referenced
+    old = {variant['name'] for variant in package.image_variants.get('variants', [])}
+    for path in old - {variant['name'] for variant in variants}:
+        default_storage.delete(path)
+
+    package.image_variants = {'source': package.image.name, 'variants': variants}
+    package.updated_at = timezone.now()
+    # update() rather than save(): no signals, so no second round of processing.
+    # updated_at is set by hand because the catalog version is derived from it.
+    ServicePackage.objects.filter(pk=package.pk).update(
+        image_variants=package.image_variants, updated_at=package.updated_at,
+    )
+
+    # Cached catalog fragments embed the srcset, so they must be re-rendered
+    from .catalog import bump_catalog_version
+    bump_catalog_version()
+    return True
+
+
+def _generate_in_worker(package_id, force=False):
+    try:
+        package = ServicePackage.objects.filter(pk=package_id).first()
+        if package is not None:
+            generate_variants(package, force=force)
+    except Exception:
+        logger.exception("Could not generate image variants for package %s", package_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_variants(package):
+    """Generate variants for `package` on the worker pool after the current transaction commits"""
+    transaction.on_commit(lambda: get_executor().submit(_generate_in_worker, package.pk))
+
+
+def variant_url(variant):
+    return default_storage.url(variant['name'])
@@ -0,0 +1,37 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from services.images import generate_variants
+from services.models import ServicePackage
+
+
+class Command(BaseCommand):
+    help = "Generate resized WebP/JPEG copies of every service package image"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Regenerate variants that are already up to date")
+        parser.add_argument(
+            '--workers', type=int, default=getattr(settings, 'IMAGE_VARIANT_WORKERS', 2),
+            help="Number of images processed in parallel",
+        )
+
+    def handle(self, *args, **options):
+        packages = list(ServicePackage.objects.exclude(image='').exclude(image__isnull=True))
+
+        def process(package):
+            try:
+                return generate_variants(package, force=options['force'])
+            except Exception as error:
+                self.stderr.write(f"{package.name}: {error}")
+                return False
+            finally:
+                close_old_connections()
+
+        with ThreadPoolExecutor(max_workers=max(options['workers'], 1)) as executor:
+            generated = sum(executor.map(process, packages))
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated variants for {generated} of {len(packages)} package images."
+        ))
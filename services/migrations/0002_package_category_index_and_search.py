@@ -0,0 +1,65 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:14
+
+from django.db import migrations, models
+
+# Frozen copy of the index DDL and backfill at the time of writing, rather than an
+# import of services.search/core.search, so rebuilding a database from scratch always
+# creates the same index. "manage.py rebuild_search_index" reindexes with current code.
+TABLE = 'services_servicepackage_search'
+
+
+def full_text_backend(connection):
+    """'sqlite' (FTS5), 'postgresql' (tsvector) or None when there is no text index"""
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+            return 'sqlite' if cursor.fetchone()[0] else None
+    if connection.vendor == 'postgresql':
+        return 'postgresql'
+    return None
+
+
+def create_search_index(apps, schema_editor):
+    backend = full_text_backend(schema_editor.connection)
+    if backend is None:
+        return
+    if backend == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5(name, description, tokenize='unicode61')"
+        )
+    else:
+        schema_editor.execute(f"CREATE TABLE IF NOT EXISTS {TABLE} (id bigint PRIMARY KEY, document tsvector NOT NULL)")
+        schema_editor.execute(f"CREATE INDEX IF NOT EXISTS {TABLE}_document ON {TABLE} USING GIN (document)")
+
+    ServicePackage = apps.get_model('services', 'ServicePackage')
+    rows = list(ServicePackage.objects.values_list('pk', 'name', 'description'))
+    if not rows:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        if backend == 'sqlite':
+            cursor.executemany(f"INSERT INTO {TABLE} (rowid, name, description) VALUES (%s, %s, %s)", rows)
+        else:
+            cursor.executemany(
+                f"INSERT INTO {TABLE} (id, document) VALUES (%s, to_tsvector('simple', %s))",
+                [[pk, f"{name} {description}"] for pk, name, description in rows],
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    if full_text_backend(schema_editor.connection):
+        schema_editor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='servicepackage',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category'], name='package_active_category_idx'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
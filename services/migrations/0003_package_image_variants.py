@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0002_package_category_index_and_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='servicepackage',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -16,6 +16,8 @@ class ServicePackage(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2, help_text=_("Price in PKR"))
     duration = models.PositiveIntegerField(help_text=_("Duration in minutes"))
     image = models.ImageField(upload_to='packages/', blank=True, null=True)
+    # Resized copies of `image` for srcset, filled in by services.images
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -26,3 +28,8 @@ class ServicePackage(models.Model):
     class Meta:
         verbose_name = _("Service Package")
         verbose_name_plural = _("Service Packages")
+        indexes = [
+            # Public package list filtered by category. Partial, because SQLite compiles
+            # is_active=True to a bare "is_active" test that cannot seek an index column.
+            models.Index(fields=['category'], condition=models.Q(is_active=True), name='package_active_category_idx'),
+        ]
@@ -0,0 +1,80 @@
+"""
+Package recommendations for the customer dashboard.
+
+Picking random rows with ORDER BY ? makes the database shuffle the whole active
+catalog on every page view. Instead the active package ids are cached, grouped by
+category, and sampled in Python; the chosen packages are then loaded with a single
+primary-key IN query. When a customer has booked before, packages from the
+categories they book most are offered first. Their category ranking is cached per
+customer and refreshed when they book again.
+"""
+import random
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import ServicePackage
+
+CATALOG_KEY = 'services:active_package_ids'
+# Seconds before cached ids are refreshed anyway (other worker processes may have
+# changed the catalog without this process's cache being invalidated)
+CATALOG_TIMEOUT = 600
+USER_CATEGORIES_TIMEOUT = 3600
+
+
+def _user_key(user_id):
+    return f'services:preferred_categories:{user_id}'
+
+
+def active_package_ids():
+    """{category: [package ids]} for every active package, cached"""
+    ids = cache.get(CATALOG_KEY)
+    if ids is None:
+        ids = {}
+        for pk, category in ServicePackage.objects.filter(is_active=True).values_list('pk', 'category'):
+            ids.setdefault(category, []).append(pk)
+        cache.set(CATALOG_KEY, ids, CATALOG_TIMEOUT)
+    return ids
+
+
+def preferred_categories(user):
+    """The categories `user` has booked, most booked first, cached per user"""
+    categories = cache.get(_user_key(user.pk))
+    if categories is None:
+        categories = list(
+            user.appointments.values_list('package__category', flat=True)
+            .annotate(bookings=Count('pk'))
+            .order_by('-bookings')
+        )
+        cache.set(_user_key(user.pk), categories, USER_CATEGORIES_TIMEOUT)
+    return categories
+
+
+def invalidate_catalog():
+    cache.delete(CATALOG_KEY)
+
+
+def invalidate_user(user_id):
+    cache.delete(_user_key(user_id))
+
+
+def recommend_packages(user=None, count=3):
+    """
+    Up to `count` active packages, favouring the categories `user` books most and
+    sampling at random within and after them. Costs one query when the caches are warm.
+    """
+    by_category = active_package_ids()
+    chosen = []
+    if user is not None and user.is_authenticated:
+        for category in preferred_categories(user):
+            candidates = by_category.get(category, [])
+            chosen += random.sample(candidates, min(len(candidates), count - len(chosen)))
+            if len(chosen) >= count:
+                break
+
+    if len(chosen) < count:
+        remaining = [pk for ids in by_category.values() for pk in ids if pk not in chosen]
+        chosen += random.sample(remaining, min(len(remaining), count - len(chosen)))
+
+    packages = ServicePackage.objects.filter(pk__in=chosen, is_active=True).in_bulk()
+    return [packages[pk] for pk in chosen if pk in packages]
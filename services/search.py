@@ -0,0 +1,22 @@
+"""
+Full-text search over service package names and descriptions (see core.search).
+"""
+from core.search import SearchIndex
+
+package_index = SearchIndex(
+    table='services_servicepackage_search',
+    columns=['name', 'description'],
+    fallback_fields=['name', 'description'],
+)
+
+
+def index_package(package):
+    package_index.update(package.pk, {'name': package.name, 'description': package.description})
+
+
+def rebuild_index(queryset):
+    count = 0
+    for package in queryset.iterator():
+        index_package(package)
+        count += 1
+    return count
@@ -0,0 +1,36 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .catalog import bump_catalog_version
+from .images import schedule_variants
+from .models import ServicePackage
+from .recommendations import invalidate_catalog
+from .search import index_package, package_index
+
+
+@receiver(post_save, sender=ServicePackage)
+@receiver(post_delete, sender=ServicePackage)
+def invalidate_catalog_cache(sender, **kwargs):
+    invalidate_catalog()
+    bump_catalog_version()
+
+
+@receiver(post_save, sender=ServicePackage)
+def index_package_on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_package(instance)
+
+
+@receiver(post_delete, sender=ServicePackage)
+def remove_package_from_index(sender, instance, **kwargs):
+    package_index.remove(instance.pk)
+
+
+@receiver(post_save, sender=ServicePackage)
+def generate_image_variants_on_save(sender, instance, raw=False, **kwargs):
+    # Only when the uploaded file changed; the resizing itself runs on the worker pool
+    if raw:
+        return
+    source = instance.image.name if instance.image else None
+    if source != instance.image_variants.get('source'):
+        schedule_variants(instance)
@@ -0,0 +1,47 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from ..images import variant_url
+
+register = template.Library()
+
+
+def _srcset(variants, image_format):
+    return ', '.join(
+        f"{variant_url(variant)} {variant['width']}w"
+        for variant in variants if variant['format'] == image_format
+    )
+
+
+@register.simple_tag
+def package_srcset(package, image_format='jpeg'):
+    """`srcset` value for the resized copies of the package image in `image_format`"""
+    return _srcset(package.image_variants.get('variants', []), image_format)
+
+
+@register.simple_tag
+def package_picture(package, sizes='100vw', style='', lazy=True):
+    """
+    <picture> for the package image: WebP variants for browsers that take them, JPEG
+    variants otherwise, and the original upload until the variants have been generated.
+    """
+    attrs = {'alt': package.name, 'style': style}
+    if lazy:
+        attrs.update(loading='lazy', decoding='async')
+    variants = package.image_variants.get('variants', [])
+    if not variants or package.image_variants.get('source') != package.image.name:
+        return format_html('<img src="{}"{}>', package.image.url, _attributes(attrs))
+
+    jpeg = [variant for variant in variants if variant['format'] == 'jpeg']
+    # Largest JPEG as the plain src for browsers without srcset
+    fallback = max(jpeg, key=lambda variant: variant['width'])
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}"{}></picture>',
+        _srcset(variants, 'webp'), sizes,
+        variant_url(fallback), _srcset(variants, 'jpeg'), sizes, _attributes(attrs),
+    )
+
+
+def _attributes(attrs):
+    return format_html_join('', ' {}="{}"', ((name, value) for name, value in attrs.items() if value))
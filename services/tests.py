@@ -1,3 +1,177 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import date, time, timedelta
+from io import BytesIO
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from appointments.booking import book_appointment
+from appointments.models import Appointment, Resource
+from users.models import User
+from .catalog import catalog_version
+from .images import generate_variants
+from .models import ServicePackage
+from .recommendations import recommend_packages
+
+
+def make_package(name='Hydra Facial', category='SKIN', **kwargs):
+    return ServicePackage.objects.create(
+        name=name, description=kwargs.pop('description', name), category=category,
+        price=kwargs.pop('price', 5000), duration=kwargs.pop('duration', 30), **kwargs,
+    )
+
+
+class CatalogTestCase(TestCase):
+    def setUp(self):
+        # The catalog lives in the cache, which outlives each test's transaction
+        cache.clear()
+
+
+class RecommendationTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.customer = User.objects.create_user(username='customer', phone_number='+92-300-1234567')
+        self.skin = [make_package(f'Facial {number}', 'SKIN') for number in range(2)]
+        self.hair = [make_package(f'Haircut {number}', 'HAIR') for number in range(3)]
+        make_package('Retired', 'SKIN', is_active=False)
+
+    def test_samples_distinct_active_packages(self):
+        for _attempt in range(10):
+            packages = recommend_packages(count=3)
+            self.assertEqual(len(set(packages)), 3)
+            self.assertTrue(all(package.is_active for package in packages))
+        self.assertEqual(len(recommend_packages(count=10)), 5)
+
+    def test_most_booked_categories_come_first(self):
+        Resource.objects.create(name='Chair 1')
+        day = date.today() + timedelta(days=3)
+        book_appointment(Appointment(customer=self.customer, package=self.skin[0], date=day, time=time(11, 0)))
+        for _attempt in range(10):
+            packages = recommend_packages(self.customer, count=3)
+            self.assertEqual({package.category for package in packages[:2]}, {'SKIN'})
+            self.assertEqual(packages[2].category, 'HAIR')
+
+    def test_warm_caches_cost_one_query(self):
+        recommend_packages(self.customer)
+        with self.assertNumQueries(1):
+            recommend_packages(self.customer)
+
+    def test_catalog_changes_are_picked_up(self):
+        recommend_packages()
+        ServicePackage.objects.update(is_active=False)
+        added = make_package('Keratin Treatment', 'HAIR')
+        self.assertEqual(recommend_packages(count=3), [added])
+
+
+class CatalogCacheTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.package = make_package()
+
+    def test_repeat_get_is_not_modified(self):
+        for url in (reverse('service_list'), reverse('service_detail', args=[self.package.pk]),
+                    reverse('package_list_json')):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                repeat = self.client.get(url, headers={'If-None-Match': response['ETag']})
+                self.assertEqual(repeat.status_code, 304)
+
+    def test_etag_differs_by_query_and_login(self):
+        url = reverse('service_list')
+        etag = self.client.get(url)['ETag']
+        self.assertNotEqual(self.client.get(url, {'category': 'SKIN'})['ETag'], etag)
+        self.client.force_login(User.objects.create_user(username='customer', phone_number='+92-300-1234567'))
+        self.assertNotEqual(self.client.get(url)['ETag'], etag)
+
+    def test_warm_list_does_not_query_packages(self):
+        url = reverse('service_list')
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.assertContains(self.client.get(url), 'Hydra Facial')
+
+    def test_editing_a_package_invalidates_cached_pages(self):
+        list_url = reverse('service_list')
+        detail_url = reverse('service_detail', args=[self.package.pk])
+        etag = self.client.get(list_url)['ETag']
+        self.client.get(detail_url)
+
+        self.package.name = 'Gold Facial'
+        self.package.save()
+        response = self.client.get(list_url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Gold Facial')
+        self.assertContains(self.client.get(detail_url), 'Gold Facial')
+
+        self.package.is_active = False
+        self.package.save()
+        self.assertNotContains(self.client.get(list_url), 'Gold Facial')
+        self.assertEqual(self.client.get(detail_url).status_code, 404)
+
+
+class PackageFilterTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        make_package('Hydra Facial', 'SKIN', description='Deep cleansing facial')
+        make_package('Gold Facial', 'SKIN', description='Glow treatment')
+        make_package('Keratin Treatment', 'HAIR', description='Smooth, frizz-free hair')
+        make_package('Party Makeup', 'MAKEUP', description='Evening look', is_active=False)
+
+    def names(self, **params):
+        response = self.client.get(reverse('service_list'), params)
+        return [package.name for package in response.context['packages']]
+
+    def test_category_filter(self):
+        self.assertEqual(self.names(category='SKIN'), ['Hydra Facial', 'Gold Facial'])
+        self.assertEqual(self.names(category='MAKEUP'), [])
+        # Unknown categories are ignored rather than emptying the list
+        self.assertEqual(len(self.names(category='NAILS')), 3)
+
+    def test_search(self):
+        self.assertEqual(sorted(self.names(q='facial')), ['Gold Facial', 'Hydra Facial'])
+        self.assertEqual(self.names(q='frizz'), ['Keratin Treatment'])
+        self.assertEqual(self.names(q='treat', category='HAIR'), ['Keratin Treatment'])
+        self.assertEqual(self.names(q='evening'), [])
+
+    def test_json_category_filter(self):
+        response = self.client.get(reverse('package_list_json'), {'category': 'HAIR'})
+        self.assertEqual([package['name'] for package in response.json()['packages']], ['Keratin Treatment'])
+
+
+class ImageVariantTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def upload(self, width=800, height=600):
+        buffer = BytesIO()
+        Image.new('RGB', (width, height), 'pink').save(buffer, 'JPEG')
+        return SimpleUploadedFile('facial.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def test_variants_are_rendered_once_generated(self):
+        package = make_package(image=self.upload())
+        response = self.client.get(reverse('service_list'))
+        self.assertNotContains(response, 'srcset')
+        version = catalog_version()
+
+        self.assertTrue(generate_variants(package))
+        widths = sorted({variant['width'] for variant in package.image_variants['variants']})
+        self.assertEqual(widths, [320, 640])
+        # The cached list, detail page and ETag must all move to a new version
+        self.assertNotEqual(catalog_version(), version)
+        self.assertContains(self.client.get(reverse('service_list')), '320w')
+        self.assertContains(self.client.get(reverse('service_detail', args=[package.pk])), 'srcset')
+
+    def test_up_to_date_variants_are_not_regenerated(self):
+        package = make_package(image=self.upload(width=200, height=200))
+        self.assertTrue(generate_variants(package))
+        self.assertEqual([variant['width'] for variant in package.image_variants['variants']], [200, 200])
+        self.assertFalse(generate_variants(package))
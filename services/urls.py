@@ -4,4 +4,5 @@ from . import views
 urlpatterns = [
     path('', views.PackageListView.as_view(), name='service_list'),
     path('<int:pk>/', views.PackageDetailView.as_view(), name='service_detail'),
+    path('packages.json', views.package_list_json, name='package_list_json'),
 ]
@@ -1,14 +1,140 @@
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import Case, When
+from django.http import Http404, JsonResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.decorators import method_decorator
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import condition
 from django.views.generic import ListView, DetailView
+from .catalog import (
+    FRAGMENT_TIMEOUT, catalog_etag, catalog_last_modified, catalog_state, catalog_version, get_package,
+)
+from .images import variant_url
+from .search import package_index
 from .models import ServicePackage
 
+# Repeat visitors revalidate with If-None-Match/If-Modified-Since and get a 304
+catalog_conditional = method_decorator(
+    condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified),
+    name='dispatch',
+)
+
+@catalog_conditional
 class PackageListView(ListView):
     model = ServicePackage
     template_name = 'services/package_list.html'
     context_object_name = 'packages'
     queryset = ServicePackage.objects.filter(is_active=True)
+    paginate_by = 12
+
+    def get_filters(self):
+        category = self.request.GET.get('category', '')
+        if category not in dict(ServicePackage.CATEGORY_CHOICES):
+            category = ''
+        return category, self.request.GET.get('q', '').strip()
+
+    def get_matching_ids(self):
+        """Ids of the packages matching the filters, in display order, cached per catalog version"""
+        category, search_query = self.get_filters()
+        key = 'services:package_ids:' + hashlib.md5(
+            f'{catalog_version()}|{category}|{search_query}'.encode()
+        ).hexdigest()
+        ids = cache.get(key)
+        if ids is None:
+            queryset = self.queryset.all()
+            if category:
+                queryset = queryset.filter(category=category)
+            if search_query:
+                queryset = package_index.rank(queryset, search_query)
+            else:
+                queryset = queryset.order_by('pk')
+            ids = list(queryset.values_list('pk', flat=True))
+            cache.set(key, ids, FRAGMENT_TIMEOUT)
+        return ids
+
+    def paginate_queryset(self, queryset, page_size):
+        # Paginate the cached ids; only the visible page is loaded, and only when the
+        # template's cached fragment misses (the queryset is lazy)
+        paginator = Paginator(self.get_matching_ids(), page_size)
+        page = paginator.get_page(self.request.GET.get(self.page_kwarg))
+        page_ids = list(page.object_list)
+        packages = queryset.filter(pk__in=page_ids).order_by(
+            Case(*[When(pk=pk, then=position) for position, pk in enumerate(page_ids)])
+        ) if page_ids else queryset.none()
+        return paginator, page, packages, page.has_other_pages()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Keys the cached package grid; the queryset is only evaluated on a cache miss
+        context['catalog_version'] = catalog_version()
+        context['category_filter'], context['search_query'] = self.get_filters()
+        context['categories'] = ServicePackage.CATEGORY_CHOICES
+        return context
 
+@catalog_conditional
 class PackageDetailView(DetailView):
     model = ServicePackage
     template_name = 'services/package_detail.html'
     context_object_name = 'package'
     queryset = ServicePackage.objects.filter(is_active=True)
+
+    def get_object(self, queryset=None):
+        package = get_package(self.kwargs['pk'])
+        if package is None:
+            raise Http404("No service package found")
+        return package
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['catalog_version'] = catalog_version()
+        return context
+
+def _package_json(package):
+    variants = package.image_variants
+    current = package.image and variants.get('source') == package.image.name
+    return {
+        'id': package.pk,
+        'name': package.name,
+        'category': package.category,
+        'price': str(package.price),
+        'duration': package.duration,
+        'url': reverse('service_detail', args=[package.pk]),
+        'image': package.image.url if package.image else None,
+        'images': [
+            {'width': variant['width'], 'format': variant['format'], 'url': variant_url(variant)}
+            for variant in variants.get('variants', [])
+        ] if current else [],
+    }
+
+async def package_list_json(request):
+    """
+    Active packages as JSON for the mobile app, optionally ?category=SKIN. Cached per
+    catalog version and revalidated with its ETag, like the HTML list.
+    """
+    category = request.GET.get('category', '')
+    if category not in dict(ServicePackage.CATEGORY_CHOICES):
+        category = ''
+    state = await sync_to_async(catalog_state)()
+    etag = quote_etag(f"{state['version']}-{category or 'all'}")
+    last_modified = int(state['last_modified'].timestamp()) if state['last_modified'] else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        key = f"services:package_json:{state['version']}:{category}"
+        packages = await cache.aget(key)
+        if packages is None:
+            queryset = ServicePackage.objects.filter(is_active=True).order_by('pk')
+            if category:
+                queryset = queryset.filter(category=category)
+            packages = [_package_json(package) async for package in queryset]
+            await cache.aset(key, packages, FRAGMENT_TIMEOUT)
+        response = JsonResponse({'packages': packages})
+    response.headers['ETag'] = etag
+    if last_modified:
+        response.headers['Last-Modified'] = http_date(last_modified)
+    return response
@@ -1,9 +1,10 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from core.audit import AuditedAdminMixin
 from .models import User
 
 @admin.register(User)
-class CustomUserAdmin(UserAdmin):
+class CustomUserAdmin(AuditedAdminMixin, UserAdmin):
     """
     Admin configuration for the custom User model.
     """
@@ -1,3 +1,40 @@
+from datetime import date, time, timedelta
+
 from django.test import TestCase
+from django.urls import reverse
+
+from appointments.booking import book_appointment
+from appointments.models import Appointment, BookingSlot, Resource
+from services.models import ServicePackage
+from .models import User
+
+
+class CustomerDashboardQueryCountTests(TestCase):
+    """The dashboard must cost a fixed number of queries however many appointments it shows"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(username='customer', phone_number='+92-300-1234567')
+        cls.package = ServicePackage.objects.create(
+            name='Hydra Facial', description='Facial', category='SKIN', price=5000, duration=30,
+        )
+        Resource.objects.create(name='Chair 1')
+
+    def add_appointments(self, count):
+        for number in range(count):
+            # Half upcoming, half in the past
+            day = date.today() + timedelta(days=3 if number % 2 else -3)
+            start = time(10 + number // 2, 0)
+            book_appointment(Appointment(customer=self.customer, package=self.package, date=day, time=start))
 
-# Create your tests here.
+    def test_dashboard_query_count_is_constant(self):
+        self.client.force_login(self.customer)
+        for count in (2, 10):
+            self.add_appointments(count)
+            # Warm the recommendation caches (services.recommendations)
+            self.client.get(reverse('dashboard'))
+            with self.assertNumQueries(5):
+                response = self.client.get(reverse('dashboard'))
+            self.assertEqual(response.status_code, 200)
+            BookingSlot.objects.all().delete()
+            Appointment.objects.all().delete()
@@ -6,7 +6,7 @@ from django.views.generic import CreateView, TemplateView, UpdateView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from .forms import CustomUserCreationForm, UserProfileForm
 from appointments.models import Appointment
-from services.models import ServicePackage
+from services.recommendations import recommend_packages
 from django.utils import timezone
 from django.contrib import messages
 from django.utils.translation import gettext_lazy as _
@@ -40,20 +40,21 @@ class CustomerDashboardView(LoginRequiredMixin, TemplateView):
         context = super().get_context_data(**kwargs)
         user = self.request.user
         
+        # Package and slot are shown for every row; fetch them in the same query
+        appointments = Appointment.objects.filter(customer=user).select_related('package', 'booking_slot')
+        
         # Upcoming Appointments
-        context['upcoming_appointments'] = Appointment.objects.filter(
-            customer=user,
+        context['upcoming_appointments'] = appointments.filter(
             date__gte=timezone.now().date()
         ).order_by('date', 'time')
         
         # Appointment History (Past)
-        context['appointment_history'] = Appointment.objects.filter(
-            customer=user,
+        context['appointment_history'] = appointments.filter(
             date__lt=timezone.now().date()
         ).order_by('-date', '-time')
         
-        # Recommended Packages (Simple logic: Random or latest 3)
-        context['recommended_packages'] = ServicePackage.objects.filter(is_active=True).order_by('?')[:3]
+        # Recommended Packages (favouring the customer's usual categories)
+        context['recommended_packages'] = recommend_packages(user)
         
         return context
 